@@ -0,0 +1,12 @@
+"""
+Vercel Python函数 - 除/api/test外的所有/api/*请求
+
+实现见backend/serverless.py，与Flask后端共用backend/core中的接口和backend/services中的服务。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from serverless import handler
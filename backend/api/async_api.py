@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步API模块 - 在ASGI入口中以协程处理需要等待DeepSeek和科大讯飞的接口
+
+接口实现在core/async_interview.py和core/async_speech.py中，这里把Starlette请求转换为core.http.Request，
+再把返回的Response写回客户端；流式语音识别的WebSocket与框架相关，在这里实现。
+其余接口仍由Flask蓝图处理，见asgi.py。
+"""
+
+import io
+import json
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute, request_response, websocket_session
+from starlette.websockets import WebSocketDisconnect
+from core.http import Request
+from core import async_interview, async_speech
+from services.async_xfyun_service import AsyncStreamingASRSession
+from services.xfyun_service import XFYUN_APP_ID
+from services.metrics import start_request, finish_request
+
+
+async def core_request(request):
+    """读取请求体后把Starlette请求转换为core.http.Request"""
+    body = await request.body()
+    return Request(
+        request.method, request.url.path,
+        args=request.query_params,
+        headers=request.headers,
+        stream=io.BytesIO(body),
+        host=request.headers.get('host', ''),
+        secure=request.url.scheme == 'https'
+    )
+
+
+async def _iterate(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def starlette_response(response):
+    """把core.http.Response转换为Starlette响应"""
+    headers = dict(response.headers)
+    if response.payload is not None:
+        return JSONResponse(response.payload, status_code=response.status, headers=headers)
+    body = response.body
+    if isinstance(body, (bytes, str)):
+        return Response(body, status_code=response.status, media_type=response.mimetype, headers=headers)
+    if isinstance(body, (list, tuple)):
+        # 编码后的各数据块依次写出，不拼接成新的缓冲区，也不交给线程池迭代
+        body = _iterate(body)
+    return StreamingResponse(body, status_code=response.status, media_type=response.mimetype, headers=headers)
+
+
+def _endpoint(handler):
+    async def endpoint(request):
+        return starlette_response(await handler(await core_request(request)))
+
+    return endpoint
+
+
+async def asr_websocket(websocket):
+    """流式语音识别WebSocket，协议同Flask版本"""
+    await websocket.accept()
+    language = websocket.query_params.get('language', 'zh')
+    xf_language = 'zh_cn' if language == 'zh' else 'en_us'
+
+    async def send(message):
+        try:
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+        except Exception:
+            # 客户端已断开
+            pass
+
+    if not XFYUN_APP_ID:
+        await send({'type': 'error', 'message': '科大讯飞API配置缺失'})
+        await websocket.close()
+        return
+
+    session = AsyncStreamingASRSession(
+        language=xf_language,
+        on_partial=lambda text: send({'type': 'partial', 'text': text})
+    )
+    try:
+        await session.open()
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            if message.get('bytes') is not None:
+                await session.send_audio(message['bytes'])
+            elif json.loads(message.get('text') or '{}').get('type') == 'end':
+                break
+
+        text = await session.finish()
+        if session.error:
+            await send({'type': 'error', 'message': session.error, 'text': text})
+        else:
+            await send({'type': 'final', 'text': text, 'source': 'xfyun'})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"流式语音识别出错: {str(e)}")
+        await send({'type': 'error', 'message': str(e)})
+    finally:
+        await session.close()
+
+
+class _Timed:
+    """
+    记录接口耗时的ASGI包装，与Flask接口使用相同的指标和路由标签
+
+    在ASGI层计时，流式响应在响应体发送完毕后才结束计时。
+    """
+
+    def __init__(self, path, endpoint, websocket=False):
+        self.path = path
+        self.app = websocket_session(endpoint) if websocket else request_response(endpoint)
+
+    async def __call__(self, scope, receive, send):
+        phases = start_request()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'websocket.accept':
+                status = 101
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            finish_request(phases, self.path, scope.get('method', 'GET'), status)
+
+
+def _route(path, handler, methods):
+    return Route(path, _Timed(path, _endpoint(handler)), methods=methods)
+
+
+# 由ASGI入口以协程处理的路由，其余路由交给Flask
+routes = [
+    _route('/api/interview/question', async_interview.get_question, methods=['GET']),
+    _route('/api/interview/question/stream', async_interview.stream_question, methods=['GET']),
+    _route('/api/interview/answer', async_interview.submit_answer, methods=['POST']),
+    _route('/api/speech/tts', async_speech.text_to_speech_api, methods=['POST']),
+    _route('/api/speech/tts/stream', async_speech.text_to_speech_stream_api, methods=['POST']),
+    WebSocketRoute('/api/speech/ws', _Timed('/api/speech/ws', asr_websocket, websocket=True))
+]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Flask适配层 - 把core中与框架无关的处理函数注册为蓝图路由
+"""
+
+from flask import request, jsonify, Response, stream_with_context
+from core.http import Request
+from core.routes import ROUTES, resolve
+
+
+def core_request():
+    """把当前Flask请求转换为core.http.Request"""
+    return Request(
+        request.method, request.path,
+        args=request.args,
+        headers=request.headers,
+        stream=request.stream,
+        host=request.host,
+        secure=request.is_secure,
+        json_loader=lambda: request.get_json(silent=True),
+        form_loader=lambda: (request.form, request.files)
+    )
+
+
+def flask_response(response):
+    """把core.http.Response转换为Flask响应；流式响应在请求上下文中生成，发送完毕后才结束计时"""
+    if response.payload is not None:
+        result = jsonify(response.payload)
+        result.status_code = response.status
+        result.headers.update(response.headers)
+        return result
+    body = stream_with_context(response.body) if response.streamed else response.body
+    return Response(body, status=response.status, mimetype=response.mimetype, headers=response.headers)
+
+
+def _view(target):
+    def view():
+        return flask_response(resolve(target)(core_request()))
+
+    return view
+
+
+def register_routes(blueprint, prefix):
+    """
+    把路由表中某个URL前缀下的接口注册到蓝图
+
+    Args:
+        blueprint: Flask蓝图，注册到应用时使用相同的url_prefix
+        prefix: core.routes.ROUTES中的URL前缀
+    """
+    for method, path, target in ROUTES[prefix]:
+        endpoint = target.partition(':')[2]
+        blueprint.add_url_rule(path, endpoint=endpoint, view_func=_view(target), methods=[method])
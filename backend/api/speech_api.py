@@ -3,111 +3,64 @@
 
 """
 语音服务API模块 - 提供语音识别和合成的REST API接口
+
+REST接口实现在core/speech.py中，与Serverless函数共用；流式语音识别需要WebSocket长连接，只在这里提供。
 """
 
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request
+from flask_sock import Sock
 import json
-import base64
-import time
-from services.xfyun_service import text_to_speech, speech_to_text
+import threading
+from api.flask_adapter import register_routes
+from services.xfyun_service import StreamingASRSession, XFYUN_APP_ID
 
 # 创建Blueprint
 speech_api = Blueprint('speech_api', __name__)
+register_routes(speech_api, '/api/speech')
 
-@speech_api.route('/tts', methods=['POST'])
-def text_to_speech_api():
-    """文本转语音API"""
-    data = request.json
-    
-    # 验证请求数据
-    if not data or 'text' not in data:
-        return jsonify({
-            'status': 'error',
-            'message': '缺少必要参数'
-        }), 400
-    
-    text = data.get('text')
-    language = data.get('language', 'zh')
-    voice = data.get('voice', 'xiaoyan')  # 默认使用讯飞小燕声音
-    
-    # 调用科大讯飞TTS服务
-    result = text_to_speech(text, voice=voice)
-    
-    if not result.get('success', False):
-        # 如果科大讯飞服务调用失败，返回模拟数据
-        dummy_audio = base64.b64encode(b'DUMMY_AUDIO_DATA').decode('utf-8')
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'audio': dummy_audio,
-                'format': 'wav',
-                'duration': 2.5,  # 模拟音频长度（秒）
-                'source': 'mock'  # 标记为模拟数据
-            }
-        })
-    
-    # 返回真实的音频数据
-    return jsonify({
-        'status': 'success',
-        'data': {
-            'audio': result['audio'],
-            'format': 'wav',
-            'duration': 0,  # 实际长度未知
-            'source': 'xfyun'  # 标记为讯飞数据
-        }
-    })
+# WebSocket支持
+sock = Sock()
 
-@speech_api.route('/asr', methods=['POST'])
-def speech_to_text_api():
-    """语音识别API"""
-    # 检查是否有文件上传
-    if 'audio' not in request.files:
-        return jsonify({
-            'status': 'error',
-            'message': '未找到音频文件'
-        }), 400
-    
-    audio_file = request.files['audio']
-    language = request.form.get('language', 'zh')
-    
-    # 读取音频数据
-    audio_data = audio_file.read()
+@sock.route('/ws', bp=speech_api)
+def asr_websocket(ws):
+    """
+    流式语音识别WebSocket
     
-    # 调用科大讯飞ASR服务
+    客户端以二进制消息发送16kHz 16bit单声道PCM音频，说完后发送文本消息{"type": "end"}；
+    服务端转发给讯飞流式听写接口，并推送{"type": "partial"}部分结果和{"type": "final"}最终结果。
+    """
+    language = request.args.get('language', 'zh')
     xf_language = 'zh_cn' if language == 'zh' else 'en_us'
-    result = speech_to_text(audio_data, language=xf_language)
+    send_lock = threading.Lock()
     
-    if not result.get('success', False):
-        # 如果科大讯飞服务调用失败，返回模拟数据
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'text': "这是一个模拟的语音识别结果",
-                'confidence': 0.95,
-                'source': 'mock'  # 标记为模拟数据
-            }
-        })
+    def send(message):
+        with send_lock:
+            ws.send(json.dumps(message, ensure_ascii=False))
     
-    # 返回真实的识别结果
-    return jsonify({
-        'status': 'success',
-        'data': {
-            'text': result['text'],
-            'confidence': 0.95,  # 置信度未知，使用默认值
-            'source': 'xfyun'  # 标记为讯飞数据
-        }
-    })
-
-@speech_api.route('/asr/websocket', methods=['GET'])
-def asr_websocket_info():
-    """获取WebSocket语音识别服务信息"""
-    # 提供WebSocket服务端点信息
-    # 在实际实现中，前端将通过WebSocket与后端建立连接进行实时语音识别
-    return jsonify({
-        'status': 'success',
-        'data': {
-            'websocket_url': 'ws://localhost:5000/api/speech/ws',
-            'protocol': 'xf-asr-1.0',
-            'supported_formats': ['wav', 'pcm']
-        }
-    }) 
\ No newline at end of file
+    if not XFYUN_APP_ID:
+        send({'type': 'error', 'message': '科大讯飞API配置缺失'})
+        return
+    
+    session = StreamingASRSession(
+        language=xf_language,
+        on_partial=lambda text: send({'type': 'partial', 'text': text})
+    )
+    try:
+        session.open()
+        while True:
+            message = ws.receive()
+            if isinstance(message, bytes):
+                session.send_audio(message)
+            elif message is None or json.loads(message).get('type') == 'end':
+                break
+        
+        text = session.finish()
+        if session.error:
+            send({'type': 'error', 'message': session.error, 'text': text})
+        else:
+            send({'type': 'final', 'text': text, 'source': 'xfyun'})
+    except Exception as e:
+        print(f"流式语音识别出错: {str(e)}")
+        send({'type': 'error', 'message': str(e)})
+    finally:
+        session.close() 
\ No newline at end of file
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+系统API模块 - 健康检查和指标接口
+
+接口实现在core/system.py中，与Serverless函数共用；这里只注册为Flask蓝图路由。
+"""
+
+from flask import Blueprint
+from api.flask_adapter import register_routes
+
+# 创建Blueprint
+system_api = Blueprint('system_api', __name__)
+register_routes(system_api, '/api')
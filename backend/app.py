@@ -4,15 +4,19 @@
 """
 AI面试模拟系统 - Web应用后端
 Flask API服务入口文件
+
+接口实现位于core/，这里的蓝图只做注册；Vercel等Serverless平台使用serverless.py入口。
 """
 
 import os
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, send_from_directory
 from flask_cors import CORS
 
 # 导入API蓝图
 from api.interview_api import interview_api
 from api.speech_api import speech_api
+from api.system_api import system_api
+from services import metrics
 
 app = Flask(__name__, static_folder='../frontend/build')
 CORS(app)  # 启用跨域请求支持
@@ -20,6 +24,10 @@ CORS(app)  # 启用跨域请求支持
 # 注册API蓝图
 app.register_blueprint(interview_api, url_prefix='/api/interview')
 app.register_blueprint(speech_api, url_prefix='/api/speech')
+app.register_blueprint(system_api, url_prefix='/api')
+
+# 接口耗时分阶段统计
+metrics.init_app(app)
 
 # 添加CORS响应头，确保跨域请求正常工作
 @app.after_request
@@ -29,15 +37,6 @@ def add_cors_headers(response):
     response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
     return response
 
-# API路由
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """健康检查API"""
-    return jsonify({
-        'status': 'success',
-        'message': 'AI面试模拟系统API服务正常运行'
-    })
-
 # 前端应用路由
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
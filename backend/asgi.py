@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+AI面试模拟系统 - ASGI入口
+
+需要等待DeepSeek和科大讯飞的接口（取题、流式取题、提交答案、TTS、流式语音识别）由api/async_api.py中的协程处理，
+一个进程即可同时挂起大量等待上游的请求；其余接口原样交给app.py中的Flask应用（在线程池中执行）。
+
+启动方式：
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 2
+    或 gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+WSGI入口app.py保持不变，可继续使用gunicorn同步部署。
+"""
+
+import os
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount
+
+from app import app as flask_app
+from api.async_api import routes
+from services import async_http_client
+
+# 执行Flask接口的线程数
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '16'))
+
+application = Starlette(
+    routes=routes + [Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_THREADS))],
+    middleware=[
+        # 与app.py中的跨域设置一致
+        Middleware(
+            CORSMiddleware,
+            allow_origins=['*'],
+            allow_methods=['GET', 'PUT', 'POST', 'DELETE', 'OPTIONS'],
+            allow_headers=['Content-Type', 'Authorization']
+        )
+    ],
+    on_shutdown=[async_http_client.aclose]
+)
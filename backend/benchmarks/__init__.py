@@ -0,0 +1,3 @@
+"""
+压测工具 - 本地模拟上游服务和面试流程压测脚本，不消耗DeepSeek和科大讯飞的接口额度
+"""
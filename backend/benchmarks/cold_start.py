@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+冷启动基准 - 测量Serverless入口（serverless.py）每个接口在全新进程中的导入耗时和首个请求耗时
+
+每次测量启动一个新的Python解释器：先导入serverless.py，再导入该接口处理函数所在的模块（与实例冷启动后
+第一次收到该接口请求时的导入一致），最后通过本地HTTP连接向handler发送一个请求，上游指向模拟服务。
+导入耗时在子进程内用perf_counter计时，不含解释器自身的启动（单独列出）和平台运行时已导入的http.server；
+首个请求耗时包含第一次调用上游时才加载的requests、NumPy等。每个接口先运行一次不计时的预热，保证字节码缓存已生成。
+Flask入口app.py作为对照。
+
+用法：
+    python -m benchmarks.cold_start --runs 5
+    # 任一接口导入耗时的中位数超出预算时退出码为1
+    python -m benchmarks.cold_start --budget-ms 100 --output cold_start.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from benchmarks.mock_upstreams import MockUpstreams, add_arguments, config_from_args
+from core.routes import ROUTES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各接口的示例请求：(查询串, JSON请求体)，{interview_id}替换为子进程中预先创建的会话
+SAMPLE_REQUESTS = {
+    '/api/interview/types': ('', None),
+    '/api/interview/start': ('', {'type': 'software_engineer', 'company': '某科技公司', 'language': 'zh'}),
+    '/api/interview/question': ('interview_id={interview_id}', None),
+    '/api/interview/question/stream': ('interview_id={interview_id}', None),
+    '/api/interview/answer': ('', {
+        'interview_id': '{interview_id}', 'question_id': 'q_cold_start',
+        'question': '请介绍一个你做过的项目。', 'answer': '我负责了后端服务的设计和性能优化。'
+    }),
+    '/api/interview/answer/result': ('job_id=job_cold_start', None),
+    '/api/interview/answer/events': ('job_id=job_cold_start', None),
+    '/api/interview/evaluate': ('interview_id={interview_id}', None),
+    '/api/speech/tts': ('', {'text': '请介绍一下你自己。'}),
+    '/api/speech/tts/stream': ('', {'text': '请介绍一下你自己。然后说说你的项目经验。'}),
+    '/api/speech/asr': ('language=zh', None),  # 请求体为1秒16kHz PCM
+    '/api/speech/asr/websocket': ('', None),
+    '/api/health': ('', None),
+    '/api/metrics': ('', None),
+}
+
+# 在子进程中执行：只依赖标准库，避免预先加载被测模块会用到的依赖
+_CHILD = r'''
+import sys, json, time
+import http.server  # 平台运行时在加载函数之前已导入（用于识别BaseHTTPRequestHandler子类），不计入
+spec = json.loads(sys.argv[1])
+started = time.perf_counter()
+entry = __import__(spec['entry'])
+result = {'entry_ms': (time.perf_counter() - started) * 1000}
+if spec.get('target'):
+    from core.routes import resolve
+    resolve(spec['target'])
+    result['import_ms'] = (time.perf_counter() - started) * 1000
+else:
+    result['import_ms'] = result['entry_ms']
+if spec.get('path'):
+    import math, array, threading, http.client
+    from http.server import HTTPServer
+    from services.session_store import session_store, new_session
+    interview_id = session_store.create(new_session('software_engineer', '某科技公司', 'zh', True, 3))['interview_id']
+    body, headers = b'', {}
+    if spec.get('json') is not None:
+        body = json.dumps(spec['json']).replace('{interview_id}', interview_id).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    elif spec['method'] == 'POST':
+        body = array.array('h', (int(8000 * math.sin(i * 0.3)) for i in range(16000))).tobytes()
+        headers['Content-Type'] = 'audio/L16;rate=16000'
+    server = HTTPServer(('127.0.0.1', 0), entry.handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=60)
+    path = spec['path'] + ('?' + spec['query'].replace('{interview_id}', interview_id) if spec['query'] else '')
+    requested = time.perf_counter()
+    connection.request(spec['method'], path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    result['request_ms'] = (time.perf_counter() - requested) * 1000
+    result['status'] = response.status
+print('COLD_START ' + json.dumps(result))
+'''
+
+
+def run_child(spec, env):
+    """在新进程中执行一次测量，返回子进程输出的结果"""
+    completed = subprocess.run(
+        [sys.executable, '-c', _CHILD, json.dumps(spec, ensure_ascii=False)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith('COLD_START '):
+            return json.loads(line[len('COLD_START '):])
+    raise RuntimeError(f"测量失败（{spec.get('path') or spec['entry']}）: {completed.stderr[-2000:]}")
+
+
+def interpreter_startup(runs):
+    """空解释器的启动耗时（毫秒），平台冷启动时同样需要付出"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(spec, base_env, runs):
+    """预热一次后测量runs次，每次使用新的会话库、题库和TTS缓存目录"""
+    samples = []
+    for index in range(runs + 1):
+        data_dir = tempfile.mkdtemp(prefix='smarthr_cold_')
+        env = {
+            **base_env,
+            'SESSION_DB_PATH': os.path.join(data_dir, 'sessions.db'),
+            'BANK_DB_PATH': os.path.join(data_dir, 'bank.db'),
+            'TTS_CACHE_DIR': os.path.join(data_dir, 'tts_cache'),
+        }
+        try:
+            result = run_child(spec, env)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        if index:
+            samples.append(result)
+    return samples
+
+
+def summarize(samples, budget_ms):
+    """汇总一个测量项的中位数和最大值"""
+    imports = [sample['import_ms'] for sample in samples]
+    row = {
+        'import_p50_ms': round(statistics.median(imports), 1),
+        'import_max_ms': round(max(imports), 1),
+        'entry_p50_ms': round(statistics.median(sample['entry_ms'] for sample in samples), 1),
+    }
+    requests = [sample['request_ms'] for sample in samples if 'request_ms' in sample]
+    if requests:
+        row['first_request_p50_ms'] = round(statistics.median(requests), 1)
+        row['status'] = samples[-1]['status']
+    if budget_ms is not None:
+        row['within_budget'] = row['import_p50_ms'] <= budget_ms
+    return row
+
+
+def print_report(report):
+    print(f"\n{'接口':<36}{'导入p50ms':>11}{'导入最大ms':>11}{'首个请求p50ms':>15}{'状态码':>8}")
+    for name, row in report['entries'].items():
+        flag = '' if row.get('within_budget', True) else '  超出预算'
+        first = row.get('first_request_p50_ms', '-')
+        print(f"{name:<38}{row['import_p50_ms']:>11}{row['import_max_ms']:>13}{first:>17}{row.get('status', '-'):>10}{flag}")
+    print(f"\n解释器启动 {report['interpreter_startup_ms']}ms（不计入导入耗时），每项测量{report['runs']}次")
+    if report['budget_ms'] is not None:
+        over = [name for name, row in report['entries'].items() if not row.get('within_budget', True)]
+        print(f"导入预算 {report['budget_ms']}ms：" + ('全部接口满足' if not over else f"{len(over)}个接口超出"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serverless入口冷启动基准（使用本地模拟上游服务）')
+    parser.add_argument('--runs', type=int, default=5, help='每个接口测量的次数')
+    parser.add_argument('--budget-ms', type=float, help='每个接口导入耗时中位数的预算，超出时退出码为1')
+    parser.add_argument('--no-requests', action='store_true', help='只测量导入耗时，不发送首个请求')
+    parser.add_argument('--output', help='保存报告的JSON文件')
+    add_arguments(parser)
+    # 冷启动关心本地耗时，模拟上游默认不加延迟
+    parser.set_defaults(latency='fixed:0', tts_latency='fixed:0', asr_latency='fixed:0', token_interval_ms=0)
+    args = parser.parse_args(argv)
+
+    mocks = MockUpstreams(config_from_args(args)).start()
+    try:
+        base_env = {**os.environ, **mocks.env(), 'DEEPSEEK_API_KEY': 'mock_api_key', 'BANK_REFILL_ENABLED': 'false'}
+        entries = {'serverless.py（适配层）': summarize(measure({'entry': 'serverless'}, base_env, args.runs), args.budget_ms)}
+        for prefix, routes in ROUTES.items():
+            for method, path, target in routes:
+                spec = {'entry': 'serverless', 'target': target}
+                if not args.no_requests:
+                    query, body = SAMPLE_REQUESTS[prefix + path]
+                    spec.update(method=method, path=prefix + path, query=query, json=body)
+                samples = measure(spec, base_env, args.runs)
+                entries[f"{method} {prefix + path}"] = summarize(samples, args.budget_ms)
+                print(f"{method} {prefix + path}: 导入 {entries[f'{method} {prefix + path}']['import_p50_ms']}ms")
+        # Flask入口作为对照，不参与预算判断
+        entries['app.py（Flask入口，对照）'] = summarize(measure({'entry': 'app'}, base_env, args.runs), None)
+    finally:
+        mocks.stop()
+
+    report = {
+        'runs': args.runs,
+        'budget_ms': args.budget_ms,
+        'interpreter_startup_ms': round(interpreter_startup(args.runs), 1),
+        'entries': entries
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if all(row.get('within_budget', True) for row in entries.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
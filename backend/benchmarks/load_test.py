@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试流程压测 - 模拟多个候选人并发完成 开始面试→取题→TTS→语音识别→提交答案→总体评估 的完整流程
+
+默认在本地启动模拟上游服务（benchmarks/mock_upstreams.py），并以指向模拟服务的环境变量启动后端，
+全程不访问DeepSeek和科大讯飞。输出各接口的吞吐量和p50/p95/p99延迟、备用数据（降级）比例，
+以及压测期间评估队列、连接池和熔断器的饱和情况。
+
+用法：
+    # 启动gunicorn同步部署并压测
+    python -m benchmarks.load_test --spawn gunicorn --users 20 --interviews 2 --output baseline.json
+    # 启动ASGI部署，与之前保存的基线对比
+    python -m benchmarks.load_test --spawn uvicorn --users 20 --interviews 2 --baseline baseline.json
+    # 在本地运行Serverless入口（serverless.py）并压测
+    python -m benchmarks.load_test --spawn serverless --users 20
+    # 压测已经运行的后端（需自行将上游地址指向模拟服务）
+    python -m benchmarks.load_test --target http://127.0.0.1:5000 --no-mocks
+
+固定--seed、模拟服务参数和压测参数时，结果可以重复对比。
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+from benchmarks.mock_upstreams import MockUpstreams, add_arguments, config_from_args
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 后端降级时返回的备用数据
+FALLBACK_QUESTION = '请简单介绍一下你自己以及你的技术背景。'
+FALLBACK_FEEDBACK = '回答完整，展示了相关经验，但可以更具体地列举项目案例。'
+ANSWER_TEXT = '我在上一个项目中负责后端服务的设计，主要使用了缓存和消息队列来提升系统的吞吐量。'
+
+
+def percentile(values, p):
+    """最近秩法计算百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """按接口记录延迟、错误和降级次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, elapsed, error=False, fallback=False):
+        with self._lock:
+            item = self._endpoints.setdefault(endpoint, {'latencies': [], 'errors': 0, 'fallbacks': 0})
+            item['latencies'].append(elapsed)
+            item['errors'] += int(error)
+            item['fallbacks'] += int(fallback)
+
+    def summary(self, duration):
+        with self._lock:
+            result = {}
+            for endpoint, item in sorted(self._endpoints.items()):
+                latencies = item['latencies']
+                count = len(latencies)
+                result[endpoint] = {
+                    'requests': count,
+                    'throughput': round(count / duration, 2) if duration else 0,
+                    'errors': item['errors'],
+                    'error_rate': round(item['errors'] / count, 4) if count else 0,
+                    'fallbacks': item['fallbacks'],
+                    'fallback_rate': round(item['fallbacks'] / count, 4) if count else 0,
+                    'p50_ms': _ms(percentile(latencies, 50)),
+                    'p95_ms': _ms(percentile(latencies, 95)),
+                    'p99_ms': _ms(percentile(latencies, 99)),
+                    'max_ms': _ms(max(latencies) if latencies else None)
+                }
+            return result
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class HealthSampler(threading.Thread):
+    """定期读取/api/health，记录评估队列、连接池和熔断器的峰值"""
+
+    def __init__(self, target, interval=1.0):
+        super().__init__(daemon=True)
+        self.target = target
+        self.interval = interval
+        self.samples = 0
+        self.queue_peak = {'pending': 0, 'running': 0, 'workers': 0}
+        self.breaker_states = {}
+        self.async_connections_peak = 0
+        self.first = None
+        self.last = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                data = requests.get(f"{self.target}/api/health", timeout=5).json().get('data', {})
+            except Exception:
+                continue
+            self.samples += 1
+            self.first = self.first or data
+            self.last = data
+            queue = data.get('evaluation_queue', {})
+            for key in self.queue_peak:
+                self.queue_peak[key] = max(self.queue_peak[key], queue.get(key, 0))
+            connections = sum(pool.get('connections', 0) for pool in data.get('async_http_pools') or [])
+            self.async_connections_peak = max(self.async_connections_peak, connections)
+            for name, breaker in data.get('circuit_breakers', {}).items():
+                states = self.breaker_states.setdefault(name, set())
+                states.add(breaker.get('state'))
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def summary(self):
+        """
+        饱和情况：评估队列峰值、压测期间同步连接池等待次数增量、异步连接数峰值、熔断器出现过的状态
+
+        多进程部署时/api/health只反映被采样到的工作进程。
+        """
+        before = (self.first or {}).get('http_pools') or {}
+        after = (self.last or {}).get('http_pools') or {}
+        pool_waits = {host: stats['waits'] - (before.get(host) or {}).get('waits', 0) for host, stats in after.items()}
+        workers = self.queue_peak['workers']
+        return {
+            'samples': self.samples,
+            'evaluation_queue_peak': self.queue_peak,
+            'evaluation_worker_saturation': round(self.queue_peak['running'] / workers, 2) if workers else None,
+            'pool_waits': pool_waits,
+            'async_connections_peak': self.async_connections_peak,
+            'breaker_states': {name: sorted(s for s in states if s) for name, states in self.breaker_states.items()},
+            'single_flight': (self.last or {}).get('single_flight')
+        }
+
+
+class InterviewUser(threading.Thread):
+    """一个候选人：依次完成若干场面试"""
+
+    def __init__(self, index, args, recorder):
+        super().__init__(daemon=True)
+        self.args = args
+        self.recorder = recorder
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.http = requests.Session()
+        self.failed = None
+
+    def run(self):
+        try:
+            for _ in range(self.args.interviews):
+                self.interview()
+        except Exception as e:
+            self.failed = str(e)
+
+    def call(self, endpoint, method, path, fallback=None, **kwargs):
+        """
+        发送请求并记录耗时
+
+        Args:
+            fallback: 判断返回数据是否为备用数据的函数，参数为响应data字段
+        """
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, f"{self.args.target}{path}", timeout=self.args.timeout, **kwargs)
+            if response.headers.get('Content-Type', '').startswith('audio/'):
+                # 二进制TTS响应的元数据在响应头中
+                body = {'data': {'source': response.headers.get('X-Audio-Source')}}
+            else:
+                body = response.json() if not kwargs.get('stream') else None
+            error = response.status_code >= 400
+        except Exception:
+            self.recorder.record(endpoint, time.perf_counter() - started, error=True)
+            raise
+        data = (body or {}).get('data') or {}
+        self.recorder.record(endpoint, time.perf_counter() - started, error=error,
+                             fallback=bool(fallback and not error and fallback(data)))
+        return response, data
+
+    def interview(self):
+        _, data = self.call('start', 'POST', '/api/interview/start', json={
+            'type': self.rng.choice(['software_engineer', 'backend_developer', 'data_scientist']),
+            'company': '',
+            'language': 'zh',
+            'difficulty': self.args.difficulty
+        })
+        interview_id = data['interview_id']
+
+        for _ in range(self.args.questions):
+            question = self.question(interview_id)
+            self.call('tts', 'POST', '/api/speech/tts', json={'text': question['content']},
+                      headers={'Accept': 'audio/wav'} if self.args.binary_tts else None,
+                      fallback=lambda d: d.get('source') == 'mock')
+            self.call('asr', 'POST', '/api/speech/asr', params={'language': 'zh'}, data=self.audio(),
+                      headers={'Content-Type': 'audio/L16;rate=16000'},
+                      fallback=lambda d: d.get('source') == 'mock')
+            # 模拟候选人作答时间，预取在这段时间内进行
+            time.sleep(self.rng.uniform(0, self.args.think_time))
+            self.answer(interview_id, question['id'])
+
+        self.call('evaluate', 'GET', '/api/interview/evaluate', params={'interview_id': interview_id},
+                  fallback=lambda d: d.get('source') == 'mock')
+
+    def question(self, interview_id):
+        if not self.args.stream:
+            _, data = self.call('question', 'GET', '/api/interview/question', params={'interview_id': interview_id},
+                                fallback=lambda d: d.get('content') == FALLBACK_QUESTION)
+            return data
+
+        # 流式取题：记录首个token延迟和完整耗时
+        started = time.perf_counter()
+        question = None
+        first_token = None
+        try:
+            response = self.http.get(f"{self.args.target}/api/interview/question/stream",
+                                     params={'interview_id': interview_id}, stream=True, timeout=self.args.timeout)
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:'):
+                    if event == 'token' and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event == 'done':
+                        question = json.loads(line[5:])
+                        break
+            response.close()
+        finally:
+            elapsed = time.perf_counter() - started
+            self.recorder.record('question_stream', elapsed, error=question is None,
+                                 fallback=bool(question and question.get('content') == FALLBACK_QUESTION))
+            if first_token is not None:
+                self.recorder.record('question_stream_first_token', first_token)
+        if question is None:
+            raise RuntimeError('流式取题失败')
+        return question
+
+    def audio(self):
+        """生成指定时长的16kHz 16bit单声道PCM（低幅噪声）"""
+        samples = int(16000 * self.args.audio_seconds)
+        return bytes(self.rng.getrandbits(4) for _ in range(samples * 2))
+
+    def answer(self, interview_id, question_id):
+        body = {'interview_id': interview_id, 'question_id': question_id, 'answer': ANSWER_TEXT}
+        if self.args.answer_mode == 'sync':
+            self.call('answer', 'POST', '/api/interview/answer', json=body,
+                      fallback=lambda d: d.get('feedback') == FALLBACK_FEEDBACK)
+            return
+
+        # 异步评估：提交后轮询结果，记录从提交到拿到结果的总耗时
+        started = time.perf_counter()
+        response, data = self.call('answer_submit', 'POST', '/api/interview/answer', json={**body, 'async': True})
+        if response.status_code != 202:
+            self.recorder.record('answer_async', time.perf_counter() - started, error=True)
+            return
+        job = {}
+        while time.perf_counter() - started < self.args.timeout:
+            time.sleep(0.2)
+            _, job = self.call('answer_result', 'GET', '/api/interview/answer/result',
+                               params={'job_id': data['job_id'], 'interview_id': interview_id})
+            if job.get('status') in ('done', 'failed'):
+                break
+        result = job.get('result') or {}
+        self.recorder.record('answer_async', time.perf_counter() - started, error=job.get('status') != 'done',
+                             fallback=result.get('feedback') == FALLBACK_FEEDBACK)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_backend(server, env, workers, threads):
+    """
+    以独立的会话库、TTS缓存和题库启动后端
+
+    Returns:
+        (后端地址, 子进程)
+    """
+    port = _free_port()
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(workers), '--threads', str(threads)]
+    elif server == 'serverless':
+        # 本地运行Serverless入口，每个请求由一个handler实例处理
+        command = [sys.executable, 'serverless.py', '--port', str(port)]
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--log-level', 'warning']
+        env = {'WSGI_THREADS': str(threads), **env}
+
+    data_dir = tempfile.mkdtemp(prefix='smarthr_load_')
+    env = {
+        'SESSION_DB_PATH': os.path.join(data_dir, 'sessions.db'),
+        'BANK_DB_PATH': os.path.join(data_dir, 'bank.db'),
+        'TTS_CACHE_DIR': os.path.join(data_dir, 'tts_cache'),
+        'DEEPSEEK_API_KEY': 'mock_api_key',
+        **env
+    }
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    target = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"后端启动失败: {' '.join(command)}")
+        try:
+            requests.get(f"{target}/api/health", timeout=1)
+            return target, process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('后端启动超时')
+
+
+def compare(report, baseline, tolerance):
+    """
+    与基线对比p50/p95延迟和吞吐量
+
+    Returns:
+        (对比结果, 是否存在超出容差的退化)
+    """
+    rows = {}
+    regressed = False
+    for endpoint, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+        row = {}
+        for key in ('p50_ms', 'p95_ms', 'throughput'):
+            if not previous.get(key) or current.get(key) is None:
+                continue
+            change = (current[key] - previous[key]) / previous[key]
+            row[key] = {'baseline': previous[key], 'current': current[key], 'change': round(change, 3)}
+            # 延迟升高或吞吐下降超过容差视为退化
+            if (change > tolerance if key != 'throughput' else change < -tolerance):
+                regressed = True
+        rows[endpoint] = row
+    return rows, regressed
+
+
+def print_report(report, comparison=None):
+    print(f"\n{'接口':<28}{'请求数':>8}{'吞吐/s':>9}{'错误率':>8}{'降级率':>8}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}")
+    for endpoint, item in report['endpoints'].items():
+        print(f"{endpoint:<30}{item['requests']:>8}{item['throughput']:>10}{item['error_rate']:>10.2%}"
+              f"{item['fallback_rate']:>10.2%}{item['p50_ms'] or 0:>10}{item['p95_ms'] or 0:>10}{item['p99_ms'] or 0:>10}")
+    print(f"\n总耗时 {report['duration']}s，完成面试 {report['interviews_completed']}/{report['interviews_planned']}，"
+          f"总吞吐 {report['throughput']} 请求/秒")
+    print(f"饱和情况: {json.dumps(report['saturation'], ensure_ascii=False)}")
+    if comparison:
+        print("\n与基线对比（change为相对变化）:")
+        for endpoint, row in comparison.items():
+            changes = ', '.join(f"{key} {value['baseline']}→{value['current']} ({value['change']:+.1%})"
+                                for key, value in row.items())
+            print(f"  {endpoint}: {changes}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='AI面试模拟系统压测（使用本地模拟上游服务）')
+    parser.add_argument('--target', help='已运行的后端地址，如 http://127.0.0.1:5000')
+    parser.add_argument('--spawn', choices=['gunicorn', 'uvicorn', 'serverless'], help='启动指向模拟服务的后端进程')
+    parser.add_argument('--workers', type=int, default=2, help='启动后端的工作进程数')
+    parser.add_argument('--threads', type=int, default=16, help='gunicorn线程数或ASGI执行Flask接口的线程数')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='启动后端时附加的环境变量')
+    parser.add_argument('--no-mocks', action='store_true', help='不启动模拟上游服务')
+    parser.add_argument('--users', type=int, default=10, help='并发候选人数')
+    parser.add_argument('--interviews', type=int, default=1, help='每个候选人完成的面试场数')
+    parser.add_argument('--questions', type=int, default=3, help='每场面试的问题数')
+    parser.add_argument('--difficulty', type=int, default=3, help='面试难度')
+    parser.add_argument('--stream', action='store_true', help='使用/question/stream流式取题')
+    parser.add_argument('--answer-mode', choices=['sync', 'async'], default='sync', help='同步评估或异步评估加轮询')
+    parser.add_argument('--binary-tts', action='store_true', help='TTS接口请求二进制WAV音频而不是JSON')
+    parser.add_argument('--audio-seconds', type=float, default=5, help='每次上传的回答音频时长')
+    parser.add_argument('--think-time', type=float, default=0.5, help='取题到提交答案之间的最大等待（秒）')
+    parser.add_argument('--ramp-up', type=float, default=1.0, help='所有候选人开始压测所需的时间（秒）')
+    parser.add_argument('--timeout', type=float, default=120, help='单个请求的超时时间（秒）')
+    parser.add_argument('--output', help='保存压测报告的JSON文件，可作为之后的基线')
+    parser.add_argument('--baseline', help='与之对比的基线报告')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='相对基线允许的退化比例，超出时退出码为1')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.target and not args.spawn:
+        parser.error('需要指定--target或--spawn')
+
+    mocks = None if args.no_mocks else MockUpstreams(config_from_args(args)).start()
+    process = None
+    try:
+        if args.spawn:
+            env = dict(mocks.env()) if mocks else {}
+            env.update(item.split('=', 1) for item in args.env)
+            args.target, process = spawn_backend(args.spawn, env, args.workers, args.threads)
+        args.target = args.target.rstrip('/')
+
+        recorder = Recorder()
+        sampler = HealthSampler(args.target)
+        sampler.start()
+        users = [InterviewUser(i, args, recorder) for i in range(args.users)]
+        started = time.perf_counter()
+        for user in users:
+            user.start()
+            time.sleep(args.ramp_up / max(args.users, 1))
+        for user in users:
+            user.join()
+        duration = time.perf_counter() - started
+        sampler.stop()
+
+        endpoints = recorder.summary(duration)
+        failures = [user.failed for user in users if user.failed]
+        report = {
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+            'duration': round(duration, 2),
+            'interviews_planned': args.users * args.interviews,
+            'interviews_completed': endpoints.get('evaluate', {}).get('requests', 0),
+            'throughput': round(sum(item['requests'] for item in endpoints.values()) / duration, 2),
+            'endpoints': endpoints,
+            'saturation': sampler.summary(),
+            'upstream_calls': mocks.config.counters if mocks else None,
+            'user_failures': failures[:10]
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if mocks is not None:
+            mocks.stop()
+
+    comparison, regressed = None, False
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison, regressed = compare(report, json.load(f), args.tolerance)
+        report['comparison'] = comparison
+
+    print_report(report, comparison)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+模拟上游服务 - 在本地模拟DeepSeek聊天补全接口（含流式）和科大讯飞TTS/听写接口
+
+响应格式与真实接口一致，延迟分布、错误率和响应大小可配置；随机数使用固定种子，保证压测可复现。
+
+单独启动：
+    python -m benchmarks.mock_upstreams --latency lognormal:800:0.5 --error-rate 0.02
+启动后打印需要设置的环境变量（DEEPSEEK_API_URL、XFYUN_TTS_URL、XFYUN_ASR_URL、XFYUN_ASR_WS_URL）。
+"""
+
+import sys
+import json
+import math
+import time
+import base64
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 轮流返回的问题，内容互不相似，避免被后端的问题去重判定为重复
+QUESTIONS = [
+    '请结合你最近参与的一个项目，谈谈你是如何进行系统设计和技术选型的？',
+    '如果线上接口的响应时间突然变长，你会按照什么步骤排查问题？',
+    '请解释数据库索引的工作原理，以及什么情况下索引会失效。',
+    '你如何保证一个分布式系统中多个服务之间的数据一致性？',
+    '描述一次你和团队成员意见不一致的经历，最后是怎么达成共识的？',
+    '缓存穿透、缓存击穿和缓存雪崩分别是什么，应该如何应对？',
+    '在代码评审中你最关注哪些方面，为什么？',
+    '请设计一个支持高并发访问的短链接生成服务。'
+]
+ANSWER_TEXT = '我在上一个项目中负责后端服务的设计，主要使用了缓存和消息队列来提升系统的吞吐量。'
+EVALUATION = {
+    'score': 82,
+    'strengths': ['表达清晰', '有具体项目经验'],
+    'weaknesses': ['缺少量化数据'],
+    'suggestions': '可以补充性能指标和取舍的理由。',
+    'continue': True
+}
+
+
+class LatencyModel:
+    """
+    延迟分布（毫秒）
+
+    描述格式：
+        fixed:200             固定200ms
+        uniform:100:500       100~500ms均匀分布
+        lognormal:800:0.5     中位数800ms、对数标准差0.5的对数正态分布（接近真实LLM接口的长尾）
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, *params = spec.split(':')
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"不支持的延迟分布: {spec}")
+
+    def sample(self, rng):
+        """采样一次延迟（秒）"""
+        if self.kind == 'fixed':
+            ms = self.params[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(self.params[0], self.params[1])
+        else:
+            ms = rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return ms / 1000
+
+
+class MockConfig:
+    """模拟服务配置"""
+
+    def __init__(self, latency='lognormal:800:0.5', tts_latency='lognormal:300:0.4', asr_latency='lognormal:400:0.4',
+                 error_rate=0.0, stream_tokens=30, token_interval_ms=20,
+                 audio_bytes_per_char=8000, seed=42):
+        """
+        Args:
+            latency: DeepSeek接口延迟分布（流式接口为首个token前的延迟）
+            tts_latency: 讯飞TTS接口延迟分布
+            asr_latency: 讯飞听写接口延迟分布
+            error_rate: 返回HTTP 500的请求比例
+            stream_tokens: 流式响应的token数
+            token_interval_ms: 流式响应token之间的间隔
+            audio_bytes_per_char: TTS每个字符返回的音频字节数（16kHz 16bit单声道约每字0.25秒）
+            seed: 随机数种子
+        """
+        self.latency = LatencyModel(latency)
+        self.tts_latency = LatencyModel(tts_latency)
+        self.asr_latency = LatencyModel(asr_latency)
+        self.error_rate = error_rate
+        self._questions = 0
+        self.stream_tokens = stream_tokens
+        self.token_interval = token_interval_ms / 1000
+        self.audio_bytes_per_char = audio_bytes_per_char
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {'deepseek': 0, 'deepseek_stream': 0, 'tts': 0, 'asr': 0, 'asr_ws': 0, 'errors': 0}
+
+    def draw(self, model, name):
+        """记录一次请求，返回(延迟秒数, 是否返回错误)"""
+        with self._lock:
+            self.counters[name] += 1
+            delay = model.sample(self._rng)
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.counters['errors'] += 1
+        return delay, failed
+
+    def question(self):
+        """按顺序轮流返回问题"""
+        with self._lock:
+            self._questions += 1
+            return QUESTIONS[self._questions % len(QUESTIONS)]
+
+
+def _make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def _send_json(self, status, data):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self._read_json()
+            path = self.path.split('?')[0]
+            if path.endswith('/chat/completions'):
+                self._deepseek(body)
+            elif path.endswith('/v2/tts'):
+                self._tts(body)
+            elif path.endswith('/v2/iat'):
+                self._asr()
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def _deepseek(self, body):
+            stream = body.get('stream', False)
+            delay, failed = config.draw(config.latency, 'deepseek_stream' if stream else 'deepseek')
+            time.sleep(delay)
+            if failed:
+                self._send_json(500, {'error': {'message': 'mock upstream error'}})
+                return
+
+            prompt = body['messages'][-1]['content']
+            # 评估请求要求返回JSON，其余视为生成问题
+            content = json.dumps(EVALUATION, ensure_ascii=False) if 'JSON' in prompt else config.question()
+            if not stream:
+                self._send_json(200, {
+                    'id': 'mock', 'object': 'chat.completion', 'model': body.get('model'),
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]
+                })
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            size = max(len(content) // max(config.stream_tokens, 1), 1)
+            for i in range(0, len(content), size):
+                chunk = {'choices': [{'index': 0, 'delta': {'content': content[i:i + size]}}]}
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+                time.sleep(config.token_interval)
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text):
+            data = text.encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _tts(self, body):
+            delay, failed = config.draw(config.tts_latency, 'tts')
+            time.sleep(delay)
+            if failed:
+                self._send_json(500, {'code': 10000, 'message': 'mock upstream error'})
+                return
+            text = base64.b64decode(body['data']['text']).decode('utf-8')
+            audio = bytes(len(text) * config.audio_bytes_per_char)
+            self._send_json(200, {
+                'code': 0, 'message': 'success', 'sid': 'mock',
+                'data': {'audio': base64.b64encode(audio).decode('utf-8'), 'status': 2}
+            })
+
+        def _asr(self):
+            delay, failed = config.draw(config.asr_latency, 'asr')
+            time.sleep(delay)
+            if failed:
+                self._send_json(500, {'code': 10000, 'message': 'mock upstream error'})
+                return
+            self._send_json(200, {
+                'code': 0, 'message': 'success', 'sid': 'mock',
+                'data': {'status': 2, 'result': {'sn': 1, 'ls': True, 'ws': [{'cw': [{'w': ANSWER_TEXT}]}]}}
+            })
+
+    return Handler
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 后端连接池关闭空闲连接属于正常情况
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _serve_asr_websocket(config, host, port):
+    from websockets.sync.server import serve
+
+    def handler(connection):
+        frames = 0
+        delay, failed = config.draw(config.asr_latency, 'asr_ws')
+        for message in connection:
+            frame = json.loads(message)
+            frames += 1
+            status = frame['data']['status']
+            if failed:
+                connection.send(json.dumps({'code': 10000, 'message': 'mock upstream error'}))
+                return
+            if status == 2:
+                # 结束帧：等待模拟的识别延迟后返回最终结果
+                time.sleep(delay)
+                connection.send(json.dumps({'code': 0, 'data': {'status': 2, 'result': {
+                    'sn': 1, 'pgs': 'rpl', 'rg': [1, 1], 'ls': True, 'ws': [{'cw': [{'w': ANSWER_TEXT}]}]
+                }}}))
+                return
+            if frames % 25 == 0:
+                # 约每秒返回一次部分结果
+                partial = ANSWER_TEXT[:min(frames // 25 * 5, len(ANSWER_TEXT))]
+                connection.send(json.dumps({'code': 0, 'data': {'status': 1, 'result': {
+                    'sn': 1, 'pgs': 'rpl', 'rg': [1, 1], 'ws': [{'cw': [{'w': partial}]}]
+                }}}))
+
+    return serve(handler, host, port, compression=None)
+
+
+class MockUpstreams:
+    """
+    本地模拟上游服务
+
+    HTTP服务同时处理DeepSeek、讯飞TTS和讯飞HTTP听写接口，WebSocket服务处理讯飞流式听写。
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, ws_port=0):
+        self.config = config or MockConfig()
+        self.host = host
+        self._http = _HTTPServer((host, port), _make_handler(self.config))
+        self._ws = _serve_asr_websocket(self.config, host, ws_port)
+        self._threads = []
+
+    @property
+    def port(self):
+        return self._http.server_address[1]
+
+    @property
+    def ws_port(self):
+        return self._ws.socket.getsockname()[1]
+
+    def env(self):
+        """指向模拟服务的环境变量"""
+        base = f"http://{self.host}:{self.port}"
+        return {
+            'DEEPSEEK_API_URL': f"{base}/v1/chat/completions",
+            'XFYUN_TTS_URL': f"{base}/v2/tts",
+            'XFYUN_ASR_URL': f"{base}/v2/iat",
+            'XFYUN_ASR_WS_URL': f"ws://{self.host}:{self.ws_port}/v2/iat",
+            # 讯飞配置缺失时后端直接返回模拟数据，压测需要填入任意值
+            'XFYUN_APP_ID': 'mock_app_id',
+            'XFYUN_API_KEY': 'mock_api_key',
+            'XFYUN_API_SECRET': 'mock_api_secret'
+        }
+
+    def start(self):
+        """在后台线程中启动模拟服务"""
+        for target in (self._http.serve_forever, self._ws.serve_forever):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """停止模拟服务"""
+        self._http.shutdown()
+        self._ws.shutdown()
+
+
+def add_arguments(parser):
+    """添加模拟服务的命令行参数（load_test共用）"""
+    parser.add_argument('--latency', default='lognormal:800:0.5', help='DeepSeek延迟分布，见LatencyModel')
+    parser.add_argument('--tts-latency', default='lognormal:300:0.4', help='讯飞TTS延迟分布')
+    parser.add_argument('--asr-latency', default='lognormal:400:0.4', help='讯飞听写延迟分布')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='上游返回错误的比例')
+    parser.add_argument('--stream-tokens', type=int, default=30, help='流式响应的token数')
+    parser.add_argument('--token-interval-ms', type=float, default=20, help='流式token间隔（毫秒）')
+    parser.add_argument('--audio-bytes-per-char', type=int, default=8000, help='TTS每个字符的音频字节数')
+    parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+
+
+def config_from_args(args):
+    """由命令行参数创建MockConfig"""
+    return MockConfig(
+        latency=args.latency,
+        tts_latency=args.tts_latency,
+        asr_latency=args.asr_latency,
+        error_rate=args.error_rate,
+        stream_tokens=args.stream_tokens,
+        token_interval_ms=args.token_interval_ms,
+        audio_bytes_per_char=args.audio_bytes_per_char,
+        seed=args.seed
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='启动DeepSeek和科大讯飞接口的本地模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080, help='HTTP模拟服务端口')
+    parser.add_argument('--ws-port', type=int, default=18081, help='流式听写WebSocket模拟服务端口')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    mocks = MockUpstreams(config_from_args(args), args.host, args.port, args.ws_port).start()
+    for key, value in mocks.env().items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(mocks.config.counters), file=sys.stderr)
+    except KeyboardInterrupt:
+        mocks.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+接口核心 - 与Web框架无关的接口实现，Flask蓝图（api/）和Serverless函数（serverless.py）共用
+
+每个接口是 handler(request) -> Response 形式的函数，请求和响应类型见core.http，路由表见core.routes。
+处理函数所在模块按路由首次访问时才导入，导入本包不会加载Flask、requests或NumPy。
+"""
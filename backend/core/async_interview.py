@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试接口的协程版本 - 供ASGI入口（api/async_api.py）使用
+
+请求校验、取题顺序、会话记录和响应格式与core/interview.py共用，只有调用DeepSeek改为协程，
+等待上游期间不占用线程；会话存储、预取和题库等同步操作在线程池中执行。
+"""
+
+from core.http import json_response, stream_response
+from core.executor import run_sync
+from core.interview import (
+    SSE_HEADERS, question_generation, load_question, serve_question, serve_fallback_question,
+    finish_question_stream, session_history, format_sse, answer_params, prefetch_next, queue_answer,
+    record_evaluation
+)
+from services.async_deepseek_service import generate_interview_question, stream_interview_question, evaluate_answer
+
+
+async def generate_question(params, history=None, seen=None):
+    """异步调用DeepSeek API生成问题，参数和返回值同core.interview.generate_question"""
+    steps = question_generation(params, history, seen)
+    try:
+        call = next(steps)
+        while True:
+            call = steps.send(await generate_interview_question(*call))
+    except StopIteration as done:
+        return done.value
+
+
+async def get_question(request):
+    """获取面试问题，同core.interview.get_question"""
+    interview_id = request.args.get('interview_id')
+
+    if not interview_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少面试ID'
+        }, 400)
+
+    try:
+        session, params, seen, question = await run_sync(load_question, interview_id, request.args)
+        if question is None:
+            question = await generate_question(params, session_history(session), seen)
+        question = await run_sync(serve_question, interview_id, question)
+    except Exception as e:
+        print(f"生成问题时出错: {str(e)}")
+        # 出错时使用备用问题
+        question = await run_sync(serve_fallback_question, interview_id)
+
+    return json_response({
+        'status': 'success',
+        'data': question
+    })
+
+
+async def stream_question(request):
+    """以Server-Sent Events流式获取面试问题，同core.interview.stream_question"""
+    interview_id = request.args.get('interview_id')
+
+    if not interview_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少面试ID'
+        }, 400)
+
+    args = request.args
+
+    async def generate():
+        # 先发送注释行让响应立即开始，预取和题库问题在流中读取
+        yield ': connected\n\n'
+        content, session, params, seen, stored = '', None, None, None, None
+        try:
+            session, params, seen, stored = await run_sync(load_question, interview_id, args)
+            if stored is None:
+                async for chunk in stream_interview_question(*params, *session_history(session)):
+                    if 'error' in chunk:
+                        break
+                    content += chunk['token']
+                    # 每收到一段文本立即推送给浏览器
+                    yield format_sse('token', {'content': chunk['token']})
+        except Exception as e:
+            print(f"流式生成问题时出错: {str(e)}")
+
+        for event in await run_sync(finish_question_stream, interview_id, content, stored, session, seen, params):
+            yield event
+
+    return stream_response(generate(), 'text/event-stream', headers=SSE_HEADERS)
+
+
+async def submit_answer(request):
+    """
+    提交面试答案，同core.interview.submit_answer
+
+    async为true时任务进入后台队列并立即返回202；否则在协程中等待DeepSeek评估。
+    """
+    data = request.json
+    loaded = await run_sync(answer_params, data)
+
+    # 验证请求数据
+    if loaded is None:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+
+    session, params = loaded
+    # 下一题参考这次回答，在评估的同时生成
+    await run_sync(prefetch_next, session, params)
+    if data.get('async'):
+        return await run_sync(queue_answer, session, params)
+
+    try:
+        result = await evaluate_answer(params['question'], params['answer'], params['interview_type'], params['language'])
+    except Exception as e:
+        print(f"评估答案时出错: {str(e)}")
+        result = {'error': str(e)}
+
+    return json_response({
+        'status': 'success',
+        'data': await run_sync(record_evaluation, params, result)
+    })
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+语音接口的协程版本 - 供ASGI入口（api/async_api.py）使用
+
+Accept头协商、响应格式和备用数据与core/speech.py共用，只有调用科大讯飞和音频编码改为协程。
+"""
+
+from core.http import json_response, stream_response
+from core.speech import TTS_STREAM_HEADERS, negotiate_audio_format, tts_fallback_response, tts_response, tts_stream_line
+from services.async_xfyun_service import synthesize_audio, text_to_speech_stream
+from services.audio_encoder import audio_encoder
+from services.metrics import phase
+
+
+async def text_to_speech_api(request):
+    """文本转语音API，同core.speech.text_to_speech_api"""
+    data = request.json
+
+    # 验证请求数据
+    if not data or 'text' not in data:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+
+    binary_format = negotiate_audio_format(request.headers.get('Accept', ''))
+    result = await synthesize_audio(data.get('text'), voice=data.get('voice', 'xiaoyan'))
+    if not result.get('success', False):
+        return tts_fallback_response(binary_format)
+
+    pcm = result['data']
+    with phase('audio'):
+        fmt, chunks = await audio_encoder.encode_async(pcm, binary_format or data.get('format', 'wav'))
+    return tts_response(fmt, chunks, pcm, result['cached'], binary_format)
+
+
+async def text_to_speech_stream_api(request):
+    """流式文本转语音API，同core.speech.text_to_speech_stream_api"""
+    data = request.json
+
+    # 验证请求数据
+    if not data or 'text' not in data:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+
+    async def generate():
+        async for index, total, sentence, result in text_to_speech_stream(data.get('text'), voice=data.get('voice', 'xiaoyan')):
+            yield tts_stream_line(index, total, sentence, result)
+
+    return stream_response(generate(), 'application/x-ndjson', headers=TTS_STREAM_HEADERS)
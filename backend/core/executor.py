@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+同步操作线程池 - 协程版本的接口（core/async_interview.py、core/async_speech.py）中，
+会话存储、预取和题库等同步操作放到这里执行，不阻塞事件循环
+"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# 执行同步操作（SQLite会话存储、等待进行中的预取等）的线程数
+ASGI_SYNC_WORKERS = int(os.environ.get('ASGI_SYNC_WORKERS', '32'))
+
+_sync_executor = ThreadPoolExecutor(max_workers=ASGI_SYNC_WORKERS, thread_name_prefix='asgi-sync')
+
+
+async def run_sync(fn, *args, **kwargs):
+    """在线程池中执行同步函数"""
+    return await asyncio.get_running_loop().run_in_executor(_sync_executor, functools.partial(fn, *args, **kwargs))
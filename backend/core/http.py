@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+框架无关的请求与响应
+
+适配层把框架的请求转换为Request交给处理函数，再把返回的Response写回客户端。
+JSON响应只保存数据，由适配层序列化（Flask使用jsonify，计入serialize阶段）；
+流式响应的body为逐块产出str或bytes的可迭代对象，适配层边生成边发送。
+"""
+
+import json
+
+_UNSET = object()
+
+
+class Request:
+    """
+    一次HTTP请求
+
+    Args:
+        method: 请求方法
+        path: 请求路径，不含查询串
+        args: 查询参数，支持get(name, default)
+        headers: 请求头，get()不区分大小写
+        stream: 请求体，可read(n)
+        host: 请求的主机名（含端口）
+        secure: 是否为HTTPS请求
+        json_loader: 解析JSON请求体的函数，默认从stream读取
+        form_loader: 解析表单的函数，返回(表单字段, 上传文件)
+    """
+
+    def __init__(self, method, path, args=None, headers=None, stream=None, host='', secure=False,
+                 json_loader=None, form_loader=None):
+        self.method = method
+        self.path = path
+        self.args = args if args is not None else {}
+        self.headers = headers if headers is not None else {}
+        self.stream = stream
+        self.host = host
+        self.secure = secure
+        self._json_loader = json_loader
+        self._form_loader = form_loader
+        self._json = _UNSET
+        self._form = None
+
+    @property
+    def content_type(self):
+        return self.headers.get('Content-Type') or ''
+
+    @property
+    def mimetype(self):
+        return self.content_type.split(';')[0].strip().lower()
+
+    @property
+    def json(self):
+        """JSON请求体，Content-Type不是JSON或解析失败时为None"""
+        if self._json is _UNSET:
+            self._json = self._json_loader() if self._json_loader else self._load_json()
+        return self._json
+
+    @property
+    def form(self):
+        return self._parse_form()[0]
+
+    @property
+    def files(self):
+        return self._parse_form()[1]
+
+    def _load_json(self):
+        if self.stream is None or not (self.mimetype == 'application/json' or self.mimetype.endswith('+json')):
+            return None
+        try:
+            return json.loads(self.stream.read())
+        except ValueError:
+            return None
+
+    def _parse_form(self):
+        if self._form is None:
+            self._form = self._form_loader() if self._form_loader else ({}, {})
+        return self._form
+
+
+class Response:
+    """
+    处理函数的返回值
+
+    Args:
+        body: 响应体，bytes/str或逐块产出数据的可迭代对象
+        status: 状态码
+        mimetype: 响应类型
+        headers: 额外的响应头
+        payload: JSON响应的数据，不为None时忽略body和mimetype
+        streamed: 是否为边生成边发送的流式响应
+    """
+
+    def __init__(self, body=b'', status=200, mimetype=None, headers=None, payload=None, streamed=False):
+        self.body = body
+        self.status = status
+        self.mimetype = 'application/json' if payload is not None else mimetype
+        self.headers = headers or {}
+        self.payload = payload
+        self.streamed = streamed
+
+
+def json_response(payload, status=200, headers=None):
+    """JSON响应"""
+    return Response(status=status, headers=headers, payload=payload)
+
+
+def stream_response(chunks, mimetype, headers=None):
+    """流式响应，chunks为产出str或bytes的生成器"""
+    return Response(chunks, mimetype=mimetype, headers=headers, streamed=True)
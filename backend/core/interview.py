@@ -0,0 +1,569 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试接口 - 面试流程的REST API实现，由Flask蓝图（api/interview_api.py）和Serverless函数共用
+"""
+
+import json
+import time
+from core.http import json_response, stream_response
+from services.deepseek_service import generate_interview_question, stream_interview_question, evaluate_answer
+from services.session_store import session_store, new_session, new_question_id, find_question
+from services.evaluation_aggregator import new_aggregate, add_evaluation, summarize
+from services.job_queue import evaluation_queue, new_job_id, QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from services.prefetch import question_prefetcher
+from services.question_bank import question_bank, BANK_LANGUAGES, BANK_DIFFICULTIES
+from services.question_dedup import question_deduplicator, DEDUP_MAX_RETRIES
+from services.metrics import count_fallback
+
+# 模拟面试数据（后期将从数据库获取）
+INTERVIEW_TYPES = {
+    'software_engineer': '软件工程师',
+    'product_manager': '产品经理',
+    'data_scientist': '数据科学家',
+    'frontend_developer': '前端开发工程师',
+    'backend_developer': '后端开发工程师'
+}
+
+# Server-Sent Events的响应头
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # 禁止反向代理缓冲，保证首个token尽快到达
+}
+
+def _fallback_question():
+    """API调用失败时使用的备用问题"""
+    count_fallback('question')
+    return {
+        'id': new_question_id(),
+        'content': '请简单介绍一下你自己以及你的技术背景。',
+        'type': 'open',
+        'difficulty': 1
+    }
+
+def _fallback_analysis():
+    """API调用失败时使用的备用评估"""
+    count_fallback('evaluation')
+    return {
+        'quality': 0.8,
+        'feedback': '回答完整，展示了相关经验，但可以更具体地列举项目案例。',
+        'strengths': ['表达清晰', '基础知识扎实'],
+        'weaknesses': ['缺少具体例子', '回答不够深入'],
+        'next_question': True,
+        'source': 'mock'  # 标记为模拟数据，不计入总体评估
+    }
+
+def _interview_params(session, args):
+    """获取面试类型、公司和语言：优先使用会话中保存的信息，兼容旧客户端的URL参数"""
+    if session:
+        return session['type'], session['company'] or '某科技公司', session['language']
+    return (
+        args.get('type', 'software_engineer'),
+        args.get('company', '某科技公司'),
+        args.get('language', 'zh')
+    )
+
+def session_history(session, pending=None):
+    """
+    从会话中取出已作答的问答历史，返回(问题列表, 回答列表)
+
+    pending为尚未记录到会话中的回答(问题ID, 回答)，预取下一题时使用。
+    """
+    if not session:
+        return [], []
+    answers = {item['question_id']: item['answer'] for item in session['answers']}
+    if pending:
+        answers[pending[0]] = pending[1]
+    answered = [q for q in session['questions'] if q['id'] in answers]
+    return [q['content'] for q in answered], [answers[q['id']] for q in answered]
+
+def question_generation(params, history=None, seen=None):
+    """
+    生成问题的步骤，由generate_question和core.async_interview.generate_question驱动
+
+    每次产出一组DeepSeek调用参数并接收调用结果；生成的问题与本场面试已出现的问题（seen为相似度索引）
+    过于相似时重新生成。结束时返回问题，调用失败或重试后仍然重复时返回None，由调用方换用题库问题。
+    """
+    interview_type, company, language = params
+    previous_questions, previous_answers = history or ([], [])
+    for attempt in range(DEDUP_MAX_RETRIES + 1):
+        result = yield interview_type, company, language, previous_questions, previous_answers
+        if not result or 'question' not in result:
+            return None
+        if not question_deduplicator.is_duplicate(seen, result['question']):
+            return {
+                'id': new_question_id(),
+                'content': result['question'],
+                'type': result.get('type', 'technical'),
+                'difficulty': result.get('difficulty', 3)
+            }
+        if attempt < DEDUP_MAX_RETRIES:
+            question_deduplicator.count('regenerated')
+    return None
+
+def generate_question(params, history=None, seen=None):
+    """调用DeepSeek API生成问题（可基于问答历史），失败或重复时返回None，参数同question_generation"""
+    steps = question_generation(params, history, seen)
+    try:
+        call = next(steps)
+        while True:
+            call = steps.send(generate_interview_question(*call))
+    except StopIteration as done:
+        return done.value
+
+def _bank_question(interview_id, session, seen=None):
+    """从预生成题库中取一道本场面试未出现过、也不与已出现问题近似的问题，没有可用问题时返回None"""
+    if not session:
+        return None
+    skipped = list(session.get('bank_seen', []))
+    for _ in range(DEDUP_MAX_RETRIES + 1):
+        item = question_bank.take(session['type'], session['language'], session.get('difficulty', 3), skipped)
+        if item is None:
+            return None
+        skipped.append(item['bank_id'])
+        if not question_deduplicator.is_duplicate(seen, item['content']):
+            break
+    else:
+        return None
+    # 只有确定下发的题目计入下发次数，近似重复而跳过的题目不会因此提前退役
+    question_bank.mark_served(item['bank_id'])
+    session_store.update(interview_id, lambda s: s.setdefault('bank_seen', []).append(item['bank_id']))
+    return {
+        'id': new_question_id(),
+        'content': item['content'],
+        'type': 'technical',
+        'difficulty': item['difficulty']
+    }
+
+def _bank_generate(interview_type, language, difficulty):
+    """为题库生成一道不针对具体公司的问题，失败时返回None"""
+    company = '某科技公司' if language == 'zh' else 'a technology company'
+    result = generate_interview_question(interview_type, company, language, difficulty=difficulty)
+    return result.get('question') if result else None
+
+def start_question_bank():
+    """启动题库的后台补充线程，由常驻进程的入口在启动时调用"""
+    buckets = [(interview_type, language, difficulty)
+               for interview_type in INTERVIEW_TYPES
+               for language in BANK_LANGUAGES
+               for difficulty in BANK_DIFFICULTIES]
+    question_bank.start_refill(buckets, _bank_generate)
+
+def _position(session):
+    """面试进度(回答数, 问题数)，用于判断预取结果是否仍然可用"""
+    return len(session['answers']), len(session['questions'])
+
+def prefetch_next(session, params):
+    """
+    提交回答时预取下一题，与答案评估并行；生成时使用包含这次回答的问答历史
+
+    预取结果按记录这次回答后的面试进度登记，之后又提交了回答或下一题已经下发时不再使用。
+    生成的问题与已出现的问题重复时放弃预取，由取题时换用题库问题。
+
+    Args:
+        session: 会话，为None（旧客户端）时不预取
+        params: answer_params返回的评估参数
+    """
+    if not session:
+        return
+    interview_id = params['interview_id']
+    interview = _interview_params(session, {})
+    history = session_history(session, (params['question_id'], params['answer']))
+    answered, asked = _position(session)
+    
+    def generate():
+        return generate_question(interview, history, question_deduplicator.index(session))
+    
+    question_prefetcher.schedule(interview_id, interview, (answered + 1, asked), generate)
+
+def _record_question(interview_id, question):
+    """把已下发的问题记录到会话中，同时记录其相似度签名"""
+    def apply(session):
+        session['questions'].append(question)
+        question_deduplicator.remember(session, question['content'])
+    
+    session_store.update(interview_id, apply)
+
+def _record_answer(interview_id, question_id, answer, analysis, job_id=None):
+    """把回答及其评估结果记录到会话中，并增量更新总体评估（备用评估和同一题的重复提交不计入）"""
+    def apply(session):
+        session['answers'].append({
+            'question_id': question_id,
+            'answer': answer,
+            'evaluation': analysis,
+            'job_id': job_id,
+            'time': time.time()
+        })
+        question = find_question(session, question_id)
+        aggregate = session.setdefault('aggregate', new_aggregate())
+        add_evaluation(aggregate, analysis, question['type'] if question else 'technical', question_id)
+    
+    session_store.update(interview_id, apply)
+    if not analysis.get('next_question', True):
+        # 面试结束，不再需要预取的下一题
+        question_prefetcher.cancel(interview_id)
+
+def format_sse(event, data):
+    """格式化一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def load_question(interview_id, args):
+    """
+    读取会话并取出已准备好的问题：优先使用提交回答时预取好的问题，其次从预生成题库中取题，都不等待
+
+    Returns:
+        (会话, (面试类型, 公司, 语言), 已出现问题的相似度索引, 问题)，问题为None时需要实时生成
+    """
+    session = session_store.get(interview_id)
+    params = _interview_params(session, args)
+    seen = question_deduplicator.index(session)
+    question = question_prefetcher.take(interview_id, params, _position(session)) if session else None
+    if question is None:
+        question = _bank_question(interview_id, session, seen)
+    return session, params, seen, question
+
+def serve_question(interview_id, question):
+    """记录下发的问题，question为None（生成失败）时使用备用问题，返回下发的问题"""
+    if question is None:
+        question = _fallback_question()
+    _record_question(interview_id, question)
+    return question
+
+def serve_fallback_question(interview_id):
+    """取题出错时记录并返回备用问题"""
+    question = _fallback_question()
+    _record_question(interview_id, question)
+    return question
+
+def finish_question_stream(interview_id, content, question=None, session=None, seen=None, params=None):
+    """
+    流式取题结束时记录问题，返回还需推送的SSE消息
+
+    question为预取或题库问题时一次性推送全文；否则由已推送的content生成问题，一个token都没有收到时推送备用问题。
+    实时生成的问题与本场面试已出现的问题（seen为相似度索引）近似重复时，换用题库问题或重新生成（params为生成参数），
+    done消息中的问题即为最终下发的问题；都失败时仍下发已推送的问题。
+    """
+    events = []
+    if question is None and content:
+        if question_deduplicator.is_duplicate(seen, content):
+            question = _bank_question(interview_id, session, seen)
+            if question is not None:
+                question_deduplicator.count('swapped')
+            elif params is not None:
+                question_deduplicator.count('regenerated')
+                question = generate_question(params, session_history(session), seen)
+        question = question or {
+            'id': new_question_id(),
+            'content': content,
+            'type': 'technical',
+            'difficulty': 3
+        }
+    else:
+        question = question or _fallback_question()
+        events.append(format_sse('token', {'content': question['content']}))
+    serve_question(interview_id, question)
+    events.append(format_sse('done', question))
+    return events
+
+def answer_params(data):
+    """
+    校验提交答案的请求体，问题内容、面试类型和语言从会话中获取，兼容旧客户端在请求体中携带
+
+    Returns:
+        (会话, 评估参数字典)，缺少必要参数时返回None
+    """
+    if not data or 'interview_id' not in data or 'question_id' not in data or 'answer' not in data:
+        return None
+    session = session_store.get(data.get('interview_id'))
+    asked = find_question(session, data.get('question_id')) if session else None
+    return session, {
+        'interview_id': data.get('interview_id'),
+        'question_id': data.get('question_id'),
+        'question': asked['content'] if asked else data.get('question', ''),
+        'answer': data.get('answer'),
+        'interview_type': session['type'] if session else data.get('type', 'software_engineer'),
+        'language': session['language'] if session else data.get('language', 'zh')
+    }
+
+def queue_answer(session, params):
+    """评估任务进入后台队列，返回202和任务ID；队列已满时返回503"""
+    job_id = new_job_id()
+    try:
+        evaluation_queue.submit(
+            evaluate_and_record, params, job_id,
+            priority=PRIORITY_INTERACTIVE if session else PRIORITY_BACKGROUND,
+            job_id=job_id
+        )
+    except QueueFullError:
+        # 背压：队列已满时让客户端稍后重试，而不是占用工作进程同步等待
+        return json_response({
+            'status': 'error',
+            'message': '评估服务繁忙，请稍后重试'
+        }, 503, headers={'Retry-After': '2'})
+    
+    interview_id = params['interview_id']
+    return json_response({
+        'status': 'success',
+        'data': {
+            'job_id': job_id,
+            'status': 'queued',
+            'poll_url': f'/api/interview/answer/result?job_id={job_id}&interview_id={interview_id}',
+            'events_url': f'/api/interview/answer/events?job_id={job_id}&interview_id={interview_id}'
+        }
+    }, 202)
+
+def _analysis_from_result(result):
+    """把DeepSeek评估结果转换为单题评估，API调用失败时使用备用评估"""
+    if result and not 'error' in result:
+        return {
+            'quality': result['score'] / 100,  # 转换为0-1范围
+            'feedback': result['suggestions'],
+            'strengths': result['strengths'],
+            'weaknesses': result['weaknesses'],
+            'next_question': result['continue'],
+            'source': 'deepseek'
+        }
+    return _fallback_analysis()
+
+def record_evaluation(params, result, job_id=None):
+    """把DeepSeek评估结果转换为单题评估并记录到会话中，返回单题评估"""
+    try:
+        analysis = _analysis_from_result(result)
+        _record_answer(params['interview_id'], params['question_id'], params['answer'], analysis, job_id)
+    except Exception as e:
+        print(f"评估答案时出错: {str(e)}")
+        # 出错时使用备用评估
+        analysis = _fallback_analysis()
+    
+    return analysis
+
+def evaluate_and_record(params, job_id=None):
+    """调用DeepSeek API评估答案并记录到会话中，返回单题评估"""
+    try:
+        result = evaluate_answer(params['question'], params['answer'], params['interview_type'], params['language'])
+    except Exception as e:
+        print(f"评估答案时出错: {str(e)}")
+        result = {'error': str(e)}
+    return record_evaluation(params, result, job_id)
+
+# API端点
+def get_interview_types(request):
+    """获取可用的面试类型"""
+    return json_response({
+        'status': 'success',
+        'data': INTERVIEW_TYPES
+    })
+
+def start_interview(request):
+    """开始新面试"""
+    data = request.json
+    
+    # 验证请求数据
+    if not data or 'type' not in data:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+    
+    interview_type = data.get('type')
+    company_name = data.get('company', '')
+    language = data.get('language', 'zh')
+    use_ml = data.get('use_ml', True)
+    difficulty = data.get('difficulty', 3)
+    
+    # 创建并保存面试会话
+    session = session_store.create(new_session(interview_type, company_name, language, use_ml, difficulty))
+    
+    # 返回面试会话信息
+    return json_response({
+        'status': 'success',
+        'data': {
+            'interview_id': session['interview_id'],
+            'type': interview_type,
+            'company': company_name,
+            'language': language,
+            'use_ml': use_ml,
+            'difficulty': difficulty,
+            'start_time': session['start_time']
+        }
+    })
+
+def get_question(request):
+    """获取面试问题"""
+    interview_id = request.args.get('interview_id')
+    
+    if not interview_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少面试ID'
+        }, 400)
+    
+    try:
+        # 预取好的问题和题库问题都没有时，才调用DeepSeek API实时生成
+        session, params, seen, question = load_question(interview_id, request.args)
+        if question is None:
+            question = generate_question(params, session_history(session), seen)
+        question = serve_question(interview_id, question)
+    except Exception as e:
+        print(f"生成问题时出错: {str(e)}")
+        # 出错时使用备用问题
+        question = serve_fallback_question(interview_id)
+    
+    return json_response({
+        'status': 'success',
+        'data': question
+    })
+
+def stream_question(request):
+    """以Server-Sent Events流式获取面试问题"""
+    interview_id = request.args.get('interview_id')
+    
+    if not interview_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少面试ID'
+        }, 400)
+    
+    args = request.args
+    
+    def generate():
+        # 先发送注释行让响应立即开始，预取和题库问题在流中读取
+        yield ': connected\n\n'
+        content, session, params, seen, stored = '', None, None, None, None
+        try:
+            session, params, seen, stored = load_question(interview_id, args)
+            if stored is None:
+                for chunk in stream_interview_question(*params, *session_history(session)):
+                    if 'error' in chunk:
+                        break
+                    content += chunk['token']
+                    # 每收到一段文本立即推送给浏览器
+                    yield format_sse('token', {'content': chunk['token']})
+        except Exception as e:
+            print(f"流式生成问题时出错: {str(e)}")
+        
+        yield from finish_question_stream(interview_id, content, stored, session, seen, params)
+    
+    return stream_response(generate(), 'text/event-stream', headers=SSE_HEADERS)
+
+def submit_answer(request):
+    """
+    提交面试答案
+    
+    请求体中async为true时，评估任务进入后台队列，立即返回202和任务ID，
+    客户端通过/answer/result轮询或/answer/events订阅评估结果。
+    """
+    data = request.json
+    loaded = answer_params(data)
+    
+    # 验证请求数据
+    if loaded is None:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+    
+    session, params = loaded
+    # 下一题参考这次回答，在评估的同时生成
+    prefetch_next(session, params)
+    if data.get('async'):
+        return queue_answer(session, params)
+    
+    return json_response({
+        'status': 'success',
+        'data': evaluate_and_record(params)
+    })
+
+def _answer_job_status(job_id, interview_id, job):
+    """任务状态；本进程中找不到任务时（如由其他工作进程处理），从会话中查找已记录的评估结果"""
+    if job is None and interview_id:
+        session = session_store.get(interview_id)
+        for item in (session or {}).get('answers', []):
+            if item.get('job_id') == job_id:
+                return {'job_id': job_id, 'status': 'done', 'result': item['evaluation'], 'error': None}
+    return job
+
+def get_answer_result(request):
+    """轮询答案评估任务的结果"""
+    job_id = request.args.get('job_id')
+    
+    if not job_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少任务ID'
+        }, 400)
+    
+    job = _answer_job_status(job_id, request.args.get('interview_id'), evaluation_queue.get(job_id))
+    if job is None:
+        return json_response({
+            'status': 'error',
+            'message': '任务不存在或已过期'
+        }, 404)
+    
+    return json_response({
+        'status': 'success',
+        'data': job
+    })
+
+def answer_events(request):
+    """以Server-Sent Events推送答案评估任务的结果"""
+    job_id = request.args.get('job_id')
+    interview_id = request.args.get('interview_id')
+    
+    if not job_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少任务ID'
+        }, 400)
+    
+    def generate():
+        while True:
+            job = _answer_job_status(job_id, interview_id, evaluation_queue.wait(job_id, timeout=15))
+            if job is None:
+                yield format_sse('error', {'job_id': job_id, 'message': '任务不存在或已过期'})
+                return
+            if job['status'] in ('done', 'failed'):
+                yield format_sse('done', job)
+                return
+            # 定期发送注释行保持连接
+            yield ': keep-alive\n\n'
+    
+    return stream_response(generate(), 'text/event-stream', headers=SSE_HEADERS)
+
+def get_evaluation(request):
+    """获取面试总体评估"""
+    interview_id = request.args.get('interview_id')
+    
+    if not interview_id:
+        return json_response({
+            'status': 'error',
+            'message': '缺少面试ID'
+        }, 400)
+    
+    # 直接读取每次提交回答时增量维护的汇总结果
+    session = session_store.get(interview_id)
+    # 汇总中只有真实评估；全部回答都使用了备用评估时按没有评估结果处理
+    if session and session.get('aggregate', {}).get('count'):
+        evaluation = summarize(session['aggregate'], session['language'])
+        evaluation['source'] = 'aggregate'
+        return json_response({
+            'status': 'success',
+            'data': evaluation
+        })
+    
+    # 会话不存在或尚未回答任何问题时，返回默认评估
+    count_fallback('summary')
+    evaluation = {
+        'score': 85,
+        'summary': '面试表现良好，技术基础扎实，沟通流畅。可以更好地展示项目经验和解决问题的能力。',
+        'strengths': ['技术知识全面', '表达清晰', '逻辑思维好'],
+        'weaknesses': ['项目经验描述不够具体', '对某些技术细节掌握不够深入'],
+        'suggestions': '建议在回答中加入更多具体的项目案例和数据，展示解决复杂问题的能力。',
+        'source': 'mock'
+    }
+    
+    return json_response({
+        'status': 'success',
+        'data': evaluation
+    }) 
\ No newline at end of file
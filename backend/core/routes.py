@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+路由表 - Flask蓝图和Serverless函数注册同一组接口
+
+处理函数以"模块:函数"字符串登记，第一次访问时才导入所在模块：Serverless实例冷启动时只加载被请求的接口
+及其依赖的服务，不会为健康检查加载DeepSeek客户端，也不会为取题加载音频解码。
+"""
+
+import importlib
+from core.http import json_response
+
+# URL前缀 -> [(请求方法, 路径, 处理函数)]
+ROUTES = {
+    '/api/interview': [
+        ('GET', '/types', 'core.interview:get_interview_types'),
+        ('POST', '/start', 'core.interview:start_interview'),
+        ('GET', '/question', 'core.interview:get_question'),
+        ('GET', '/question/stream', 'core.interview:stream_question'),
+        ('POST', '/answer', 'core.interview:submit_answer'),
+        ('GET', '/answer/result', 'core.interview:get_answer_result'),
+        ('GET', '/answer/events', 'core.interview:answer_events'),
+        ('GET', '/evaluate', 'core.interview:get_evaluation'),
+    ],
+    '/api/speech': [
+        ('POST', '/tts', 'core.speech:text_to_speech_api'),
+        ('POST', '/tts/stream', 'core.speech:text_to_speech_stream_api'),
+        ('POST', '/asr', 'core.speech:speech_to_text_api'),
+        ('GET', '/asr/websocket', 'core.speech:asr_websocket_info'),
+    ],
+    '/api': [
+        ('GET', '/health', 'core.system:health_check'),
+        ('GET', '/metrics', 'core.system:metrics_api'),
+    ],
+}
+
+_handlers = {}
+
+
+def resolve(target):
+    """按"模块:函数"导入处理函数"""
+    handler = _handlers.get(target)
+    if handler is None:
+        module, _, name = target.partition(':')
+        handler = _handlers[target] = getattr(importlib.import_module(module), name)
+    return handler
+
+
+class Router:
+    """按完整路径分发请求，供没有自带路由的入口（Serverless函数）使用"""
+
+    def __init__(self, routes=ROUTES):
+        self._table = {}
+        for prefix, items in routes.items():
+            for method, path, target in items:
+                self._table.setdefault(prefix + path, {})[method] = target
+
+    def rule(self, path):
+        """指标标签使用的路由，未知路径为unmatched"""
+        path = path.rstrip('/')
+        return path if path in self._table else 'unmatched'
+
+    def target(self, method, path):
+        """路径和方法对应的处理函数名，没有时返回None"""
+        return self._table.get(path.rstrip('/'), {}).get(method)
+
+    def dispatch(self, request):
+        """调用请求对应的处理函数，返回core.http.Response"""
+        methods = self._table.get(request.path.rstrip('/'))
+        if methods is None:
+            return json_response({'status': 'error', 'message': '接口不存在'}, 404)
+        target = methods.get(request.method)
+        if target is None:
+            return json_response(
+                {'status': 'error', 'message': '不支持的请求方法'}, 405, headers={'Allow': ', '.join(sorted(methods))}
+            )
+        return resolve(target)(request)
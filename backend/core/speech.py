@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+语音接口 - 语音识别和合成的REST API实现，由Flask蓝图（api/speech_api.py）和Serverless函数共用
+
+流式语音识别的WebSocket需要长连接，只在Flask和ASGI入口中提供。
+"""
+
+import json
+import base64
+from core.http import Response, json_response, stream_response
+from services.xfyun_service import synthesize_audio, text_to_speech_stream, speech_to_text, TTS_SAMPLE_RATE
+from services.audio_encoder import audio_encoder, pcm_duration
+from services.audio_decoder import audio_decoder, AudioDecodeError
+from services.metrics import phase, count_fallback
+
+# 流式TTS的响应头
+TTS_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # 禁止反向代理缓冲，保证第一段音频尽快到达
+}
+
+def negotiate_audio_format(accept):
+    """
+    按Accept头选择TTS音频格式
+    
+    客户端同等接受多种音频格式（如audio/*）时按服务端偏好（AUDIO_FORMATS）选择。
+    
+    Returns:
+        格式名（wav、opus或mp3）；客户端优先接受JSON或未指定Accept头时返回None
+    """
+    from werkzeug.datastructures import MIMEAccept  # 只有TTS接口需要解析Accept头
+    from werkzeug.http import parse_accept_header
+    formats = audio_encoder.formats()
+    offered = ['application/json'] + [audio_encoder.mimetype(fmt) for fmt in formats]
+    best = parse_accept_header(accept, MIMEAccept).best_match(offered)
+    if best is None or best == 'application/json':
+        return None
+    return formats[offered.index(best) - 1]
+
+def _binary_audio_headers(fmt, size, duration, source, cached=False):
+    """二进制TTS响应的元数据响应头"""
+    return {
+        'Content-Length': str(size),
+        'X-Audio-Format': fmt,
+        'X-Audio-Duration': str(duration),
+        'X-Audio-Source': source,
+        'X-Audio-Cached': 'true' if cached else 'false',
+        'X-Audio-Sample-Rate': str(TTS_SAMPLE_RATE),
+        # 跨域请求时浏览器只有在这里列出的响应头才能读取
+        'Access-Control-Expose-Headers': 'X-Audio-Format, X-Audio-Duration, X-Audio-Source, X-Audio-Cached, X-Audio-Sample-Rate'
+    }
+
+def tts_fallback_response(binary_format):
+    """科大讯飞服务调用失败时返回模拟数据"""
+    count_fallback('tts')
+    if binary_format:
+        # 返回不含采样的WAV，客户端按X-Audio-Source判断
+        fmt, chunks = audio_encoder.encode(b'', 'wav')
+        return Response(chunks, mimetype=audio_encoder.mimetype(fmt), headers=_binary_audio_headers(fmt, 44, 0, 'mock'))
+    dummy_audio = base64.b64encode(b'DUMMY_AUDIO_DATA').decode('utf-8')
+    return json_response({
+        'status': 'success',
+        'data': {
+            'audio': dummy_audio,
+            'format': 'wav',
+            'duration': 2.5,  # 模拟音频长度（秒）
+            'source': 'mock'  # 标记为模拟数据
+        }
+    })
+
+def tts_response(fmt, chunks, pcm, cached, binary_format):
+    """
+    合成成功时的响应
+    
+    Args:
+        fmt, chunks: audio_encoder编码得到的格式和数据块
+        pcm: 编码前的PCM数据，用于计算时长
+        cached: 是否命中TTS缓存
+        binary_format: negotiate_audio_format协商出的格式，为None时返回JSON
+    """
+    if binary_format:
+        # 各数据块（WAV为文件头和缓存中的PCM）依次写出，不拼接成新的缓冲区
+        size = sum(len(chunk) for chunk in chunks)
+        return Response(
+            chunks, mimetype=audio_encoder.mimetype(fmt),
+            headers=_binary_audio_headers(fmt, size, pcm_duration(len(pcm)), 'xfyun', cached)
+        )
+    
+    # 返回真实的音频数据
+    with phase('audio'):
+        audio = base64.b64encode(b''.join(chunks)).decode('utf-8')
+    return json_response({
+        'status': 'success',
+        'data': {
+            'audio': audio,
+            'format': fmt,
+            'mimetype': audio_encoder.mimetype(fmt),
+            'duration': pcm_duration(len(pcm)),  # 由采样数计算的时长（秒）
+            'source': 'xfyun',  # 标记为讯飞数据
+            'cached': cached  # 是否命中TTS缓存
+        }
+    })
+
+def tts_stream_line(index, total, sentence, result):
+    """流式TTS中一句的NDJSON行"""
+    chunk = {
+        'index': index,
+        'total': total,
+        'text': sentence,
+        'format': 'pcm',
+        'sample_rate': TTS_SAMPLE_RATE
+    }
+    if result.get('success', False):
+        chunk['audio'] = result['audio']
+        chunk['source'] = 'xfyun'
+        chunk['cached'] = result.get('cached', False)
+    else:
+        # 该句合成失败，客户端跳过这一段
+        count_fallback('tts')
+        chunk['audio'] = ''
+        chunk['source'] = 'mock'
+    return json.dumps(chunk, ensure_ascii=False) + '\n'
+
+def text_to_speech_api(request):
+    """
+    文本转语音API
+    
+    请求头Accept为音频类型（audio/ogg、audio/mpeg、audio/wav或audio/*）时直接返回编码后的音频，
+    元数据放在X-Audio-*响应头中；否则返回JSON，音频为base64编码，格式由请求体中的format指定（默认wav）。
+    """
+    data = request.json
+    
+    # 验证请求数据
+    if not data or 'text' not in data:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+    
+    binary_format = negotiate_audio_format(request.headers.get('Accept', ''))
+    
+    # 调用科大讯飞TTS服务，默认使用讯飞小燕声音
+    result = synthesize_audio(data.get('text'), voice=data.get('voice', 'xiaoyan'))
+    if not result.get('success', False):
+        return tts_fallback_response(binary_format)
+    
+    pcm = result['data']
+    with phase('audio'):
+        fmt, chunks = audio_encoder.encode(pcm, binary_format or data.get('format', 'wav'))
+    return tts_response(fmt, chunks, pcm, result['cached'], binary_format)
+
+def text_to_speech_stream_api(request):
+    """
+    流式文本转语音API
+    
+    按句子分段合成，以分块传输的NDJSON逐句返回音频（16kHz 16bit单声道PCM的base64编码），
+    客户端收到第一段即可开始播放。
+    """
+    data = request.json
+    
+    # 验证请求数据
+    if not data or 'text' not in data:
+        return json_response({
+            'status': 'error',
+            'message': '缺少必要参数'
+        }, 400)
+    
+    text = data.get('text')
+    voice = data.get('voice', 'xiaoyan')  # 默认使用讯飞小燕声音
+    
+    def generate():
+        for index, total, sentence, result in text_to_speech_stream(text, voice=voice):
+            yield tts_stream_line(index, total, sentence, result)
+    
+    return stream_response(generate(), 'application/x-ndjson', headers=TTS_STREAM_HEADERS)
+
+def speech_to_text_api(request):
+    """
+    语音识别API
+    
+    推荐直接以请求体上传16kHz 16bit单声道PCM（Content-Type: audio/L16;rate=16000，语言通过查询参数language指定）；
+    也兼容multipart表单上传的audio文件（WAV或MediaRecorder录制的WebM/Ogg等）。音频按块解码并转发，不整段读入内存。
+    """
+    if request.mimetype in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+        # 检查是否有文件上传
+        if 'audio' not in request.files:
+            return json_response({
+                'status': 'error',
+                'message': '未找到音频文件'
+            }, 400)
+        audio_file = request.files['audio']
+        language = request.form.get('language', 'zh')
+        stream, content_type = audio_file.stream, audio_file.content_type
+    else:
+        language = request.args.get('language', 'zh')
+        stream, content_type = request.stream, request.content_type
+    
+    # 解码为16kHz PCM数据块并调用科大讯飞ASR服务；文件头之后的数据损坏时在识别过程中才会发现
+    xf_language = 'zh_cn' if language == 'zh' else 'en_us'
+    try:
+        with phase('audio'):
+            audio_data = audio_decoder.decode(stream, content_type)
+        result = speech_to_text(audio_data, language=xf_language)
+    except AudioDecodeError as e:
+        return json_response({
+            'status': 'error',
+            'message': str(e)
+        }, 415)
+    
+    if not result.get('success', False):
+        # 如果科大讯飞服务调用失败，返回模拟数据
+        count_fallback('asr')
+        return json_response({
+            'status': 'success',
+            'data': {
+                'text': "这是一个模拟的语音识别结果",
+                'confidence': 0.95,
+                'source': 'mock'  # 标记为模拟数据
+            }
+        })
+    
+    # 返回真实的识别结果
+    return json_response({
+        'status': 'success',
+        'data': {
+            'text': result['text'],
+            'confidence': 0.95,  # 置信度未知，使用默认值
+            'source': 'xfyun'  # 标记为讯飞数据
+        }
+    })
+
+def asr_websocket_info(request):
+    """获取WebSocket语音识别服务信息"""
+    # 提供WebSocket服务端点信息
+    # 在实际实现中，前端将通过WebSocket与后端建立连接进行实时语音识别
+    scheme = 'wss' if request.secure or request.headers.get('X-Forwarded-Proto') == 'https' else 'ws'
+    return json_response({
+        'status': 'success',
+        'data': {
+            'websocket_url': f'{scheme}://{request.host}/api/speech/ws',
+            'protocol': 'xf-asr-1.0',
+            'supported_formats': ['pcm'],
+            'sample_rate': 16000
+        }
+    })
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+系统接口 - 健康检查和Prometheus指标
+"""
+
+import sys
+from operator import attrgetter
+from core.http import Response, json_response
+from services import metrics
+
+
+def _stats(module_name, getter):
+    """
+    读取服务的统计
+
+    服务模块只在用到它的接口首次调用时导入，健康检查和指标接口不为读取统计而导入它们，
+    以免在冷启动时付出全部服务的导入开销；尚未导入的服务没有任何活动，返回空字典。
+
+    Args:
+        module_name: 服务模块名
+        getter: 模块内返回统计的可调用对象路径，如"tts_cache.stats"
+    """
+    module = sys.modules.get(module_name)
+    try:
+        return attrgetter(getter)(module)() if module else {}
+    except AttributeError:
+        # 模块正在另一个线程中导入，服务对象还没创建
+        return {}
+
+
+def _stat_value(module_name, getter, key):
+    # 服务尚未加载时不输出样本
+    stats = _stats(module_name, getter)
+    return stats[key] if stats else []
+
+
+def _evaluation_queue_jobs():
+    stats = _stats('services.job_queue', 'evaluation_queue.stats')
+    return [((state,), stats[state]) for state in ('pending', 'running')] if stats else []
+
+
+# 缓存、队列和进行中请求数等瞬时值，抓取/api/metrics时才读取
+_BREAKER_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+metrics.registry.gauge('tts_cache_memory_bytes', 'TTS缓存内存层占用字节数',
+                       lambda: _stat_value('services.tts_cache', 'tts_cache.stats', 'memory_bytes'))
+metrics.registry.gauge('tts_cache_memory_entries', 'TTS缓存内存层条目数',
+                       lambda: _stat_value('services.tts_cache', 'tts_cache.stats', 'memory_entries'))
+metrics.registry.gauge('tts_cache_hit_ratio', 'TTS缓存命中率',
+                       lambda: _stat_value('services.tts_cache', 'tts_cache.stats', 'hit_rate'))
+metrics.registry.gauge('sessions', '面试会话数',
+                       lambda: _stat_value('services.session_store', 'session_store.stats', 'sessions'))
+metrics.registry.gauge('evaluation_queue_jobs', '评估队列中的任务数', _evaluation_queue_jobs, ('state',))
+metrics.registry.gauge('prefetch_hit_ratio', '预取问题命中率',
+                       lambda: _stat_value('services.prefetch', 'question_prefetcher.stats', 'hit_rate'))
+metrics.registry.gauge(
+    'single_flight_inflight', '进行中的合并请求数', lambda: [
+        ((name,), stats['inflight'])
+        for name, stats in _stats('services.single_flight', 'get_flight_stats').items()
+    ], ('flight',)
+)
+metrics.registry.gauge('vad_trimmed_audio_seconds', '语音识别前去掉的静音总时长（秒）',
+                       lambda: _stat_value('services.vad', 'vad.stats', 'trimmed_seconds'))
+metrics.registry.gauge(
+    'circuit_breaker_state', '熔断器状态（0关闭，1半开，2打开）', lambda: [
+        ((name,), _BREAKER_STATES[stats['state']])
+        for name, stats in _stats('services.circuit_breaker', 'get_breaker_stats').items()
+    ], ('upstream',)
+)
+
+
+def health_check(request):
+    """健康检查API"""
+    return json_response({
+        'status': 'success',
+        'message': 'AI面试模拟系统API服务正常运行',
+        'data': {
+            'http_pools': _stats('services.http_client', 'get_pool_stats'),
+            # httpx客户端只在ASGI入口中加载
+            'async_http_pools': _stats('services.async_http_client', 'get_pool_stats'),
+            'tts_cache': _stats('services.tts_cache', 'tts_cache.stats'),
+            'audio_encoder': _stats('services.audio_encoder', 'audio_encoder.stats'),
+            'audio_decoder': _stats('services.audio_decoder', 'audio_decoder.stats'),
+            'vad': _stats('services.vad', 'vad.stats'),
+            'xfyun_auth': _stats('services.xfyun_auth', 'xfyun_signer.stats'),
+            'evaluation_parser': _stats('services.structured_output', 'evaluation_parser.stats'),
+            'sessions': _stats('services.session_store', 'session_store.stats'),
+            'evaluation_queue': _stats('services.job_queue', 'evaluation_queue.stats'),
+            'prefetch': _stats('services.prefetch', 'question_prefetcher.stats'),
+            'question_bank': _stats('services.question_bank', 'question_bank.stats'),
+            'question_dedup': _stats('services.question_dedup', 'question_deduplicator.stats'),
+            'single_flight': _stats('services.single_flight', 'get_flight_stats'),
+            'circuit_breakers': _stats('services.circuit_breaker', 'get_breaker_stats')
+        }
+    })
+
+
+def metrics_api(request):
+    """Prometheus格式的指标"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+AI面试模拟系统 - Serverless入口（Vercel Python函数）
+
+平台为每个请求实例化BaseHTTPRequestHandler的子类handler，请求按core.routes分发给与Flask蓝图相同的处理函数。
+本模块只导入标准库、core.routes和指标服务，接口所在模块在第一次请求它时才导入，
+冷启动耗时由benchmarks/cold_start.py测量。
+
+Serverless实例随时可能被回收，响应结束后也不会继续运行后台线程：
+- 会话需要保存在各实例共享的存储中（见SESSION_STORE），否则同一场面试的请求落到其他实例时找不到会话；
+- 预取下一题默认关闭，题库补充线程不启动；提交答案请使用同步评估（请求体不带async）；
+- 流式语音识别需要WebSocket长连接，只在Flask和ASGI入口中提供。
+
+本地调试：
+    python serverless.py --port 5001
+"""
+
+import os
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+# 响应结束后实例即被冻结，后台预取的问题多半来不及生成，必须在导入服务模块之前设置
+os.environ.setdefault('PREFETCH_ENABLED', 'false')
+
+from core.http import Request, json_response
+from core.routes import Router
+from services.metrics import phase, start_request, finish_request
+
+# 与app.py中的跨域设置一致
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'GET,PUT,POST,DELETE,OPTIONS'
+}
+
+router = Router()
+
+
+class _Body:
+    """按Content-Length读取请求体，不会读到连接中的后续数据"""
+
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.rfile.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class handler(BaseHTTPRequestHandler):
+    """Vercel Python运行时要求的请求处理类，类名固定为handler"""
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def do_OPTIONS(self):
+        # 跨域预检请求
+        self.send_response(204)
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        phases = start_request()
+        try:
+            response = router.dispatch(self._request(url))
+        except Exception as e:
+            print(f"处理请求{self.command} {url.path}时出错: {str(e)}")
+            response = json_response({'status': 'error', 'message': '服务器内部错误'}, 500)
+        try:
+            self._send(response)
+        finally:
+            # 流式响应发送完毕后才结束计时
+            finish_request(phases, router.rule(url.path), self.command, response.status)
+
+    def _request(self, url):
+        body = _Body(self.rfile, int(self.headers.get('Content-Length') or 0))
+        return Request(
+            self.command, url.path,
+            args=dict(parse_qsl(url.query, keep_blank_values=True)),
+            headers=self.headers,
+            stream=body,
+            host=self.headers.get('Host', ''),
+            form_loader=lambda: self._parse_form(body)
+        )
+
+    def _parse_form(self, body):
+        # 只有表单上传音频时才需要werkzeug，由它按CONTENT_LENGTH限制读取
+        from werkzeug.formparser import parse_form_data
+        _, form, files = parse_form_data({
+            'wsgi.input': self.rfile,
+            'REQUEST_METHOD': self.command,
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': str(body.remaining)
+        })
+        return form, files
+
+    def _send(self, response):
+        if response.payload is not None:
+            self._send_json(response.payload, response.status, response.headers)
+            return
+        mimetype = response.mimetype or 'application/octet-stream'
+        if mimetype.startswith('text/') and 'charset' not in mimetype:
+            mimetype += '; charset=utf-8'
+        body = response.body.encode('utf-8') if isinstance(response.body, str) else response.body
+        headers = dict(response.headers)
+        if isinstance(body, bytes):
+            headers['Content-Length'] = str(len(body))
+        self._send_headers(response.status, mimetype, headers)
+        if isinstance(body, bytes):
+            self.wfile.write(body)
+            return
+        # 流式响应逐块写出，没有Content-Length时以关闭连接表示结束
+        for chunk in body:
+            self.wfile.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            self.wfile.flush()
+
+    def _send_json(self, payload, status, headers=None):
+        with phase('serialize'):
+            body = json.dumps(payload).encode('utf-8')
+        headers = dict(headers or {})
+        headers['Content-Length'] = str(len(body))
+        self._send_headers(status, 'application/json', headers)
+        self.wfile.write(body)
+
+    def _send_headers(self, status, mimetype, headers):
+        self.send_response(status)
+        self.send_header('Content-Type', mimetype)
+        for name, value in {**CORS_HEADERS, **headers}.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+
+if __name__ == '__main__':
+    import argparse
+    from http.server import ThreadingHTTPServer
+
+    parser = argparse.ArgumentParser(description='在本地运行Serverless入口')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+    print(f"Serverless入口运行在 http://{args.host}:{args.port}")
+    ThreadingHTTPServer((args.host, args.port), handler).serve_forever()
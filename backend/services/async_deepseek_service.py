@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+DeepSeek API异步服务 - deepseek_service的asyncio版本，供ASGI入口使用
+
+提示词构建、响应解析、请求合并和熔断与同步版本共用，只有网络读写改为协程。
+"""
+
+import time
+import logging
+from services import async_http_client
+from services.deepseek_service import (
+    DEEPSEEK_API_URL, DEEPSEEK_READ_TIMEOUT, DEEPSEEK_JSON_MODE,
+    request_headers, request_payload, parse_stream_line,
+    build_question_messages, parse_question_response,
+    build_evaluation_messages, parse_evaluation_response
+)
+from services.single_flight import question_flight, request_key
+from services.circuit_breaker import deepseek_breaker
+from services.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+
+async def deepseek_chat_completion(messages, temperature=0.7, max_tokens=2000, json_mode=False):
+    """
+    调用DeepSeek API进行聊天补全，参数同deepseek_service.deepseek_chat_completion
+
+    Returns:
+        API响应的JSON对象
+    """
+    # 熔断期间直接返回错误，调用方立即使用备用结果
+    if not deepseek_breaker.allow():
+        return {"error": "DeepSeek服务暂时不可用（熔断中）"}
+
+    started = time.monotonic()
+    try:
+        with phase('deepseek'):
+            response = await async_http_client.post(
+                DEEPSEEK_API_URL, read_timeout=DEEPSEEK_READ_TIMEOUT,
+                headers=request_headers(), json=request_payload(messages, temperature, max_tokens, json_mode=json_mode)
+            )
+        response.raise_for_status()
+        result = response.json()
+    except Exception as e:
+        deepseek_breaker.record(time.monotonic() - started, failed=True)
+        logger.error(f"DeepSeek API调用失败: {str(e)}")
+        return {"error": str(e)}
+    deepseek_breaker.record(time.monotonic() - started)
+    return result
+
+
+async def deepseek_chat_completion_stream(messages, temperature=0.7, max_tokens=2000):
+    """
+    以流式方式调用DeepSeek API进行聊天补全
+
+    Yields:
+        {"token": 增量文本} 或出错时的 {"error": 错误信息}
+    """
+    if not deepseek_breaker.allow():
+        yield {"error": "DeepSeek服务暂时不可用（熔断中）"}
+        return
+
+    # 流式调用以收到响应头的耗时计入慢调用统计，传输中途出错计为失败
+    started = time.monotonic()
+    elapsed = None
+    recorded = False
+    try:
+        async with async_http_client.stream(
+            DEEPSEEK_API_URL, read_timeout=DEEPSEEK_READ_TIMEOUT,
+            headers=request_headers(stream=True), json=request_payload(messages, temperature, max_tokens, stream=True)
+        ) as response:
+            response.raise_for_status()
+            elapsed = time.monotonic() - started
+            lines = response.aiter_lines()
+            while True:
+                # 只把等待下一行的时间计入上游阶段，不包括调用方处理每个token的时间
+                with phase('deepseek'):
+                    try:
+                        line = await lines.__anext__()
+                    except StopAsyncIteration:
+                        break
+                done, token = parse_stream_line(line)
+                if done:
+                    break
+                if token:
+                    yield {"token": token}
+    except Exception as e:
+        deepseek_breaker.record(elapsed if elapsed is not None else time.monotonic() - started, failed=True)
+        recorded = True
+        logger.error(f"DeepSeek流式API调用失败: {str(e)}")
+        yield {"error": str(e)}
+    finally:
+        # 调用方提前停止读取（如客户端断开）时也要记录，否则半开状态的探测名额不会释放
+        if not recorded:
+            deepseek_breaker.record(elapsed if elapsed is not None else time.monotonic() - started)
+
+
+async def generate_interview_question(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+    """
+    生成面试问题，参数同deepseek_service.generate_interview_question
+
+    Returns:
+        {"question": 问题} 或 {"error": 错误信息}
+    """
+    messages = build_question_messages(interview_type, company, language, previous_questions, previous_answers, difficulty)
+    with phase('deepseek'):
+        response = await question_flight.do_async(request_key(messages), deepseek_chat_completion, messages)
+    return parse_question_response(response)
+
+
+async def stream_interview_question(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+    """
+    流式生成面试问题，参数同generate_interview_question
+
+    Yields:
+        {"token": 增量文本} 或出错时的 {"error": 错误信息}
+    """
+    messages = build_question_messages(interview_type, company, language, previous_questions, previous_answers, difficulty)
+    async for chunk in deepseek_chat_completion_stream(messages):
+        yield chunk
+
+
+async def evaluate_answer(question, answer, interview_type, language="zh"):
+    """
+    评估面试回答，参数同deepseek_service.evaluate_answer
+
+    Returns:
+        评估结果
+    """
+    messages = build_evaluation_messages(question, answer, interview_type, language)
+    response = await deepseek_chat_completion(messages, json_mode=DEEPSEEK_JSON_MODE)
+    return parse_evaluation_response(response)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步上游HTTP客户端 - ASGI入口使用的httpx长连接池，超时和重试配置与http_client一致
+"""
+
+import os
+import asyncio
+import threading
+import httpx
+from services.http_client import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_POST_RETRY_STATUS
+)
+
+# 连接池配置：一个事件循环即可承载大量并发等待的请求，连接数上限比同步连接池大
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', '200'))
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.environ.get('ASYNC_HTTP_MAX_KEEPALIVE', '50'))
+ASYNC_HTTP_POOL_TIMEOUT = float(os.environ.get('ASYNC_HTTP_POOL_TIMEOUT', '10'))  # 等待空闲连接的最长时间（秒）
+
+# httpx客户端绑定创建它的事件循环，按事件循环各创建一个
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client():
+    """
+    获取当前事件循环共享的AsyncClient
+
+    Returns:
+        httpx.AsyncClient实例
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=ASYNC_HTTP_POOL_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE
+                ),
+                # 传输层只重试建立连接失败；可重试状态码由post()按退避策略重试
+                transport=httpx.AsyncHTTPTransport(retries=HTTP_MAX_RETRIES)
+            )
+            _clients[loop] = client
+        return client
+
+
+def _timeout(read_timeout):
+    if read_timeout is None:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(read_timeout, connect=HTTP_CONNECT_TIMEOUT, pool=ASYNC_HTTP_POOL_TIMEOUT)
+
+
+async def post(url, read_timeout=None, **kwargs):
+    """
+    发送POST请求
+
+    Args:
+        url: 请求地址
+        read_timeout: 读取超时（秒），默认使用HTTP_READ_TIMEOUT
+        **kwargs: 传给httpx的其他参数（json、headers等）
+
+    Returns:
+        httpx.Response（重试耗尽后返回最后一次响应，由调用方raise_for_status）
+    """
+    client = get_client()
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        last = attempt == HTTP_MAX_RETRIES
+        # 与同步客户端一致：读取出错时请求可能已被上游处理（DeepSeek按次计费），不重试
+        response = await client.post(url, timeout=_timeout(read_timeout), **kwargs)
+        if response.status_code not in HTTP_POST_RETRY_STATUS or last:
+            return response
+        # 优先遵循Retry-After，否则指数退避
+        retry_after = response.headers.get('Retry-After', '')
+        await response.aclose()
+        delay = float(retry_after) if retry_after.isdigit() else HTTP_BACKOFF_FACTOR * (2 ** attempt)
+        await asyncio.sleep(delay)
+
+
+def stream(url, read_timeout=None, **kwargs):
+    """
+    发送流式POST请求
+
+    Returns:
+        异步上下文管理器，进入后得到httpx.Response，可用aiter_lines()逐行读取
+    """
+    return get_client().stream('POST', url, timeout=_timeout(read_timeout), **kwargs)
+
+
+async def aclose():
+    """关闭当前事件循环的客户端（ASGI应用关闭时调用）"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_pool_stats():
+    """获取各事件循环连接池的连接数"""
+    stats = []
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        pool = getattr(client._transport, '_pool', None)
+        connections = list(getattr(pool, 'connections', []))
+        stats.append({
+            'connections': len(connections),
+            'idle': sum(1 for conn in connections if conn.is_idle()),
+            'max_connections': ASYNC_HTTP_MAX_CONNECTIONS
+        })
+    return stats
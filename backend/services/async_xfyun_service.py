@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+科大讯飞语音异步服务 - xfyun_service的asyncio版本，供ASGI入口使用
+
+鉴权、请求体、结果解析、TTS缓存、请求合并和熔断与同步版本共用，只有网络读写改为协程。
+整段上传的语音识别需要解码、静音检测和分段识别，在ASGI入口中仍由Flask接口处理（见asgi.py）。
+"""
+
+import time
+import base64
+import asyncio
+import logging
+from services import async_http_client
+from services.http_client import HTTP_CONNECT_TIMEOUT
+from services.tts_cache import tts_cache
+from services.single_flight import tts_flight
+from services.circuit_breaker import xfyun_tts_breaker, xfyun_asr_breaker, CircuitOpenError
+from services.metrics import phase
+from services.xfyun_auth import xfyun_signer
+from services.xfyun_service import (
+    XFYUN_APP_ID, XFYUN_API_KEY, XFYUN_API_SECRET, XFYUN_READ_TIMEOUT,
+    TTS_URL, ASR_WS_URL,
+    tts_request_body, split_sentences,
+    IATTranscript
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _configured():
+    return XFYUN_APP_ID and XFYUN_API_KEY and XFYUN_API_SECRET
+
+
+async def text_to_speech(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
+    """
+    调用科大讯飞TTS接口将文本转换为语音，参数和返回值同xfyun_service.text_to_speech
+    """
+    result = await synthesize_audio(text, voice=voice, speed=speed, volume=volume, pitch=pitch)
+    if not result["success"]:
+        return result
+    with phase('audio'):
+        audio = base64.b64encode(result["data"]).decode('utf-8')
+    return {"success": True, "audio": audio, "cached": result["cached"]}
+
+
+async def synthesize_audio(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
+    """
+    调用科大讯飞TTS接口将文本转换为语音，参数和返回值同xfyun_service.synthesize_audio
+    """
+    # 相同文本和参数的音频直接从缓存返回，不再请求讯飞
+    cache_key = tts_cache.make_key(text, voice, speed, volume, pitch)
+    cached_audio = tts_cache.get(cache_key)
+    if cached_audio is not None:
+        return {"success": True, "data": cached_audio, "cached": True}
+
+    if not _configured():
+        logger.warning("科大讯飞API配置缺失，使用模拟数据")
+        return {"success": False, "error": "科大讯飞API配置缺失"}
+
+    # 相同文本和参数的并发请求合并为一次讯飞调用
+    with phase('xfyun_tts'):
+        return await tts_flight.do_async(cache_key, _synthesize, text, voice, speed, volume, pitch, cache_key)
+
+
+async def _synthesize(text, voice, speed, volume, pitch, cache_key):
+    if not xfyun_tts_breaker.allow():
+        return {"success": False, "error": "讯飞TTS服务暂时不可用（熔断中）"}
+
+    started = time.monotonic()
+    try:
+        url = xfyun_signer.signed_url(TTS_URL, method="GET")
+        with phase('xfyun_tts'):
+            response = await async_http_client.post(
+                url, read_timeout=XFYUN_READ_TIMEOUT, json=tts_request_body(text, voice, speed, volume, pitch)
+            )
+        response.raise_for_status()
+
+        result = response.json()
+        if result["code"] != 0:
+            xfyun_tts_breaker.record(time.monotonic() - started, failed=True)
+            return {"success": False, "error": result["message"]}
+
+        with phase('audio'):
+            audio_data = base64.b64decode(result["data"]["audio"])
+        xfyun_tts_breaker.record(time.monotonic() - started)
+        tts_cache.set(cache_key, audio_data)
+        return {"success": True, "data": audio_data, "cached": False}
+
+    except Exception as e:
+        xfyun_tts_breaker.record(time.monotonic() - started, failed=True)
+        logger.error(f"科大讯飞TTS调用失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+async def text_to_speech_stream(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
+    """
+    分句并发合成语音，按句子顺序逐段返回，参数同text_to_speech
+
+    Yields:
+        (序号, 句子总数, 句子文本, text_to_speech的返回结果)
+    """
+    sentences = split_sentences(text) or [text]
+    tasks = [
+        asyncio.ensure_future(text_to_speech(sentence, voice=voice, speed=speed, volume=volume, pitch=pitch))
+        for sentence in sentences
+    ]
+    try:
+        for index, (sentence, task) in enumerate(zip(sentences, tasks)):
+            yield index, len(sentences), sentence, await task
+    finally:
+        # 客户端中途断开时取消尚未完成的合成任务
+        for task in tasks:
+            task.cancel()
+
+
+class AsyncStreamingASRSession(IATTranscript):
+    """
+    科大讯飞流式听写（IAT）异步会话，接口同xfyun_service.StreamingASRSession
+
+    识别结果在后台任务中接收；on_partial可以是普通函数或协程函数。
+    """
+
+    def __init__(self, language="zh_cn", on_partial=None):
+        """
+        Args:
+            language: 语言，默认为"zh_cn"
+            on_partial: 部分转写结果回调，参数为当前完整文本
+        """
+        super().__init__(language)
+        self.on_partial = on_partial
+        self._connection = None
+        self._reader = None
+        self._buffer = b""
+        self._done = asyncio.Event()
+        self._connect_elapsed = 0.0
+
+    async def open(self):
+        """
+        建立到讯飞的WebSocket连接并启动结果接收任务
+
+        Raises:
+            CircuitOpenError: 讯飞语音识别服务处于熔断状态
+        """
+        import websockets
+
+        if not xfyun_asr_breaker.allow():
+            raise CircuitOpenError("讯飞语音识别服务暂时不可用（熔断中）")
+
+        url = xfyun_signer.signed_url(ASR_WS_URL, method="GET")
+        started = time.monotonic()
+        try:
+            self._connection = await websockets.connect(url, open_timeout=HTTP_CONNECT_TIMEOUT, compression=None)
+        except Exception:
+            xfyun_asr_breaker.record(time.monotonic() - started, failed=True)
+            raise
+        self._connect_elapsed = time.monotonic() - started
+        self._reader = asyncio.ensure_future(self._read_results())
+
+    async def send_audio(self, pcm):
+        """追加一段PCM音频，凑满一帧即发送"""
+        self._buffer += pcm
+        while len(self._buffer) >= self.FRAME_BYTES:
+            frame, self._buffer = self._buffer[:self.FRAME_BYTES], self._buffer[self.FRAME_BYTES:]
+            await self._connection.send(self.next_frame(frame))
+
+    async def finish(self, timeout=XFYUN_READ_TIMEOUT):
+        """
+        发送剩余音频和结束帧，等待最终结果
+
+        Returns:
+            最终识别文本
+        """
+        if self._buffer:
+            await self._connection.send(self.next_frame(self._buffer))
+            self._buffer = b""
+        await self._connection.send(self.next_frame(b"", last=True))
+        try:
+            with phase('xfyun_asr'):
+                await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.text
+
+    async def close(self):
+        """关闭与讯飞的连接"""
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+        if self._reader is not None:
+            self._reader.cancel()
+        self._done.set()
+
+    async def _read_results(self):
+        # 熔断统计以握手耗时计入慢调用，讯飞返回错误码计为失败；本地主动关闭连接不计为失败
+        try:
+            async for message in self._connection:
+                finished, updated = self.handle_message(message)
+                if updated and self.on_partial:
+                    result = self.on_partial(self.text)
+                    if asyncio.iscoroutine(result):
+                        await result
+                if finished:
+                    break
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            xfyun_asr_breaker.record(self._connect_elapsed, failed=self.upstream_failed)
+            self._done.set()
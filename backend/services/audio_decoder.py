@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+音频解码服务 - 把上传的录音流式转换为讯飞听写需要的16kHz 16bit单声道PCM
+
+前端通过AudioWorklet直接上传16kHz PCM（Content-Type: audio/L16;rate=16000），原样透传；
+其他采样率的PCM/WAV在进程内重采样；MediaRecorder录制的WebM/Ogg/MP4等容器交给ffmpeg解码。
+所有路径都按固定大小的块读取和输出，内存占用与录音时长无关。
+"""
+
+import os
+import shutil
+import struct
+import threading
+import subprocess
+
+FFMPEG_PATH = os.environ.get('FFMPEG_PATH', 'ffmpeg')
+AUDIO_DECODE_CHUNK_BYTES = int(os.environ.get('AUDIO_DECODE_CHUNK_BYTES', '32000'))  # 每次读取的字节数，约1秒16kHz PCM
+AUDIO_DECODE_TIMEOUT = float(os.environ.get('AUDIO_DECODE_TIMEOUT', '30'))  # ffmpeg读取一块输出的超时时间（秒）
+
+ASR_SAMPLE_RATE = 16000
+
+# 直接上传PCM时可用的Content-Type，参数rate和channels缺省为16000和1；与讯飞接口一致，采样为小端序
+RAW_PCM_TYPES = ('audio/l16', 'audio/pcm', 'audio/x-raw')
+WAV_TYPES = ('audio/wav', 'audio/x-wav', 'audio/wave', 'audio/vnd.wave')
+
+
+class AudioDecodeError(Exception):
+    """上传的音频无法解码"""
+    pass
+
+
+def parse_content_type(content_type):
+    """
+    拆分Content-Type
+
+    Returns:
+        (小写的MIME类型, 参数字典)
+    """
+    parts = (content_type or '').split(';')
+    params = {}
+    for part in parts[1:]:
+        key, _, value = part.partition('=')
+        if key.strip():
+            params[key.strip().lower()] = value.strip().strip('"')
+    return parts[0].strip().lower(), params
+
+
+class PCMResampler:
+    """
+    流式重采样：16bit PCM（任意采样率和声道数）转为16kHz单声道
+
+    降采样前做一次滑动平均低通，再线性插值；块之间保留少量历史样本，分块处理与整段处理的结果只有舍入误差。
+    """
+
+    def __init__(self, rate, channels=1):
+        import numpy as np  # 首次解码时才加载，不拖慢冷启动
+        self.rate = rate
+        self.channels = channels
+        self._step = rate / ASR_SAMPLE_RATE  # 每个输出样本对应的输入样本数
+        self._window = max(int(round(self._step)), 1)
+        self._history = np.zeros(self._window - 1, dtype=np.float32)  # 滑动平均需要的上一块末尾样本
+        self._tail = np.zeros(0, dtype=np.float32)  # 上一块的最后一个样本，作为插值起点
+        self._position = 0.0  # 下一个输出样本相对_tail起点的位置
+        self._remainder = b''  # 不足一个采样帧的字节
+
+    def process(self, data):
+        """输入一块PCM，返回重采样后的PCM"""
+        import numpy as np
+        data = self._remainder + data
+        frame_bytes = 2 * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        self._remainder = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype='<i2')
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self.rate == ASR_SAMPLE_RATE:
+            return samples.astype('<i2').tobytes() if self.channels > 1 else data[:usable]
+        return self._resample(samples.astype(np.float32))
+
+    def _resample(self, samples):
+        import numpy as np
+        if self._window > 1:
+            padded = np.concatenate([self._history, samples])
+            self._history = padded[len(padded) - (self._window - 1):]
+            cumulative = np.cumsum(np.concatenate([[0.0], padded]))
+            samples = (cumulative[self._window:] - cumulative[:-self._window]) / self._window
+        x = np.concatenate([self._tail, samples])
+        if len(x) < 2:
+            self._tail = x
+            return b''
+        last = len(x) - 1
+        positions = np.arange(self._position, last, self._step)
+        self._position = (positions[-1] + self._step if len(positions) else self._position) - last
+        self._tail = x[last:]
+        out = np.interp(positions, np.arange(len(x)), x)
+        return np.clip(np.round(out), -32768, 32767).astype('<i2').tobytes()
+
+
+class AudioDecoder:
+    """
+    上传音频的流式解码器
+
+    decode()先读取第一块判断格式，不支持时立即抛出AudioDecodeError，否则返回逐块产出PCM的生成器。
+    """
+
+    def __init__(self, ffmpeg=FFMPEG_PATH, chunk_bytes=AUDIO_DECODE_CHUNK_BYTES, timeout=AUDIO_DECODE_TIMEOUT):
+        self.ffmpeg = ffmpeg
+        self.chunk_bytes = chunk_bytes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._counters = {'pcm': 0, 'wav': 0, 'ffmpeg': 0, 'failures': 0, 'bytes_in': 0, 'pcm_bytes': 0}
+
+    def decode(self, stream, content_type=None):
+        """
+        把上传的音频流解码为16kHz 16bit单声道PCM
+
+        Args:
+            stream: 可read(n)的音频流（请求体或上传文件）
+            content_type: 客户端声明的Content-Type，PCM依赖其中的rate和channels参数，容器格式以文件头为准
+
+        Returns:
+            产出PCM数据块的生成器
+
+        Raises:
+            AudioDecodeError: 音频格式不支持或文件头损坏
+        """
+        mimetype, params = parse_content_type(content_type)
+        first = stream.read(self.chunk_bytes)
+        try:
+            if mimetype in RAW_PCM_TYPES:
+                resampler = PCMResampler(int(params.get('rate', ASR_SAMPLE_RATE)), int(params.get('channels', 1)))
+                self._count('pcm')
+                return self._pipeline(self._read(stream, first), resampler)
+            if first[:4] == b'RIFF' and first[8:12] == b'WAVE':
+                chunks, resampler = self._open_wav(stream, first)
+                self._count('wav')
+                return self._pipeline(chunks, resampler)
+            if not first:
+                raise AudioDecodeError("音频为空")
+            if mimetype in WAV_TYPES + ('application/octet-stream', '') and not self._looks_like_container(first):
+                raise AudioDecodeError("无法识别的音频格式")
+            if not shutil.which(self.ffmpeg):
+                raise AudioDecodeError(f"不支持的音频格式（{mimetype or '未知'}），请上传16kHz PCM或WAV")
+            self._count('ffmpeg')
+            return self._ffmpeg(self._read(stream, first))
+        except (AudioDecodeError, ValueError, struct.error) as e:
+            self._count('failures')
+            raise AudioDecodeError(str(e)) from e
+
+    def stats(self):
+        """获取解码统计"""
+        with self._lock:
+            return dict(self._counters)
+
+    def _read(self, stream, first):
+        chunk = first
+        while chunk:
+            self._count('bytes_in', len(chunk))
+            yield chunk
+            chunk = stream.read(self.chunk_bytes)
+
+    def _pipeline(self, chunks, resampler):
+        for chunk in chunks:
+            pcm = resampler.process(chunk)
+            if pcm:
+                self._count('pcm_bytes', len(pcm))
+                yield pcm
+
+    def _open_wav(self, stream, first):
+        # 逐个跳过fmt之外的子块，直到data块；只缓冲文件头部分
+        buffer = first
+        offset = 12
+        fmt = None
+        while True:
+            while len(buffer) < offset + 8:
+                more = stream.read(self.chunk_bytes)
+                if not more:
+                    raise AudioDecodeError("WAV文件头不完整")
+                buffer += more
+            chunk_id, chunk_size = struct.unpack('<4sI', buffer[offset:offset + 8])
+            offset += 8
+            if chunk_id == b'data':
+                break
+            while len(buffer) < offset + chunk_size:
+                more = stream.read(self.chunk_bytes)
+                if not more:
+                    raise AudioDecodeError("WAV文件头不完整")
+                buffer += more
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', buffer[offset:offset + 16])
+            offset += chunk_size + chunk_size % 2
+        if fmt is None:
+            raise AudioDecodeError("WAV文件缺少fmt块")
+        audio_format, channels, rate, _, _, bits = fmt
+        if audio_format not in (1, 0xFFFE) or bits != 16:
+            raise AudioDecodeError("仅支持16bit PCM编码的WAV")
+        return self._read(stream, buffer[offset:]), PCMResampler(rate, channels)
+
+    @staticmethod
+    def _looks_like_container(head):
+        return (
+            head[:4] in (b'\x1aE\xdf\xa3', b'OggS', b'fLaC')
+            or head[4:8] == b'ftyp'
+            or head[:3] == b'ID3'
+            or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2')
+        )
+
+    def _ffmpeg(self, chunks):
+        process = subprocess.Popen(
+            [
+                self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+                '-f', 's16le', '-ar', str(ASR_SAMPLE_RATE), '-ac', '1', 'pipe:1'
+            ],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+
+        def feed():
+            # 上传数据在单独线程中写入ffmpeg，避免与读取输出互相阻塞
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            except (OSError, ValueError):
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        watchdog = None
+        try:
+            while True:
+                watchdog = threading.Timer(self.timeout, process.kill)
+                watchdog.start()
+                pcm = process.stdout.read(self.chunk_bytes)
+                watchdog.cancel()
+                if not pcm:
+                    break
+                self._count('pcm_bytes', len(pcm))
+                yield pcm
+            if process.wait() != 0:
+                self._count('failures')
+                raise AudioDecodeError(f"ffmpeg解码失败，退出码{process.returncode}")
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            writer.join(timeout=1)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+
+# 全局音频解码器实例
+audio_decoder = AudioDecoder()
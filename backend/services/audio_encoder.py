@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+音频编码服务 - 把讯飞返回的16kHz 16bit单声道PCM封装为WAV，或用ffmpeg压缩为Opus/MP3
+
+语音约32KB/秒，Opus 24kbps约3KB/秒。编码结果按PCM内容和格式写入TTS缓存，相同音频只编码一次；
+ffmpeg不可用或编码失败时退回WAV。
+"""
+
+import os
+import shutil
+import struct
+import hashlib
+import threading
+import subprocess
+from services.tts_cache import tts_cache
+
+FFMPEG_PATH = os.environ.get('FFMPEG_PATH', 'ffmpeg')
+# 服务端偏好的格式顺序，客户端Accept头同等接受多种格式时按此顺序选择
+AUDIO_FORMATS = [f.strip() for f in os.environ.get('AUDIO_FORMATS', 'opus,mp3,wav').split(',') if f.strip()]
+AUDIO_OPUS_BITRATE = os.environ.get('AUDIO_OPUS_BITRATE', '24k')
+AUDIO_MP3_BITRATE = os.environ.get('AUDIO_MP3_BITRATE', '32k')
+AUDIO_ENCODE_TIMEOUT = float(os.environ.get('AUDIO_ENCODE_TIMEOUT', '10'))  # 单次编码的超时时间（秒）
+
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+
+# 格式 -> (MIME类型, ffmpeg编码器, 封装格式, 码率)
+FORMATS = {
+    'wav': ('audio/wav', None, None, None),
+    'opus': ('audio/ogg', 'libopus', 'ogg', AUDIO_OPUS_BITRATE),
+    'mp3': ('audio/mpeg', 'libmp3lame', 'mp3', AUDIO_MP3_BITRATE)
+}
+
+
+def wav_header(data_size, sample_rate=PCM_SAMPLE_RATE, channels=1, sample_width=PCM_SAMPLE_WIDTH):
+    """
+    PCM音频的WAV（RIFF）文件头
+
+    与PCM数据分开返回，响应时依次写出，不必把音频复制到新的缓冲区。
+
+    Args:
+        data_size: PCM数据的字节数
+    """
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b'data', data_size
+    )
+
+
+def pcm_duration(pcm_size, sample_rate=PCM_SAMPLE_RATE, sample_width=PCM_SAMPLE_WIDTH):
+    """由采样数计算PCM音频时长（秒）"""
+    return round(pcm_size // sample_width / sample_rate, 3)
+
+
+class AudioEncoder:
+    """
+    PCM音频编码器
+
+    encode()返回(格式, 数据块列表)：WAV为[文件头, PCM]两块，其余格式为编码后的一块。
+    """
+
+    def __init__(self, ffmpeg=FFMPEG_PATH, formats=AUDIO_FORMATS, timeout=AUDIO_ENCODE_TIMEOUT):
+        self.ffmpeg = ffmpeg
+        self.preferred = [f for f in formats if f in FORMATS]
+        self.timeout = timeout
+        self._encoders = None
+        self._lock = threading.Lock()
+        self._counters = {'encoded': 0, 'cache_hits': 0, 'failures': 0, 'pcm_bytes': 0, 'encoded_bytes': 0}
+
+    def formats(self):
+        """本机可用的格式，按服务端偏好排序"""
+        encoders = self._available_encoders()
+        return [f for f in self.preferred if FORMATS[f][1] is None or FORMATS[f][1] in encoders]
+
+    @staticmethod
+    def mimetype(fmt):
+        return FORMATS[fmt][0]
+
+    def encode(self, pcm, fmt):
+        """
+        把PCM编码为指定格式
+
+        Returns:
+            (实际格式, 数据块列表)；编码失败时退回WAV
+        """
+        if fmt == 'wav' or fmt not in self.formats():
+            return 'wav', [wav_header(len(pcm)), pcm]
+
+        key = self._cache_key(pcm, fmt)
+        cached = tts_cache.get(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return fmt, [cached]
+
+        try:
+            encoded = subprocess.run(
+                self._command(fmt), input=pcm, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                timeout=self.timeout, check=True
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            self._count('failures')
+            return 'wav', [wav_header(len(pcm)), pcm]
+        return fmt, [self._store(key, pcm, encoded)]
+
+    async def encode_async(self, pcm, fmt):
+        """encode的asyncio版本，ffmpeg在子进程中运行，不阻塞事件循环"""
+        import asyncio  # 只有ASGI入口使用，同步入口不加载
+        if fmt == 'wav' or fmt not in self.formats():
+            return 'wav', [wav_header(len(pcm)), pcm]
+
+        key = self._cache_key(pcm, fmt)
+        cached = tts_cache.get(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return fmt, [cached]
+
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._command(fmt), stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            encoded, _ = await asyncio.wait_for(process.communicate(pcm), self.timeout)
+            if process.returncode != 0:
+                raise OSError(f"ffmpeg退出码{process.returncode}")
+        except (OSError, asyncio.TimeoutError):
+            if process is not None and process.returncode is None:
+                process.kill()
+            self._count('failures')
+            return 'wav', [wav_header(len(pcm)), pcm]
+        return fmt, [self._store(key, pcm, encoded)]
+
+    def stats(self):
+        """获取编码统计"""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['formats'] = self.formats()
+        stats['compression_ratio'] = round(stats['encoded_bytes'] / stats['pcm_bytes'], 4) if stats['pcm_bytes'] else 0.0
+        return stats
+
+    def _command(self, fmt):
+        _, codec, container, bitrate = FORMATS[fmt]
+        return [
+            self.ffmpeg, '-hide_banner', '-loglevel', 'error',
+            '-f', 's16le', '-ar', str(PCM_SAMPLE_RATE), '-ac', '1', '-i', 'pipe:0',
+            '-c:a', codec, '-b:a', bitrate, '-f', container, 'pipe:1'
+        ]
+
+    @staticmethod
+    def _cache_key(pcm, fmt):
+        digest = hashlib.sha256(pcm)
+        digest.update(f"|{fmt}|{FORMATS[fmt][3]}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _store(self, key, pcm, encoded):
+        tts_cache.set(key, encoded)
+        with self._lock:
+            self._counters['encoded'] += 1
+            self._counters['pcm_bytes'] += len(pcm)
+            self._counters['encoded_bytes'] += len(encoded)
+        return encoded
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _available_encoders(self):
+        # 首次使用时检查一次ffmpeg支持的编码器
+        if self._encoders is None:
+            encoders = set()
+            if shutil.which(self.ffmpeg):
+                try:
+                    output = subprocess.run(
+                        [self.ffmpeg, '-hide_banner', '-encoders'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                        timeout=self.timeout
+                    ).stdout.decode('utf-8', 'replace')
+                    encoders = {codec for _, codec, _, _ in FORMATS.values() if codec and f" {codec} " in output}
+                except (OSError, subprocess.SubprocessError):
+                    pass
+            self._encoders = encoders
+        return self._encoders
+
+
+# 全局音频编码器实例
+audio_encoder = AudioEncoder()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+熔断器 - 按上游统计滑动窗口内的错误率和慢调用率，上游故障时快速失败
+"""
+
+import os
+import time
+import threading
+
+# 熔断器配置
+BREAKER_ENABLED = os.environ.get('BREAKER_ENABLED', 'true').lower() == 'true'
+BREAKER_WINDOW = int(os.environ.get('BREAKER_WINDOW', '30'))  # 滑动窗口长度（秒）
+BREAKER_MIN_REQUESTS = int(os.environ.get('BREAKER_MIN_REQUESTS', '10'))  # 窗口内请求数达到该值才计算比率
+BREAKER_FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', '0.5'))  # 错误率达到该值时熔断
+BREAKER_SLOW_RATE = float(os.environ.get('BREAKER_SLOW_RATE', '0.8'))  # 慢调用率达到该值时熔断
+BREAKER_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', '15'))  # 熔断后多久进入半开状态
+BREAKER_HALF_OPEN_PROBES = int(os.environ.get('BREAKER_HALF_OPEN_PROBES', '2'))  # 半开状态下放行的探测请求数
+
+# 熔断器状态
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求未发出"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    单个上游的熔断器
+
+    按秒分桶统计最近window秒内的请求数、失败数和慢调用数。错误率或慢调用率超过阈值时打开，
+    打开期间allow()直接返回False；open_seconds后进入半开状态，放行少量探测请求，
+    探测全部成功则关闭，任一失败则重新打开。
+    """
+
+    def __init__(self, name, slow_call_seconds, window=BREAKER_WINDOW, min_requests=BREAKER_MIN_REQUESTS,
+                 failure_rate=BREAKER_FAILURE_RATE, slow_rate=BREAKER_SLOW_RATE,
+                 open_seconds=BREAKER_OPEN_SECONDS, half_open_probes=BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._buckets = [[0, 0, 0, 0] for _ in range(window)]  # [秒, 请求数, 失败数, 慢调用数]
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'opened': 0,
+            'rejected': 0
+        }
+
+    def allow(self):
+        """
+        判断是否可以向上游发出请求
+
+        Returns:
+            可以发出时返回True；返回True后调用方必须调用record()
+        """
+        if not BREAKER_ENABLED:
+            return True
+        with self._lock:
+            if self._state == STATE_OPEN:
+                if time.time() - self._opened_at < self.open_seconds:
+                    self._counters['rejected'] += 1
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probes_started = 0
+                self._probes_succeeded = 0
+            if self._state == STATE_HALF_OPEN:
+                if self._probes_started >= self.half_open_probes:
+                    self._counters['rejected'] += 1
+                    return False
+                self._probes_started += 1
+            return True
+
+    def record(self, elapsed, failed=False):
+        """
+        记录一次请求的结果
+
+        Args:
+            elapsed: 请求耗时（秒）
+            failed: 是否失败
+        """
+        if not BREAKER_ENABLED:
+            return
+        slow = elapsed >= self.slow_call_seconds
+        now = int(time.time())
+        with self._lock:
+            bucket = self._buckets[now % self.window]
+            if bucket[0] != now:
+                bucket[:] = [now, 0, 0, 0]
+            bucket[1] += 1
+            bucket[2] += int(failed)
+            bucket[3] += int(slow)
+
+            if self._state == STATE_HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_probes:
+                        self._close()
+            elif self._state == STATE_CLOSED:
+                requests, failures, slow_calls = self._totals()
+                if requests >= self.min_requests and (
+                        failures / requests >= self.failure_rate or slow_calls / requests >= self.slow_rate):
+                    self._open()
+
+    def _totals(self):
+        oldest = int(time.time()) - self.window
+        requests = failures = slow_calls = 0
+        for second, count, failed, slow in self._buckets:
+            if second > oldest:
+                requests += count
+                failures += failed
+                slow_calls += slow
+        return requests, failures, slow_calls
+
+    def _open(self):
+        self._state = STATE_OPEN
+        self._opened_at = time.time()
+        self._counters['opened'] += 1
+
+    def _close(self):
+        self._state = STATE_CLOSED
+        # 关闭后重新开始统计，避免熔断前的失败再次触发熔断
+        self._buckets = [[0, 0, 0, 0] for _ in range(self.window)]
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == STATE_OPEN and time.time() - self._opened_at >= self.open_seconds:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def stats(self):
+        """获取熔断器状态和窗口统计"""
+        state = self.state
+        with self._lock:
+            requests, failures, slow_calls = self._totals()
+            stats = dict(self._counters)
+        stats.update({
+            'state': state,
+            'window_requests': requests,
+            'failure_rate': round(failures / requests, 4) if requests else 0.0,
+            'slow_rate': round(slow_calls / requests, 4) if requests else 0.0,
+            'slow_call_seconds': self.slow_call_seconds
+        })
+        return stats
+
+
+# 各上游的熔断器；慢调用阈值按各接口正常耗时设置
+deepseek_breaker = CircuitBreaker('deepseek', float(os.environ.get('BREAKER_DEEPSEEK_SLOW_SECONDS', '30')))
+xfyun_tts_breaker = CircuitBreaker('xfyun_tts', float(os.environ.get('BREAKER_XFYUN_TTS_SLOW_SECONDS', '8')))
+xfyun_asr_breaker = CircuitBreaker('xfyun_asr', float(os.environ.get('BREAKER_XFYUN_ASR_SLOW_SECONDS', '10')))
+
+
+def get_breaker_stats():
+    """获取所有熔断器的状态"""
+    return {breaker.name: breaker.stats() for breaker in (deepseek_breaker, xfyun_tts_breaker, xfyun_asr_breaker)}
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+对话上下文压缩 - 把面试问答历史控制在固定的token预算内
+"""
+
+import os
+import math
+
+# 上下文配置
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', '1200'))  # 问答历史最多占用的token数
+CONTEXT_KEEP_RECENT = int(os.environ.get('CONTEXT_KEEP_RECENT', '2'))  # 原样保留的最近问答轮数
+OLDER_QUESTION_CHARS = 60  # 较早轮次问题保留的字符数
+OLDER_ANSWER_CHARS = 80  # 较早轮次回答保留的字符数
+MIN_ANSWER_CHARS = 40  # 最近轮次回答在预算不足时最少保留的字符数
+
+# DeepSeek分词器的经验比例：1个中文字符约0.6个token，1个英文字符约0.3个token
+CJK_TOKEN_RATIO = 0.6
+OTHER_TOKEN_RATIO = 0.3
+
+
+def _is_cjk(char):
+    code = ord(char)
+    return (0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF
+            or 0x3000 <= code <= 0x303F or 0xFF00 <= code <= 0xFFEF)
+
+
+def estimate_tokens(text):
+    """
+    本地估算文本的token数，无需调用分词器
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for char in text if _is_cjk(char))
+    return math.ceil(cjk * CJK_TOKEN_RATIO + (len(text) - cjk) * OTHER_TOKEN_RATIO)
+
+
+def truncate(text, max_chars):
+    """截断文本，超出部分以省略号表示"""
+    text = (text or '').strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + '…'
+
+
+def _turn_tokens(turn):
+    return estimate_tokens(turn['question']) + estimate_tokens(turn['answer'])
+
+
+def compact_history(questions, answers, budget=CONTEXT_TOKEN_BUDGET, keep_recent=CONTEXT_KEEP_RECENT):
+    """
+    压缩问答历史
+
+    最近keep_recent轮原样保留，更早的轮次截断为摘要；仍超出预算时从最早的轮次开始丢弃，
+    最后再逐步截短最近轮次的回答。
+
+    Args:
+        questions: 问题列表
+        answers: 回答列表（与问题一一对应）
+        budget: token预算
+        keep_recent: 原样保留的最近轮数
+
+    Returns:
+        (turns, omitted)：turns为[{"index": 题号, "question", "answer", "compacted": 是否经过截断}]，
+        omitted为被丢弃的最早轮数
+    """
+    pairs = list(zip(questions or [], answers or []))
+    recent_start = max(len(pairs) - keep_recent, 0)
+    turns = []
+    for i, (question, answer) in enumerate(pairs):
+        if i < recent_start:
+            turns.append({
+                'index': i + 1,
+                'question': truncate(question, OLDER_QUESTION_CHARS),
+                'answer': truncate(answer, OLDER_ANSWER_CHARS),
+                'compacted': True
+            })
+        else:
+            turns.append({'index': i + 1, 'question': question, 'answer': answer, 'compacted': False})
+
+    total = sum(_turn_tokens(turn) for turn in turns)
+    omitted = 0
+    # 丢弃最早的摘要轮次
+    while total > budget and turns and turns[0]['compacted']:
+        total -= _turn_tokens(turns.pop(0))
+        omitted += 1
+
+    # 逐步截短最近轮次的回答（从最早的开始）
+    for turn in turns:
+        if total <= budget:
+            break
+        excess = total - budget
+        before = _turn_tokens(turn)
+        # 按每个字符至少0.3个token估算需要去掉的字符数
+        keep = max(len(turn['answer']) - math.ceil(excess / OTHER_TOKEN_RATIO), MIN_ANSWER_CHARS)
+        if keep < len(turn['answer']):
+            turn['answer'] = truncate(turn['answer'], keep)
+            turn['compacted'] = True
+            total -= before - _turn_tokens(turn)
+
+    return turns, omitted
@@ -7,14 +7,65 @@ DeepSeek API服务 - 集成DeepSeek API进行面试问题生成和答案评估
 
 import os
 import json
-import requests
-from flask import current_app
+import time
+import logging
+from services import http_client
+from services.context_compactor import compact_history
+from services.single_flight import question_flight, request_key
+from services.circuit_breaker import deepseek_breaker
+from services.metrics import phase
+from services.structured_output import evaluation_parser, StructuredOutputError
+
+logger = logging.getLogger(__name__)
 
 # DeepSeek API配置
 DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY', '2a7e2647-866e-4eb5-9c43-fc288ebc2222')
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = os.environ.get('DEEPSEEK_API_URL', "https://api.deepseek.com/v1/chat/completions")
+DEEPSEEK_READ_TIMEOUT = float(os.environ.get('DEEPSEEK_READ_TIMEOUT', '60'))  # 生成长文本时需要较长的读取超时
+DEEPSEEK_JSON_MODE = os.environ.get('DEEPSEEK_JSON_MODE', 'true').lower() == 'true'  # 评估答案时要求只返回JSON对象，兼容接口不支持response_format时关闭
+
+def request_headers(stream=False):
+    """DeepSeek API请求头"""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
+    }
+    if stream:
+        headers["Accept"] = "text/event-stream"
+    return headers
 
-def deepseek_chat_completion(messages, temperature=0.7, max_tokens=2000):
+def request_payload(messages, temperature=0.7, max_tokens=2000, stream=False, json_mode=False):
+    """DeepSeek API请求体，json_mode时要求模型只输出一个JSON对象（提示词中需要出现"JSON"）"""
+    data = {
+        "model": "deepseek-chat",
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    if stream:
+        data["stream"] = True
+    if json_mode:
+        data["response_format"] = {"type": "json_object"}
+    return data
+
+def parse_stream_line(line):
+    """
+    解析流式响应中的一行SSE数据
+    
+    Returns:
+        (是否结束, 增量文本)，增量文本可能为None
+    """
+    # SSE格式：每个事件以"data: "开头，最后以"data: [DONE]"结束
+    if not line or not line.startswith("data:"):
+        return False, None
+    payload = line[5:].strip()
+    if payload == "[DONE]":
+        return True, None
+    chunk = json.loads(payload)
+    choices = chunk.get("choices") or [{}]
+    return False, choices[0].get("delta", {}).get("content")
+
+def deepseek_chat_completion(messages, temperature=0.7, max_tokens=2000, json_mode=False):
     """
     调用DeepSeek API进行聊天补全
     
@@ -22,33 +73,89 @@ def deepseek_chat_completion(messages, temperature=0.7, max_tokens=2000):
         messages: 消息列表，格式为[{"role": "user", "content": "你好"}]
         temperature: 温度参数，控制随机性
         max_tokens: 最大生成token数
+        json_mode: 是否使用JSON输出模式
         
     Returns:
         API响应的JSON对象
     """
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-    }
+    headers = request_headers()
+    data = request_payload(messages, temperature, max_tokens, json_mode=json_mode)
     
-    data = {
-        "model": "deepseek-chat",
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
+    # 熔断期间直接返回错误，调用方立即使用备用结果
+    if not deepseek_breaker.allow():
+        return {"error": "DeepSeek服务暂时不可用（熔断中）"}
     
+    started = time.monotonic()
     try:
-        response = requests.post(DEEPSEEK_API_URL, headers=headers, json=data)
+        with phase('deepseek'):
+            response = http_client.post(DEEPSEEK_API_URL, read_timeout=DEEPSEEK_READ_TIMEOUT, headers=headers, json=data)
         response.raise_for_status()
-        return response.json()
+        result = response.json()
     except Exception as e:
-        current_app.logger.error(f"DeepSeek API调用失败: {str(e)}")
+        deepseek_breaker.record(time.monotonic() - started, failed=True)
+        logger.error(f"DeepSeek API调用失败: {str(e)}")
         return {"error": str(e)}
+    deepseek_breaker.record(time.monotonic() - started)
+    return result
 
-def generate_interview_question(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+def deepseek_chat_completion_stream(messages, temperature=0.7, max_tokens=2000):
     """
-    生成面试问题
+    以流式方式调用DeepSeek API进行聊天补全
+    
+    Args:
+        messages: 消息列表，格式为[{"role": "user", "content": "你好"}]
+        temperature: 温度参数，控制随机性
+        max_tokens: 最大生成token数
+        
+    Yields:
+        {"token": 增量文本} 或出错时的 {"error": 错误信息}
+    """
+    headers = request_headers(stream=True)
+    data = request_payload(messages, temperature, max_tokens, stream=True)
+    
+    if not deepseek_breaker.allow():
+        yield {"error": "DeepSeek服务暂时不可用（熔断中）"}
+        return
+    
+    # 流式调用以收到响应头的耗时计入慢调用统计，传输中途出错计为失败
+    started = time.monotonic()
+    elapsed = None
+    recorded = False
+    try:
+        with phase('deepseek'):
+            response = http_client.post(DEEPSEEK_API_URL, read_timeout=DEEPSEEK_READ_TIMEOUT, headers=headers, json=data, stream=True)
+        response.raise_for_status()
+        elapsed = time.monotonic() - started
+        # SSE响应头可能不带charset，requests会按ISO-8859-1解码，导致中文乱码
+        response.encoding = "utf-8"
+        lines = response.iter_lines(decode_unicode=True)
+        try:
+            while True:
+                # 只把等待下一行的时间计入上游阶段，不包括调用方处理每个token的时间
+                with phase('deepseek'):
+                    line = next(lines, None)
+                if line is None:
+                    break
+                done, token = parse_stream_line(line)
+                if done:
+                    break
+                if token:
+                    yield {"token": token}
+        finally:
+            response.close()
+    except Exception as e:
+        deepseek_breaker.record(elapsed if elapsed is not None else time.monotonic() - started, failed=True)
+        recorded = True
+        logger.error(f"DeepSeek流式API调用失败: {str(e)}")
+        yield {"error": str(e)}
+    finally:
+        # 调用方提前停止读取（如客户端断开）时也要记录，否则半开状态的探测名额不会释放
+        if not recorded:
+            deepseek_breaker.record(elapsed)
+
+def build_question_messages(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+    """
+    构建生成面试问题的消息列表
     
     Args:
         interview_type: 面试类型（如"软件工程师"）
@@ -59,15 +166,21 @@ def generate_interview_question(interview_type, company, language, previous_ques
         difficulty: 难度级别（1-5）
         
     Returns:
-        生成的问题
+        DeepSeek消息列表
     """
+    # 压缩问答历史，使提示长度不随面试轮数增长
+    turns, omitted = compact_history(previous_questions, previous_answers) if previous_questions and previous_answers else ([], 0)
+    
     # 构建提示
     if language == "zh":
         prompt = f"你是{company}公司的面试官，正在面试一位{interview_type}职位的候选人。"
-        if previous_questions and previous_answers:
-            prompt += "基于候选人之前的回答，请生成下一个面试问题。\n\n"
-            for i, (q, a) in enumerate(zip(previous_questions, previous_answers)):
-                prompt += f"问题{i+1}: {q}\n回答{i+1}: {a}\n\n"
+        if turns:
+            prompt += "基于候选人之前的回答，请生成下一个面试问题，不要重复已经问过的问题。\n\n"
+            if omitted:
+                prompt += f"（省略了更早的{omitted}轮问答）\n\n"
+            for turn in turns:
+                i = turn['index']
+                prompt += f"问题{i}: {turn['question']}\n回答{i}: {turn['answer']}\n\n"
         else:
             prompt += "请生成一个合适的面试问题。"
             
@@ -75,20 +188,44 @@ def generate_interview_question(interview_type, company, language, previous_ques
             prompt += f"\n请生成难度级别为{difficulty}（1-5）的问题。"
     else:
         prompt = f"You are an interviewer from {company}, interviewing a candidate for the {interview_type} position."
-        if previous_questions and previous_answers:
-            prompt += "Based on the candidate's previous answers, please generate the next interview question.\n\n"
-            for i, (q, a) in enumerate(zip(previous_questions, previous_answers)):
-                prompt += f"Question {i+1}: {q}\nAnswer {i+1}: {a}\n\n"
+        if turns:
+            prompt += "Based on the candidate's previous answers, please generate the next interview question without repeating earlier ones.\n\n"
+            if omitted:
+                prompt += f"({omitted} earlier rounds omitted)\n\n"
+            for turn in turns:
+                i = turn['index']
+                prompt += f"Question {i}: {turn['question']}\nAnswer {i}: {turn['answer']}\n\n"
         else:
             prompt += "Please generate an appropriate interview question."
             
         if difficulty:
             prompt += f"\nPlease generate a question with difficulty level {difficulty} (1-5)."
     
-    # 调用DeepSeek API
-    messages = [{"role": "user", "content": prompt}]
-    response = deepseek_chat_completion(messages)
+    return [{"role": "user", "content": prompt}]
+
+def generate_interview_question(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+    """
+    生成面试问题
     
+    Args:
+        interview_type: 面试类型（如"软件工程师"）
+        company: 公司名称
+        language: 语言（"zh"或"en"）
+        previous_questions: 之前的问题列表
+        previous_answers: 之前的回答列表
+        difficulty: 难度级别（1-5）
+        
+    Returns:
+        生成的问题
+    """
+    # 调用DeepSeek API；提示词相同的并发请求（如同一时间开始的同类面试）合并为一次调用
+    messages = build_question_messages(interview_type, company, language, previous_questions, previous_answers, difficulty)
+    with phase('deepseek'):
+        response = question_flight.do(request_key(messages), deepseek_chat_completion, messages)
+    return parse_question_response(response)
+
+def parse_question_response(response):
+    """从DeepSeek响应中提取生成的问题"""
     if "error" in response:
         return {"error": response["error"]}
     
@@ -98,6 +235,16 @@ def generate_interview_question(interview_type, company, language, previous_ques
     except (KeyError, IndexError) as e:
         return {"error": f"解析API响应失败: {str(e)}"}
 
+def stream_interview_question(interview_type, company, language, previous_questions=None, previous_answers=None, difficulty=None):
+    """
+    流式生成面试问题，参数同generate_interview_question
+    
+    Yields:
+        {"token": 增量文本} 或出错时的 {"error": 错误信息}
+    """
+    messages = build_question_messages(interview_type, company, language, previous_questions, previous_answers, difficulty)
+    yield from deepseek_chat_completion_stream(messages)
+
 def evaluate_answer(question, answer, interview_type, language="zh"):
     """
     评估面试回答
@@ -111,6 +258,18 @@ def evaluate_answer(question, answer, interview_type, language="zh"):
     Returns:
         评估结果
     """
+    # 调用DeepSeek API
+    messages = build_evaluation_messages(question, answer, interview_type, language)
+    response = deepseek_chat_completion(messages, json_mode=DEEPSEEK_JSON_MODE)
+    return parse_evaluation_response(response)
+
+def build_evaluation_messages(question, answer, interview_type, language="zh"):
+    """
+    构建评估回答的消息列表，参数同evaluate_answer
+    
+    Returns:
+        DeepSeek消息列表
+    """
     # 构建提示
     if language == "zh":
         prompt = f"""你是一位经验丰富的{interview_type}面试官。请评估以下面试问答：
@@ -159,27 +318,26 @@ Please return the result in JSON format as follows:
 }}
 """
     
-    # 调用DeepSeek API
-    messages = [{"role": "user", "content": prompt}]
-    response = deepseek_chat_completion(messages)
+    return [{"role": "user", "content": prompt}]
+
+def parse_evaluation_response(response):
+    """
+    从DeepSeek响应中解析评估结果
     
+    Returns:
+        字段经过校验和类型转换的评估结果；失败时返回{"error": 错误信息}，原因计入evaluation_parser的统计
+    """
     if "error" in response:
+        evaluation_parser.record_failure("upstream")
         return {"error": response["error"]}
     
     try:
         content = response["choices"][0]["message"]["content"]
-        # 尝试解析JSON
-        try:
-            # 查找JSON内容
-            import re
-            json_match = re.search(r'({[\s\S]*})', content)
-            if json_match:
-                json_str = json_match.group(1)
-                evaluation = json.loads(json_str)
-                return evaluation
-            else:
-                return {"error": "无法从响应中提取JSON"}
-        except json.JSONDecodeError:
-            return {"error": "无法解析评估结果JSON"}
-    except (KeyError, IndexError) as e:
-        return {"error": f"解析API响应失败: {str(e)}"} 
\ No newline at end of file
+    except (KeyError, IndexError, TypeError) as e:
+        evaluation_parser.record_failure("bad_response")
+        return {"error": f"解析API响应失败: {str(e)}"}
+    try:
+        return evaluation_parser.parse(content)
+    except StructuredOutputError as e:
+        logger.warning(f"无法解析评估结果（{e.reason}）: {str(e)}")
+        return {"error": str(e)}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试总体评估 - 在每次提交回答时增量汇总逐题评估结果
+"""
+
+import re
+import math
+
+# 汇总配置
+TOP_ITEMS = 5  # 总体评估中展示的优点/不足条数
+MAX_TRACKED_ITEMS = 50  # 每类最多跟踪的不同条目数，防止会话数据无限增长
+MAX_SUGGESTIONS = 5  # 保留的最近改进建议条数
+
+# 去重时忽略的空白和标点
+_NORMALIZE = re.compile(r'[\s，。！？、；：,.!?;:"\'“”‘’（）()]+')
+
+
+def new_aggregate():
+    """创建空的汇总数据"""
+    return {
+        'count': 0,
+        'score_sum': 0.0,
+        'score_sq_sum': 0.0,
+        'score_min': None,
+        'score_max': None,
+        'strengths': {},   # 归一化文本 -> {"text": 原文, "count": 次数, "last": 最近出现的题号}
+        'weaknesses': {},
+        'by_type': {},     # 问题类型 -> {"count", "score_sum", "score_min", "score_max"}
+        'suggestions': [],
+        'question_ids': [],  # 已并入汇总的题号，同一题重复提交时不再计入
+        'fallback_ids': []   # 只有备用评估、尚未并入汇总的题号
+    }
+
+
+def _normalize(text):
+    return _NORMALIZE.sub('', str(text)).lower()
+
+
+def _track_items(items, values, index):
+    for value in values or []:
+        key = _normalize(value)
+        if not key:
+            continue
+        item = items.get(key)
+        if item is not None:
+            item['count'] += 1
+            item['last'] = index
+        elif len(items) < MAX_TRACKED_ITEMS:
+            items[key] = {'text': str(value).strip(), 'count': 1, 'last': index}
+
+
+def _update_stats(stats, score):
+    stats['count'] += 1
+    stats['score_sum'] += score
+    stats['score_min'] = score if stats['score_min'] is None else min(stats['score_min'], score)
+    stats['score_max'] = score if stats['score_max'] is None else max(stats['score_max'], score)
+
+
+def add_evaluation(aggregate, analysis, question_type='technical', question_id=None):
+    """
+    把一道题的评估结果并入汇总数据（原地修改）
+
+    上游不可用时的备用评估（source为mock）不是真实分数，只记录题号；同一题已并入过的评估不再重复计入。
+
+    Args:
+        aggregate: new_aggregate()创建的汇总数据
+        analysis: /answer返回的评估结果（quality为0-1分数）
+        question_type: 问题类型
+        question_id: 题号
+
+    Returns:
+        是否并入了汇总
+    """
+    # 兼容没有这两个字段的旧会话
+    evaluated = aggregate.setdefault('question_ids', [])
+    fallbacks = aggregate.setdefault('fallback_ids', [])
+    if question_id is not None and question_id in evaluated:
+        return False
+    if analysis.get('source') == 'mock':
+        if question_id not in fallbacks:
+            fallbacks.append(question_id)
+        return False
+    if question_id is not None:
+        evaluated.append(question_id)
+        if question_id in fallbacks:
+            fallbacks.remove(question_id)
+
+    score = float(analysis.get('quality', 0)) * 100
+    _update_stats(aggregate, score)
+    aggregate['score_sq_sum'] += score * score
+
+    index = aggregate['count']
+    _track_items(aggregate['strengths'], analysis.get('strengths'), index)
+    _track_items(aggregate['weaknesses'], analysis.get('weaknesses'), index)
+
+    stats = aggregate['by_type'].setdefault(question_type, {
+        'count': 0,
+        'score_sum': 0.0,
+        'score_min': None,
+        'score_max': None
+    })
+    _update_stats(stats, score)
+
+    feedback = (analysis.get('feedback') or '').strip()
+    if feedback and feedback not in aggregate['suggestions']:
+        aggregate['suggestions'] = (aggregate['suggestions'] + [feedback])[-MAX_SUGGESTIONS:]
+    return True
+
+
+def _ranked(items, limit=TOP_ITEMS):
+    # 出现次数多的在前，次数相同时最近出现的在前
+    ranked = sorted(items.values(), key=lambda item: (-item['count'], -item['last']))
+    return [item['text'] for item in ranked[:limit]]
+
+
+def _summary(mean, language):
+    if language == 'zh':
+        if mean >= 85:
+            return '面试表现优秀，回答全面深入，沟通流畅。'
+        if mean >= 70:
+            return '面试表现良好，基础扎实，部分回答可以更具体、更深入。'
+        if mean >= 50:
+            return '面试表现一般，部分知识点掌握不够牢固，建议有针对性地加强练习。'
+        return '面试表现有待提高，建议系统复习相关知识并多做模拟练习。'
+    if mean >= 85:
+        return 'Excellent performance with thorough, well-structured answers.'
+    if mean >= 70:
+        return 'Good performance with solid fundamentals; some answers could be more specific.'
+    if mean >= 50:
+        return 'Average performance; some topics need more focused practice.'
+    return 'Performance needs improvement; review the fundamentals and keep practicing.'
+
+
+def summarize(aggregate, language='zh'):
+    """
+    根据汇总数据生成总体评估，复杂度与回答数量无关
+
+    Returns:
+        总体评估字典（score、summary、strengths、weaknesses、suggestions以及统计明细）
+    """
+    count = aggregate['count']
+    mean = aggregate['score_sum'] / count
+    variance = max(aggregate['score_sq_sum'] / count - mean * mean, 0.0)
+
+    return {
+        'score': round(mean),
+        'summary': _summary(mean, language),
+        'strengths': _ranked(aggregate['strengths']),
+        'weaknesses': _ranked(aggregate['weaknesses']),
+        'suggestions': ' '.join(aggregate['suggestions']),
+        'statistics': {
+            'answered': count,
+            'mean': round(mean, 1),
+            'min': round(aggregate['score_min'], 1),
+            'max': round(aggregate['score_max'], 1),
+            'stddev': round(math.sqrt(variance), 1),
+            'unevaluated': len(aggregate.get('fallback_ids', []))  # 只有备用评估、未计入分数的回答数
+        },
+        'by_type': {
+            question_type: {
+                'answered': stats['count'],
+                'mean': round(stats['score_sum'] / stats['count'], 1),
+                'min': round(stats['score_min'], 1),
+                'max': round(stats['score_max'], 1)
+            }
+            for question_type, stats in aggregate['by_type'].items()
+        }
+    }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+上游HTTP客户端 - 为DeepSeek和科大讯飞调用提供共享的长连接池
+
+requests和urllib3在第一次调用上游时才导入，只导入本模块（如健康检查读取统计）不会加载它们。
+"""
+
+import os
+import threading
+
+# 连接池配置
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))  # 缓存的主机连接池数量
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '20'))  # 每个主机的最大连接数
+HTTP_POOL_BLOCK = os.environ.get('HTTP_POOL_BLOCK', 'true').lower() == 'true'  # 连接耗尽时等待而不是新建
+
+# 超时配置（秒）
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '30'))
+
+# 重试配置
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '2'))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', '0.3'))
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+# POST（DeepSeek每次生成都计费）只在连接失败和上游明确未处理请求时重试，读超时后不重试
+HTTP_POST_RETRY_STATUS = (429, 503)
+
+# 连接池统计（按主机）
+_stats = {}
+_stats_lock = threading.Lock()
+
+# 共享会话（按进程创建，gunicorn fork之后重新初始化）
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _record(host, field, amount=1):
+    """累加某个主机的连接池统计项"""
+    with _stats_lock:
+        stats = _stats.setdefault(host, {
+            'requests': 0,
+            'new_connections': 0,
+            'waits': 0
+        })
+        stats[field] += amount
+
+
+class _StatsPoolMixin:
+    """记录连接复用、新建连接和等待次数的连接池混入类"""
+
+    def _get_conn(self, timeout=None):
+        # 队列为空说明所有连接都被占用，阻塞模式下需要等待归还
+        if self.pool is not None and self.pool.empty():
+            _record(self.host, 'waits')
+        conn = super()._get_conn(timeout=timeout)
+        _record(self.host, 'requests')
+        return conn
+
+    def _new_conn(self):
+        _record(self.host, 'new_connections')
+        return super()._new_conn()
+
+
+def _create_session():
+    """创建带连接池、重试和退避策略的会话"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class StatsHTTPConnectionPool(_StatsPoolMixin, HTTPConnectionPool):
+        pass
+
+    class StatsHTTPSConnectionPool(_StatsPoolMixin, HTTPSConnectionPool):
+        pass
+
+    class PooledHTTPAdapter(HTTPAdapter):
+        """使用带统计功能连接池的HTTPAdapter"""
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': StatsHTTPConnectionPool,
+                'https': StatsHTTPSConnectionPool
+            }
+
+    class UpstreamRetry(Retry):
+        """GET按HTTP_RETRY_STATUS重试，POST只按HTTP_POST_RETRY_STATUS重试"""
+
+        def is_retry(self, method, status_code, has_retry_after=False):
+            if method and method.upper() == 'POST':
+                return status_code in HTTP_POST_RETRY_STATUS
+            return super().is_retry(method, status_code, has_retry_after)
+
+    retry = UpstreamRetry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS,
+        # 读取出错时请求可能已被上游处理，只重试GET；连接失败时请求尚未发出，任何方法都会重试
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False  # 重试耗尽后返回最后一次响应，由调用方raise_for_status
+    )
+    adapter = PooledHTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """
+    获取当前进程共享的HTTP会话
+
+    会话在Flask请求和gunicorn工作线程之间复用；fork出的子进程会重新创建，
+    避免与父进程共享socket。
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _session_pid = pid
+    return _session
+
+
+def post(url, read_timeout=None, **kwargs):
+    """
+    通过共享连接池发送POST请求
+
+    Args:
+        url: 请求地址
+        read_timeout: 读取超时（秒），默认为HTTP_READ_TIMEOUT
+        **kwargs: 透传给requests的参数（json、headers等）
+
+    Returns:
+        requests.Response对象
+    """
+    timeout = (HTTP_CONNECT_TIMEOUT, read_timeout or HTTP_READ_TIMEOUT)
+    return get_session().post(url, timeout=timeout, **kwargs)
+
+
+def get_pool_stats():
+    """
+    获取各上游主机的连接池统计
+
+    Returns:
+        {host: {"requests": 借出连接次数, "hits": 复用连接次数,
+                "new_connections": 新建连接次数, "waits": 等待空闲连接次数}}
+    """
+    with _stats_lock:
+        result = {}
+        for host, stats in _stats.items():
+            item = dict(stats)
+            item['hits'] = max(item['requests'] - item['new_connections'], 0)
+            result[host] = item
+        return result
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+后台任务队列 - 进程内的有界优先级队列和工作线程池，无需外部消息中间件
+"""
+
+import os
+import time
+import uuid
+import heapq
+import threading
+
+# 任务队列配置
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))  # 工作线程数
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '100'))  # 最多排队的任务数，超出后拒绝提交
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', '600'))  # 已完成任务的结果保留时间（秒）
+
+# 任务优先级，数值越小越先执行
+PRIORITY_INTERACTIVE = 0  # 进行中的面试，候选人正在等待结果
+PRIORITY_BACKGROUND = 1   # 无人等待的后台任务
+
+# 任务的终止状态
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+
+def new_job_id():
+    """生成任务ID"""
+    return f"job_{uuid.uuid4().hex}"
+
+
+class QueueFullError(Exception):
+    """队列已满，调用方应稍后重试"""
+    pass
+
+
+class JobQueue:
+    """
+    有界优先级任务队列
+
+    任务在工作线程中执行，不依赖Web框架；队列满时submit抛出QueueFullError实现背压。
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._heap = []  # (priority, 序号, job_id)，可能残留已取消的任务
+        self._pending = 0  # 仍在排队（未取消）的任务数，用于背压判断
+        self._jobs = {}  # job_id -> 任务信息
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._counters = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0
+        }
+
+    def submit(self, fn, *args, priority=PRIORITY_INTERACTIVE, job_id=None, **kwargs):
+        """
+        提交任务
+
+        Args:
+            fn: 任务函数，返回值作为任务结果
+            priority: 任务优先级
+            job_id: 任务ID，默认自动生成
+
+        Returns:
+            任务ID
+
+        Raises:
+            QueueFullError: 排队任务数已达上限
+        """
+        job_id = job_id or new_job_id()
+        with self._cond:
+            self._ensure_workers()
+            if self._pending >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise QueueFullError("任务队列已满")
+            self._compact_heap()
+            self._seq += 1
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+                'call': (fn, args, kwargs)
+            }
+            heapq.heappush(self._heap, (priority, self._seq, job_id))
+            self._pending += 1
+            self._counters['submitted'] += 1
+            self._cond.notify_all()
+        return job_id
+
+    def get(self, job_id):
+        """
+        查询任务状态
+
+        Returns:
+            {"job_id", "status", "result", "error"}，任务不存在时返回None
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def cancel(self, job_id):
+        """
+        取消尚未开始执行的任务
+
+        Returns:
+            是否取消成功（任务已开始或已结束时返回False）
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return False
+            job.pop('call', None)
+            job.update(status='cancelled', finished_at=time.time())
+            self._pending -= 1
+            self._counters['cancelled'] += 1
+            self._cond.notify_all()
+            return True
+
+    def wait(self, job_id, timeout=None):
+        """等待任务完成，返回任务状态（超时后返回当前状态）"""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in FINISHED_STATUSES:
+                    return self._snapshot(job) if job else None
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return self._snapshot(job)
+                self._cond.wait(remaining)
+
+    def stats(self):
+        """获取队列统计"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats['pending'] = self._pending
+            stats['running'] = sum(1 for job in self._jobs.values() if job['status'] == 'running')
+            stats['workers'] = self.workers
+            return stats
+
+    @staticmethod
+    def _snapshot(job):
+        return {
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'result': job['result'],
+            'error': job['error']
+        }
+
+    def _ensure_workers(self):
+        # 工作线程在首次提交时启动；gunicorn fork出的子进程需要重新启动
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] != 'queued':
+                    # 已取消的任务直接跳过
+                    continue
+                job['status'] = 'running'
+                self._pending -= 1
+                fn, args, kwargs = job.pop('call')
+
+            try:
+                result = fn(*args, **kwargs)
+                status, error = 'done', None
+            except Exception as e:
+                result, status, error = None, 'failed', str(e)
+
+            with self._cond:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._counters['completed' if status == 'done' else 'failed'] += 1
+                self._purge_finished()
+                self._cond.notify_all()
+
+    def _compact_heap(self):
+        # 已取消的任务留在堆中等工作线程跳过；工作线程都忙时它们会堆积，超过上限后一次性清理
+        if len(self._heap) - self._pending < self.max_pending:
+            return
+        self._heap = [entry for entry in self._heap
+                      if self._jobs.get(entry[2], {}).get('status') == 'queued']
+        heapq.heapify(self._heap)
+
+    def _purge_finished(self):
+        expired_before = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < expired_before]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# 答案评估任务队列
+evaluation_queue = JobQueue()
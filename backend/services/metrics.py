@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+指标服务 - 请求耗时分阶段统计，以Prometheus文本格式从/api/metrics导出
+
+每个请求的耗时拆分为本地处理（local）、等待上游（deepseek、xfyun_tts、xfyun_asr）、JSON序列化（serialize）
+和音频编解码（audio）。服务代码用 `with phase('deepseek'):` 标记阶段，嵌套的阶段只计入最内层，
+同名阶段嵌套时只计外层（如请求合并的等待方和执行方），local为总耗时减去其余阶段。
+
+热路径上只有perf_counter和一次加锁的分桶计数；缓存、队列等状态在抓取时才从各服务的stats()读取。
+阶段通过contextvars传递，线程和协程中都可以使用；请求之外（预取、题库补充线程）的上游等待只计入上游直方图。
+"""
+
+import os
+import time
+import bisect
+import threading
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_PREFIX = 'smarthr'
+
+# 耗时直方图的分桶上界（秒），覆盖本地毫秒级处理到LLM数十秒的生成
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 计入上游等待的阶段
+UPSTREAM_PHASES = ('deepseek', 'xfyun_tts', 'xfyun_asr')
+
+_request = ContextVar('metrics_request', default=None)
+_frame = ContextVar('metrics_frame', default=None)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """按标签分组的累积直方图"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """记录一次观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bucket_names = self.labelnames + ('le',)
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, labels + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """按标签分组的计数器"""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """计数加amount"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """
+    抓取时读取的瞬时值
+
+    collect返回单个数值，或(标签值元组, 数值)列表。
+    """
+
+    def __init__(self, name, help, collect, labelnames=()):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.collect()
+        except Exception as e:
+            return lines + [f"# {self.name} 读取失败: {_escape(e)}"]
+        if not isinstance(values, list):
+            values = [((), values)]
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self, prefix=METRICS_PREFIX):
+        self.prefix = prefix
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(f"{self.prefix}_{name}", help, labelnames, buckets))
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(f"{self.prefix}_{name}", help, labelnames))
+
+    def gauge(self, name, help, collect, labelnames=()):
+        return self._register(Gauge(f"{self.prefix}_{name}", help, collect, labelnames))
+
+    def render(self):
+        """以Prometheus文本格式导出所有指标"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', '接口总耗时', ('route', 'method', 'status')
+)
+request_phase = registry.histogram(
+    'http_request_phase_seconds', '接口耗时按阶段拆分（local为本地处理）', ('route', 'phase')
+)
+upstream_wait = registry.histogram(
+    'upstream_wait_seconds', '等待上游的耗时（含请求合并的等待方）', ('upstream',)
+)
+fallback_responses = registry.counter(
+    'fallback_responses_total', '上游不可用时返回备用数据（source为mock）的次数', ('kind',)
+)
+structured_output_results = registry.counter(
+    'structured_output_total', '模型结构化输出的解析结果（ok、repaired、failed）', ('schema', 'result')
+)
+structured_output_repairs = registry.counter(
+    'structured_output_repairs_total', '结构化输出解析时的修复和类型转换次数', ('schema', 'repair')
+)
+structured_output_failures = registry.counter(
+    'structured_output_failures_total', '结构化输出解析失败的次数（按原因）', ('schema', 'reason')
+)
+_in_progress = [0]
+_in_progress_lock = threading.Lock()
+registry.gauge('http_requests_in_progress', '正在处理的请求数', lambda: _in_progress[0])
+
+
+class phase:
+    """
+    标记一段代码所属的耗时阶段
+
+    用法：
+        with phase('deepseek'):
+            response = http_client.post(...)
+    """
+
+    __slots__ = ('name', 'parent', 'started', 'children', 'token')
+
+    def __init__(self, name):
+        self.name = name
+        self.token = None
+
+    def __enter__(self):
+        if not METRICS_ENABLED:
+            return self
+        parent = node = _frame.get()
+        while node is not None:
+            if node.name == self.name:
+                # 同名阶段嵌套时只计外层
+                return self
+            node = node.parent
+        self.parent = parent
+        self.children = 0.0
+        self.started = time.perf_counter()
+        self.token = _frame.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.token is None:
+            return False
+        elapsed = time.perf_counter() - self.started
+        _frame.reset(self.token)
+        self.token = None
+        if self.parent is not None:
+            self.parent.children += elapsed
+        phases = _request.get()
+        if phases is not None:
+            phases[self.name] = phases.get(self.name, 0.0) + elapsed - self.children
+        if self.name in UPSTREAM_PHASES:
+            upstream_wait.observe(elapsed, self.name)
+        return False
+
+
+def count_fallback(kind):
+    """记录一次备用数据响应，kind为question、evaluation、tts、asr或summary"""
+    if METRICS_ENABLED:
+        fallback_responses.inc(kind)
+
+
+def count_structured_output(schema, result, repairs=(), reason=None):
+    """记录一次结构化输出解析，result为ok、repaired或failed，失败时reason为原因"""
+    if not METRICS_ENABLED:
+        return
+    structured_output_results.inc(schema, result)
+    for repair in repairs:
+        structured_output_repairs.inc(schema, repair)
+    if reason:
+        structured_output_failures.inc(schema, reason)
+
+
+def start_request():
+    """
+    请求开始时调用
+
+    Returns:
+        本次请求的阶段耗时字典，传给finish_request
+    """
+    if not METRICS_ENABLED:
+        return None
+    with _in_progress_lock:
+        _in_progress[0] += 1
+    phases = {'_started': time.perf_counter()}
+    _request.set(phases)
+    return phases
+
+
+def finish_request(phases, route, method, status):
+    """
+    请求结束时调用，记录总耗时和各阶段耗时
+
+    Args:
+        phases: start_request的返回值
+        route: 路由规则（而不是实际路径，避免标签基数过大）
+    """
+    if phases is None:
+        return
+    # 流式响应可能在其他线程中结束，这里只清空当前上下文而不reset
+    _request.set(None)
+    with _in_progress_lock:
+        _in_progress[0] -= 1
+    total = time.perf_counter() - phases.pop('_started')
+    request_duration.observe(total, route, method, str(status))
+    local = total
+    for name, seconds in list(phases.items()):
+        request_phase.observe(seconds, route, name)
+        local -= seconds
+    request_phase.observe(max(local, 0.0), route, 'local')
+
+
+def init_app(app):
+    """
+    为Flask应用注册请求计时钩子，并把JSON序列化计入serialize阶段
+
+    流式响应（stream_with_context）在响应体发送完毕后才结束计时。
+    """
+    from flask import request, g
+    from flask.json.provider import DefaultJSONProvider
+
+    class TimedJSONProvider(DefaultJSONProvider):
+        def response(self, *args, **kwargs):
+            with phase('serialize'):
+                return super().response(*args, **kwargs)
+
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_metrics():
+        g.metrics_phases = start_request()
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_metrics(exc):
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = 500 if exc is not None else g.get('metrics_status', 500)
+        finish_request(g.pop('metrics_phases', None), rule, request.method, status)
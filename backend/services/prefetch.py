@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+下一题预取 - 提交回答时在后台根据这次回答提前生成下一个问题，与答案评估并行，评估完成时通常已经准备好
+
+问题文本生成后立即写入会话，问题语音作为单独的任务预热；取题时不等待进行中的预取，没有准备好就使用题库或实时生成。
+"""
+
+import os
+import json
+import time
+import threading
+from services.job_queue import JobQueue, QueueFullError, new_job_id, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from services.session_store import session_store
+from services.xfyun_service import text_to_speech_stream
+
+# 预取配置
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'true').lower() == 'true'
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '2'))
+PREFETCH_QUEUE_SIZE = int(os.environ.get('PREFETCH_QUEUE_SIZE', '50'))
+PREFETCH_TTL = int(os.environ.get('PREFETCH_TTL', '600'))  # 预取结果的有效期（秒）
+
+
+class QuestionPrefetcher:
+    """
+    按会话预取下一题
+
+    预取结果保存在会话的prefetched槽位中，任何工作进程处理/question时都可以直接使用；
+    参数或面试进度不匹配（之后又提交了回答，或下一题已经实时生成并下发）、过期或被新预取覆盖的结果计为浪费，
+    未开始就被取消的任务计为取消，取题时仍在生成的计为未就绪。
+    """
+
+    def __init__(self, store=session_store, workers=PREFETCH_WORKERS, ttl=PREFETCH_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._queue = JobQueue(workers=workers, max_pending=PREFETCH_QUEUE_SIZE, result_ttl=60)
+        self._inflight = {}  # interview_id -> 本进程中进行中的预取任务ID
+        self._lock = threading.Lock()
+        self._counters = {
+            'scheduled': 0,
+            'hits': 0,
+            'misses': 0,
+            'not_ready': 0,
+            'wasted': 0,
+            'cancelled': 0,
+            'rejected': 0
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _key(params, position):
+        return json.dumps(list(params) + list(position), ensure_ascii=False)
+
+    def schedule(self, interview_id, params, position, generate):
+        """
+        提交预取任务，替换该会话之前的预取
+
+        Args:
+            interview_id: 面试ID
+            params: 生成问题的参数（面试类型、公司、语言），用于判断预取结果是否可用
+            position: 预取结果对应的面试进度(回答数, 问题数)，取题时进度不同则预取结果作废
+            generate: 生成问题的函数，返回问题字典，失败时返回None
+        """
+        if not PREFETCH_ENABLED:
+            return
+        self.cancel(interview_id)
+        job_id = new_job_id()
+        with self._lock:
+            self._inflight[interview_id] = job_id
+        try:
+            self._queue.submit(
+                self._run, interview_id, self._key(params, position), generate, job_id,
+                # 候选人很快就会取下一题，生成排在语音预热之前
+                priority=PRIORITY_INTERACTIVE,
+                job_id=job_id
+            )
+        except QueueFullError:
+            # 队列已满时放弃预取，/question退回到实时生成
+            with self._lock:
+                self._inflight.pop(interview_id, None)
+            self._count('rejected')
+            return
+        self._count('scheduled')
+
+    def take(self, interview_id, params, position):
+        """
+        取出预取好的问题，参数同schedule
+
+        不等待进行中的预取：调用方改用题库或实时生成，本进程中仍在生成的预取随之取消，结果作废。
+
+        Returns:
+            问题字典，没有可用的预取结果时返回None
+        """
+        if not PREFETCH_ENABLED:
+            return None
+        key = self._key(params, position)
+        taken = {}
+
+        def pop_slot(session):
+            taken['slot'] = session.pop('prefetched', None)
+
+        self.store.update(interview_id, pop_slot)
+        slot = taken.get('slot')
+        if slot is None:
+            with self._lock:
+                running = interview_id in self._inflight
+            if running:
+                self._count('not_ready')
+                self.cancel(interview_id)
+            self._count('misses')
+            return None
+        if slot['key'] != key or slot['created_at'] + self.ttl < time.time():
+            self._count('wasted')
+            self._count('misses')
+            return None
+        self._count('hits')
+        return slot['question']
+
+    def cancel(self, interview_id):
+        """取消该会话进行中的预取"""
+        with self._lock:
+            job_id = self._inflight.pop(interview_id, None)
+        if job_id is not None and self._queue.cancel(job_id):
+            self._count('cancelled')
+
+    def stats(self):
+        """获取预取统计"""
+        with self._lock:
+            stats = dict(self._counters)
+        served = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / served, 4) if served else 0.0
+        stats['queue'] = self._queue.stats()
+        return stats
+
+    def _is_current(self, interview_id, job_id):
+        with self._lock:
+            return self._inflight.get(interview_id) == job_id
+
+    def _run(self, interview_id, key, generate, job_id):
+        question = generate()
+        if question is None:
+            return None
+
+        if not self._is_current(interview_id, job_id):
+            # 预取已被取消（面试结束、取题时未就绪或已被新的预取替换），结果作废
+            self._count('wasted')
+            return None
+
+        stale = {'replaced': False}
+
+        def put_slot(session):
+            if session.get('prefetched') is not None:
+                # 之前的预取结果没有被使用
+                stale['replaced'] = True
+            session['prefetched'] = {
+                'question': question,
+                'key': key,
+                'created_at': time.time()
+            }
+
+        self.store.update(interview_id, put_slot)
+        if stale['replaced']:
+            self._count('wasted')
+        with self._lock:
+            if self._inflight.get(interview_id) == job_id:
+                del self._inflight[interview_id]
+
+        # 问题已可取用，再单独预热问题语音，/tts/stream按句子命中TTS缓存
+        try:
+            self._queue.submit(self._warm_speech, question['content'], priority=PRIORITY_BACKGROUND)
+        except QueueFullError:
+            pass
+        return question
+
+    @staticmethod
+    def _warm_speech(text):
+        for _ in text_to_speech_stream(text):
+            pass
+
+
+# 进程内共享的预取器
+question_prefetcher = QuestionPrefetcher()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试题库 - 按（面试类型, 语言, 难度）预先生成问题，后台线程按低水位补充
+"""
+
+import os
+import time
+import uuid
+import random
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from services.question_dedup import question_deduplicator, signature
+
+# 题库配置
+BANK_DB_PATH = os.environ.get('BANK_DB_PATH', os.path.join(tempfile.gettempdir(), 'smarthr_question_bank.db'))
+BANK_REFILL_ENABLED = os.environ.get('BANK_REFILL_ENABLED', 'true').lower() == 'true'
+BANK_LANGUAGES = os.environ.get('BANK_LANGUAGES', 'zh,en').split(',')
+BANK_DIFFICULTIES = [int(d) for d in os.environ.get('BANK_DIFFICULTIES', '3').split(',')]
+BANK_LOW_WATERMARK = int(os.environ.get('BANK_LOW_WATERMARK', '10'))  # 可用题目少于该值时补充
+BANK_TARGET_SIZE = int(os.environ.get('BANK_TARGET_SIZE', '30'))  # 补充到的目标数量
+BANK_MAX_SERVES = int(os.environ.get('BANK_MAX_SERVES', '20'))  # 每道题最多下发次数，超过后退役以保持多样性
+BANK_REFILL_INTERVAL = int(os.environ.get('BANK_REFILL_INTERVAL', '60'))  # 补充检查间隔（秒）
+BANK_REFILL_BATCH = int(os.environ.get('BANK_REFILL_BATCH', '10'))  # 每轮最多生成的题目数
+
+# 补充任务租约，保证多个工作进程中只有一个在生成题目
+LEASE_NAME = 'refill'
+
+
+class QuestionBank:
+    """
+    SQLite题库
+
+    按桶(面试类型, 语言, 难度)和ID建立联合索引，取题为一次索引查找；
+    会话记录已下发的题目ID，保证同一场面试不重复。
+    """
+
+    def __init__(self, path=BANK_DB_PATH, max_serves=BANK_MAX_SERVES):
+        self.path = path
+        self.max_serves = max_serves
+        self._local = threading.local()
+        self._owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._refill_args = None
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'generated': 0,
+            'duplicates': 0,
+            'near_duplicates': 0,
+            'purged': 0,
+            'refill_errors': 0
+        }
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "interview_type TEXT NOT NULL, language TEXT NOT NULL, difficulty INTEGER NOT NULL, "
+            "content TEXT NOT NULL, content_hash TEXT NOT NULL UNIQUE, "
+            "served INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_questions_bucket "
+            "ON questions (interview_type, language, difficulty, id)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        pid = os.getpid()
+        if conn is None or getattr(self._local, 'pid', None) != pid:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def take(self, interview_type, language, difficulty, exclude_ids=()):
+        """
+        从题库中取一道题
+
+        从桶内随机位置开始按ID顺序查找第一道未退役且本场面试未出现过的题目。
+        取题不计入下发次数，调用方确定下发后调用mark_served。
+
+        Args:
+            interview_type: 面试类型
+            language: 语言
+            difficulty: 难度
+            exclude_ids: 本场面试已下发过的题库ID
+
+        Returns:
+            {"bank_id", "content", "difficulty"}，桶内没有可用题目时返回None
+        """
+        self._ensure_refill()
+        conn = self._connect()
+        bucket = (interview_type, language, difficulty)
+        bounds = conn.execute(
+            "SELECT MIN(id), MAX(id) FROM questions WHERE interview_type = ? AND language = ? AND difficulty = ?",
+            bucket
+        ).fetchone()
+        if bounds[0] is None:
+            self._count('misses')
+            return None
+
+        exclude = list(exclude_ids)
+        placeholders = ','.join('?' * len(exclude))
+        exclude_clause = f" AND id NOT IN ({placeholders})" if exclude else ''
+        query = (
+            "SELECT id, content FROM questions "
+            "WHERE interview_type = ? AND language = ? AND difficulty = ? AND id >= ? AND served < ?"
+            f"{exclude_clause} ORDER BY id LIMIT 1"
+        )
+        # 随机起点让同时开始面试的候选人拿到不同的题目，找不到时从头再找一次
+        start = random.randint(bounds[0], bounds[1])
+        row = None
+        for lower in (start, bounds[0]):
+            row = conn.execute(query, (*bucket, lower, self.max_serves, *exclude)).fetchone()
+            if row is not None:
+                break
+        if row is None:
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return {'bank_id': row[0], 'content': row[1], 'difficulty': difficulty}
+
+    def mark_served(self, bank_id):
+        """记录一道题被下发，达到max_serves次后退役"""
+        self._connect().execute("UPDATE questions SET served = served + 1 WHERE id = ?", (bank_id,))
+
+    def add(self, interview_type, language, difficulty, content):
+        """
+        加入一道题，内容重复时忽略
+
+        Returns:
+            是否加入成功
+        """
+        content = content.strip()
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO questions "
+            "(interview_type, language, difficulty, content, content_hash, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (interview_type, language, difficulty, content, content_hash, time.time())
+        )
+        if cursor.rowcount:
+            self._count('generated')
+            return True
+        self._count('duplicates')
+        return False
+
+    def available(self, interview_type, language, difficulty):
+        """桶内尚未退役的题目数"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM questions "
+            "WHERE interview_type = ? AND language = ? AND difficulty = ? AND served < ?",
+            (interview_type, language, difficulty, self.max_serves)
+        ).fetchone()
+        return row[0]
+
+    def purge_retired(self):
+        """
+        删除已退役的题目，避免表和取题时的扫描范围无限增长
+
+        ID自增不复用，会话中记录的已下发ID不会指向新题。
+
+        Returns:
+            删除的题目数
+        """
+        cursor = self._connect().execute("DELETE FROM questions WHERE served >= ?", (self.max_serves,))
+        if cursor.rowcount:
+            self._count('purged', cursor.rowcount)
+        return cursor.rowcount
+
+    def _bucket_index(self, bucket):
+        # 桶内未退役题目的MinHash索引，补充的新题与它们近似重复时丢弃
+        rows = self._connect().execute(
+            "SELECT content FROM questions "
+            "WHERE interview_type = ? AND language = ? AND difficulty = ? AND served < ?",
+            (*bucket, self.max_serves)
+        ).fetchall()
+        return question_deduplicator.build_index([row[0] for row in rows], BANK_TARGET_SIZE + BANK_REFILL_BATCH)
+
+    def refill(self, buckets, generate, batch=BANK_REFILL_BATCH):
+        """
+        删除已退役的题目，检查所有桶，把低于低水位的桶补充到目标数量
+
+        新题与桶内已有题目近似重复时丢弃，不计入题库。
+
+        Args:
+            buckets: [(面试类型, 语言, 难度)]
+            generate: 生成函数，参数为(面试类型, 语言, 难度)，返回问题文本，失败时返回None
+            batch: 本轮最多生成的题目数
+
+        Returns:
+            本轮生成的题目数
+        """
+        self.purge_retired()
+        generated = 0
+        for bucket in buckets:
+            available = self.available(*bucket)
+            if available >= BANK_LOW_WATERMARK:
+                continue
+            index = self._bucket_index(bucket)
+            for _ in range(BANK_TARGET_SIZE - available):
+                if generated >= batch:
+                    return generated
+                content = generate(*bucket)
+                generated += 1
+                if not content:
+                    self._count('refill_errors')
+                    continue
+                if question_deduplicator.is_duplicate(index, content):
+                    self._count('near_duplicates')
+                    continue
+                sig = signature(content) if self.add(*bucket, content) and index is not None else None
+                if sig is not None:
+                    index.add(sig)
+        return generated
+
+    def _acquire_lease(self, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (LEASE_NAME,)).fetchone()
+            if row is not None and row[0] != self._owner and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                (LEASE_NAME, self._owner, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def start_refill(self, buckets, generate, interval=BANK_REFILL_INTERVAL):
+        """
+        启动后台补充线程（每个进程一个，通过租约保证同一时间只有一个进程在生成）
+
+        Args:
+            buckets: [(面试类型, 语言, 难度)]
+            generate: 生成函数，见refill
+            interval: 检查间隔（秒）
+        """
+        if not BANK_REFILL_ENABLED:
+            return
+        self._refill_args = (buckets, generate, interval)
+        self._ensure_refill()
+
+    def _ensure_refill(self):
+        # gunicorn fork出的子进程需要重新启动补充线程
+        if self._refill_args is None:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        buckets, generate, interval = self._refill_args
+
+        def run():
+            while True:
+                try:
+                    if self._acquire_lease(interval * 3):
+                        self.refill(buckets, generate)
+                except Exception as e:
+                    self._count('refill_errors')
+                    print(f"题库补充失败: {str(e)}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=run, name='question-bank-refill', daemon=True)
+        self._thread.start()
+
+    def stats(self):
+        """获取题库统计"""
+        rows = self._connect().execute(
+            "SELECT interview_type, language, difficulty, COUNT(*), SUM(served < ?) "
+            "FROM questions GROUP BY interview_type, language, difficulty",
+            (self.max_serves,)
+        ).fetchall()
+        with self._lock:
+            stats = dict(self._counters)
+        stats['buckets'] = {
+            f"{row[0]}/{row[1]}/{row[2]}": {'total': row[3], 'available': row[4]}
+            for row in rows
+        }
+        return stats
+
+
+# 进程内共享的题库实例
+question_bank = QuestionBank()
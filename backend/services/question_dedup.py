@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+问题去重 - 基于字符n-gram MinHash/LSH检测同一场面试中的近似重复问题
+"""
+
+import os
+import re
+import time
+import zlib
+import random
+import threading
+
+# 去重配置
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'true').lower() == 'true'
+DEDUP_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', '0.5'))  # 估算的Jaccard相似度达到该值视为重复
+DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', '30'))  # 每场面试最多保留的问题签名数
+DEDUP_MAX_RETRIES = int(os.environ.get('DEDUP_MAX_RETRIES', '1'))  # 生成重复问题时重新生成的次数
+
+# 字符n-gram长度，无需分词：中文一个字信息量大，用二元组；英文等用三元组
+CJK_NGRAM_SIZE = 2
+OTHER_NGRAM_SIZE = 3
+
+# MinHash签名长度 = 分段数 × 每段行数；16×4时LSH在相似度约0.5处开始召回候选
+LSH_BANDS = 16
+LSH_ROWS = 4
+NUM_PERM = LSH_BANDS * LSH_ROWS
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# 固定种子，保证各工作进程生成的签名一致（签名保存在会话中跨进程使用）
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def _shingles(text):
+    # 统一大小写，标点和空白压缩为单个空格
+    normalized = re.sub(r'[\W_]+', ' ', (text or '').lower()).strip()
+    cjk = sum(1 for char in normalized if '\u4e00' <= char <= '\u9fff')
+    size = CJK_NGRAM_SIZE if cjk * 2 >= len(normalized) else OTHER_NGRAM_SIZE
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def signature(text):
+    """
+    计算文本的MinHash签名
+
+    Args:
+        text: 问题文本
+
+    Returns:
+        长度为NUM_PERM的整数列表，文本为空时返回None
+    """
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in _shingles(text)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(sig_a, sig_b):
+    """由两个签名估算Jaccard相似度"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _bands(sig):
+    return [(band, tuple(sig[band * LSH_ROWS:(band + 1) * LSH_ROWS])) for band in range(LSH_BANDS)]
+
+
+class MinHashIndex:
+    """
+    单场面试的LSH索引
+
+    只保留最近max_entries个签名，内存占用有上限；最旧的签名先被淘汰。
+    """
+
+    def __init__(self, signatures=None, max_entries=DEDUP_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._signatures = []
+        self._buckets = {}  # (分段, 分段哈希) -> 签名序号集合
+        self._offset = 0  # 已淘汰的签名数，用于把序号映射到列表下标
+        for sig in signatures or []:
+            self.add(sig)
+
+    def add(self, sig):
+        """加入一个签名"""
+        if len(self._signatures) >= self.max_entries:
+            self._evict()
+        seq = self._offset + len(self._signatures)
+        self._signatures.append(sig)
+        for key in _bands(sig):
+            self._buckets.setdefault(key, set()).add(seq)
+
+    def _evict(self):
+        oldest = self._signatures.pop(0)
+        for key in _bands(oldest):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(self._offset)
+                if not bucket:
+                    del self._buckets[key]
+        self._offset += 1
+
+    def query(self, sig):
+        """
+        查询与签名最相似的已有问题
+
+        Returns:
+            LSH候选中最高的估算相似度，没有候选时返回0.0
+        """
+        candidates = set()
+        for key in _bands(sig):
+            candidates.update(self._buckets.get(key, ()))
+        best = 0.0
+        for seq in candidates:
+            best = max(best, similarity(sig, self._signatures[seq - self._offset]))
+        return best
+
+    def signatures(self):
+        """导出签名列表，用于保存到会话中"""
+        return list(self._signatures)
+
+
+class QuestionDeduplicator:
+    """
+    问题近似重复检测
+
+    签名保存在会话的question_signatures字段中，任何工作进程都可以重建索引。
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, max_entries=DEDUP_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counters = {
+            'checks': 0,
+            'duplicates': 0,
+            'regenerated': 0,
+            'swapped': 0,
+            'check_ms_total': 0.0,
+            'check_ms_max': 0.0
+        }
+
+    def count(self, name, amount=1):
+        """累加计数器"""
+        with self._lock:
+            self._counters[name] += amount
+
+    def index(self, session):
+        """由会话中保存的签名构建索引，未启用去重或没有会话时返回None"""
+        if not DEDUP_ENABLED or not session:
+            return None
+        return MinHashIndex(session.get('question_signatures'), self.max_entries)
+
+    def build_index(self, texts, max_entries=None):
+        """由一组已有问题构建索引（用于题库补充时检查新题），未启用去重时返回None"""
+        if not DEDUP_ENABLED:
+            return None
+        index = MinHashIndex(max_entries=max_entries or self.max_entries)
+        for text in texts:
+            sig = signature(text)
+            if sig is not None:
+                index.add(sig)
+        return index
+
+    def is_duplicate(self, index, text):
+        """
+        检查问题是否与本场面试已出现的问题过于相似
+
+        Args:
+            index: index()返回的索引，为None时不检查
+            text: 新生成的问题
+
+        Returns:
+            是否重复
+        """
+        if index is None:
+            return False
+        started = time.perf_counter()
+        sig = signature(text)
+        duplicate = sig is not None and index.query(sig) >= self.threshold
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._counters['checks'] += 1
+            self._counters['check_ms_total'] += elapsed
+            self._counters['check_ms_max'] = max(self._counters['check_ms_max'], elapsed)
+            if duplicate:
+                self._counters['duplicates'] += 1
+        return duplicate
+
+    def remember(self, session, text):
+        """把已下发问题的签名记录到会话中（在session_store.update的回调中调用）"""
+        if not DEDUP_ENABLED:
+            return
+        sig = signature(text)
+        if sig is None:
+            return
+        signatures = session.get('question_signatures', []) + [sig]
+        session['question_signatures'] = signatures[-self.max_entries:]
+
+    def stats(self):
+        """获取去重统计"""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['check_ms_avg'] = round(stats['check_ms_total'] / stats['checks'], 4) if stats['checks'] else 0.0
+        stats['check_ms_total'] = round(stats['check_ms_total'], 4)
+        stats['check_ms_max'] = round(stats['check_ms_max'], 4)
+        return stats
+
+
+# 进程内共享的去重器
+question_deduplicator = QuestionDeduplicator()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+面试会话存储 - 保存面试元数据、问题、回答和逐题评估，支持内存和SQLite两种后端
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+# 会话存储配置
+SESSION_STORE = os.environ.get('SESSION_STORE', 'sqlite')  # memory 或 sqlite
+SESSION_DB_PATH = os.environ.get('SESSION_DB_PATH', os.path.join(tempfile.gettempdir(), 'smarthr_sessions.db'))
+SESSION_TTL = int(os.environ.get('SESSION_TTL', str(4 * 3600)))  # 会话闲置过期时间（秒）
+SESSION_MAX_ENTRIES = int(os.environ.get('SESSION_MAX_ENTRIES', '10000'))  # 内存后端最多保存的会话数
+
+# SQLite后端每写入多少次清理一次过期会话
+PURGE_INTERVAL = 200
+
+
+def new_interview_id():
+    """生成不会冲突的面试ID"""
+    return f"interview_{uuid.uuid4().hex}"
+
+
+def new_question_id():
+    """生成不会冲突的问题ID"""
+    return f"q_{uuid.uuid4().hex}"
+
+
+def new_session(interview_type, company, language, use_ml=True, difficulty=3):
+    """
+    创建新的会话数据
+
+    Returns:
+        会话字典，包含元数据以及questions、answers列表
+    """
+    now = time.time()
+    return {
+        'interview_id': new_interview_id(),
+        'type': interview_type,
+        'company': company,
+        'language': language,
+        'use_ml': use_ml,
+        'difficulty': difficulty,
+        'start_time': now,
+        'updated_at': now,
+        'questions': [],  # [{id, content, type, difficulty}]
+        'answers': [],    # [{question_id, answer, evaluation, time}]
+        'bank_seen': []   # 已下发的题库问题ID，保证同一场面试不重复
+    }
+
+
+def find_question(session, question_id):
+    """在会话中按ID查找问题"""
+    for question in session['questions']:
+        if question['id'] == question_id:
+            return question
+    return None
+
+
+class SessionStore:
+    """会话存储接口"""
+
+    def create(self, session):
+        """保存新会话"""
+        raise NotImplementedError
+
+    def get(self, interview_id):
+        """
+        按ID获取会话
+
+        Returns:
+            会话字典，不存在或已过期时返回None
+        """
+        raise NotImplementedError
+
+    def update(self, interview_id, fn):
+        """
+        原子地修改会话
+
+        Args:
+            interview_id: 面试ID
+            fn: 修改函数，参数为会话字典，可直接修改
+
+        Returns:
+            修改后的会话，不存在时返回None
+        """
+        raise NotImplementedError
+
+    def delete(self, interview_id):
+        """删除会话"""
+        raise NotImplementedError
+
+    def stats(self):
+        """获取存储统计"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """
+    进程内会话存储
+
+    按最近访问顺序保存，超过容量时淘汰最久未访问的会话。仅适用于单进程部署。
+    """
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # interview_id -> (session, expires_at)
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._expirations = 0
+
+    def create(self, session):
+        with self._lock:
+            self._put(json.loads(json.dumps(session)))
+        return session
+
+    def get(self, interview_id):
+        with self._lock:
+            session = self._get(interview_id)
+            return json.loads(json.dumps(session)) if session is not None else None
+
+    def update(self, interview_id, fn):
+        with self._lock:
+            session = self._get(interview_id)
+            if session is None:
+                return None
+            fn(session)
+            session['updated_at'] = time.time()
+            self._put(session)
+            return json.loads(json.dumps(session))
+
+    def delete(self, interview_id):
+        with self._lock:
+            self._sessions.pop(interview_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
+
+    def _get(self, interview_id):
+        entry = self._sessions.get(interview_id)
+        if entry is None:
+            return None
+        session, expires_at = entry
+        if expires_at <= time.time():
+            del self._sessions[interview_id]
+            self._expirations += 1
+            return None
+        return session
+
+    def _put(self, session):
+        interview_id = session['interview_id']
+        self._sessions[interview_id] = (session, time.time() + self.ttl)
+        self._sessions.move_to_end(interview_id)
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+            self._evictions += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite会话存储
+
+    使用WAL模式，多个gunicorn工作进程可以并发读写同一个数据库文件；
+    每个线程持有独立连接，修改在IMMEDIATE事务中完成以保证原子性。
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        pid = os.getpid()
+        if conn is None or getattr(self._local, 'pid', None) != pid:
+            # fork出的子进程不能复用父进程的连接
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def create(self, session):
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+            (session['interview_id'], json.dumps(session, ensure_ascii=False), time.time() + self.ttl)
+        )
+        self._after_write()
+        return session
+
+    def get(self, interview_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data, expires_at FROM sessions WHERE id = ?", (interview_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= time.time():
+            self.delete(interview_id)
+            with self._lock:
+                self._expirations += 1
+            return None
+        return json.loads(row[0])
+
+    def update(self, interview_id, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?", (interview_id, time.time())
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            session = json.loads(row[0])
+            fn(session)
+            session['updated_at'] = time.time()
+            conn.execute(
+                "UPDATE sessions SET data = ?, expires_at = ? WHERE id = ?",
+                (json.dumps(session, ensure_ascii=False), time.time() + self.ttl, interview_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write()
+        return session
+
+    def delete(self, interview_id):
+        self._connect().execute("DELETE FROM sessions WHERE id = ?", (interview_id,))
+
+    def purge_expired(self):
+        """删除所有过期会话"""
+        cursor = self._connect().execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        with self._lock:
+            self._expirations += cursor.rowcount
+
+    def stats(self):
+        row = self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'sessions': row[0],
+                'expirations': self._expirations
+            }
+
+    def _after_write(self):
+        with self._lock:
+            self._writes += 1
+            should_purge = self._writes % PURGE_INTERVAL == 0
+        if should_purge:
+            self.purge_expired()
+
+
+def create_session_store(backend=SESSION_STORE):
+    """根据配置创建会话存储"""
+    if backend == 'memory':
+        return MemorySessionStore()
+    if backend == 'sqlite':
+        return SQLiteSessionStore()
+    raise ValueError(f"未知的会话存储后端: {backend}")
+
+
+# 进程内共享的会话存储实例
+session_store = create_session_store()
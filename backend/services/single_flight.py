@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+请求合并（single-flight）- 相同请求并发到达时只调用一次上游，所有调用方共享结果
+"""
+
+import json
+import hashlib
+import threading
+
+
+def request_key(*parts):
+    """
+    把请求参数规范化为合并键
+
+    字典按键排序，字符串去掉首尾空白并把连续空白压缩为一个空格。
+
+    Returns:
+        参数的SHA-256摘要
+    """
+    def normalize(value):
+        if isinstance(value, str):
+            return ' '.join(value.split())
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        return value
+
+    payload = json.dumps(normalize(list(parts)), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    进程内的请求合并器
+
+    第一个调用方执行请求，同一键上并发到达的其他调用方等待并得到同一个结果（或同一个异常）；
+    请求结束后立即移除，之后的调用会重新执行，不做缓存。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._async_calls = {}  # (事件循环, key) -> asyncio.Future
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0
+        }
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        执行请求，相同键的请求正在进行时等待其结果
+
+        Args:
+            key: 合并键，见request_key
+            fn: 执行上游请求的函数
+
+        Returns:
+            fn的返回值
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._counters['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        do()的协程版本，fn为返回协程的函数；统计与同步调用合并计算
+
+        Returns:
+            fn的返回值
+        """
+        import asyncio  # 只有ASGI入口使用，同步入口不加载
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self._counters['calls'] += 1
+            future = self._async_calls.get(flight_key)
+            if future is not None:
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                future = self._async_calls[flight_key] = loop.create_future()
+                self._counters['executions'] += 1
+                leader = True
+
+        if not leader:
+            # shield：某个等待方被取消时不影响其他等待方
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待方时避免"exception was never retrieved"警告
+            raise
+        except BaseException:
+            # 发起方被取消，等待方一并取消
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._async_calls[flight_key]
+
+    def stats(self):
+        """获取合并统计，coalescing_ratio为被合并的调用占比"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['inflight'] = len(self._calls) + len(self._async_calls)
+        stats['coalescing_ratio'] = round(stats['coalesced'] / stats['calls'], 4) if stats['calls'] else 0.0
+        return stats
+
+
+# 各上游的请求合并器
+question_flight = SingleFlight('deepseek_question')
+tts_flight = SingleFlight('xfyun_tts')
+
+
+def get_flight_stats():
+    """获取所有请求合并器的统计"""
+    return {flight.name: flight.stats() for flight in (question_flight, tts_flight)}
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+结构化输出解析 - 从模型回复中提取JSON对象，按字段定义校验并转换类型
+
+开启JSON输出模式（response_format）后回复通常就是一个JSON对象，直接解析；否则回复可能带有说明文字、
+代码块标记，或因max_tokens截断而不完整。extract_json_object从第一个"{"开始单遍扫描，跟踪字符串、
+转义和括号嵌套，得到第一个完整对象；扫描时顺带记录多余的逗号和截断处未闭合的括号，解析失败时据此修复。
+截断只在值与值之间时才补全括号；截断在字符串、数字等值的中间时无法知道完整的值（"score": 8可能是85），按失败处理。
+解析结果、修复项和失败原因计入统计，可以看出评估有多少次、因为什么使用了备用结果。
+"""
+
+import os
+import re
+import json
+import threading
+from services.metrics import count_structured_output
+
+# 结构化输出解析配置
+STRUCTURED_OUTPUT_REPAIR = os.environ.get('STRUCTURED_OUTPUT_REPAIR', 'true').lower() == 'true'  # 是否修复多余逗号和截断的结尾
+
+# 对象内部的词法单元：字符串（可能没有结束引号）、括号、逗号、冒号和其他值（数字、true等）
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*("?)|[{}\[\],:]|[^\s"{}\[\],:]+', re.S)
+# 分数：85、85.5分、85/100、8.5/10
+_NUMBER = re.compile(r'\s*(-?\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?')
+# 字符串形式的列表按换行和分号拆分，去掉每项前的序号和项目符号
+_LIST_SEPARATOR = re.compile(r'[\n;；]+')
+_LIST_BULLET = re.compile(r'^\s*(?:[-*•·]|\d+[.、)）])\s*')
+
+_TRUE_WORDS = {'true', 'yes', 'y', '1', '是', '继续', '建议继续'}
+_FALSE_WORDS = {'false', 'no', 'n', '0', '否', '不', '不继续', '不建议继续'}
+
+# 允许字符串中出现未转义的换行等控制字符
+_decoder = json.JSONDecoder(strict=False)
+
+
+class StructuredOutputError(ValueError):
+    """无法从模型回复中得到符合字段定义的结果，reason为失败原因"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _decode_object(text):
+    """解析为JSON对象，不是合法JSON或不是对象时返回None"""
+    try:
+        value = _decoder.decode(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _scan_object(text, start):
+    """
+    从start处的"{"开始扫描到对象结束
+
+    Returns:
+        (结束位置, 多余逗号的位置列表, 结尾, 是否被截断)：结尾为''表示对象完整，
+        None表示括号不匹配或截断在值的中间，无法修复；其他字符串为补全截断处未闭合的括号需要追加的内容
+    """
+    closers = []
+    commas = []
+    comma = None
+    boundary = True
+    for match in _TOKEN.finditer(text, start):
+        token = match.group()
+        char = token[0]
+        if char in '{[':
+            closers.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if comma is not None:
+                commas.append(comma)
+            if closers.pop() != char:
+                return match.end(), commas, None, False
+            if not closers:
+                return match.end(), commas, '', False
+        elif char == '"' and not match.group(1):
+            # 字符串没有结束引号，回复截断在字符串中间
+            return len(text), commas, None, True
+        comma = match.start() if char == ',' else None
+        # 数字、true等在末尾时可能只是完整值的一部分，冒号之后的值还没有开始
+        boundary = char in '{}[],"'
+    if not boundary:
+        return len(text), commas, None, True
+    if comma is not None:
+        commas.append(comma)
+    return len(text), commas, ''.join(reversed(closers)), True
+
+
+def extract_json_object(text, repair=STRUCTURED_OUTPUT_REPAIR):
+    """
+    从模型回复中提取第一个能解析的JSON对象
+
+    Args:
+        text: 模型回复
+        repair: 是否修复多余的逗号和截断的结尾
+
+    Returns:
+        (对象, 修复项列表)，修复项为extracted（对象前后有其他文字）、trailing_comma或truncated（截断在值与值之间）
+
+    Raises:
+        StructuredOutputError: reason为empty、no_json、invalid_json或truncated
+    """
+    text = (text or '').strip()
+    if not text:
+        raise StructuredOutputError('empty', '模型回复为空')
+    value = _decode_object(text)
+    if value is not None:
+        return value, []
+
+    reason = 'no_json'
+    start = text.find('{')
+    while start >= 0:
+        end, commas, ending, truncated = _scan_object(text, start)
+        candidate = text[start:end]
+        extracted = ['extracted'] if start > 0 or end < len(text) else []
+        if ending == '':
+            value = _decode_object(candidate)
+            if value is not None:
+                return value, extracted
+        if repair and ending is not None and (commas or ending):
+            repairs = list(extracted)
+            if commas:
+                pieces, previous = [], start
+                for position in commas:
+                    pieces.append(text[previous:position])
+                    previous = position + 1
+                pieces.append(text[previous:end])
+                candidate = ''.join(pieces)
+                repairs.append('trailing_comma')
+            if ending:
+                candidate += ending
+                repairs.append('truncated')
+            value = _decode_object(candidate)
+            if value is not None:
+                return value, repairs
+        reason = 'truncated' if truncated else 'invalid_json'
+        # 从对象之后继续查找，已扫描过的内容不再重复扫描
+        start = text.find('{', end)
+    raise StructuredOutputError(reason, '无法从模型回复中解析JSON对象')
+
+
+def _coerce_number(value, bounds):
+    if isinstance(value, bool):
+        raise ValueError('布尔值不是分数')
+    if isinstance(value, (int, float)):
+        number, coerced = value, False
+    elif isinstance(value, str):
+        match = _NUMBER.match(value)
+        if not match:
+            raise ValueError(f'无法转换为数字: {value!r}')
+        number, coerced = float(match.group(1)), True
+        if match.group(2):
+            # 按满分换算，如8.5/10
+            denominator = float(match.group(2))
+            if denominator <= 0:
+                raise ValueError(f'无法转换为数字: {value!r}')
+            number = number / denominator * (bounds[1] if bounds else 100)
+    else:
+        raise ValueError(f'无法转换为数字: {value!r}')
+    if bounds and not bounds[0] <= number <= bounds[1]:
+        number, coerced = min(max(number, bounds[0]), bounds[1]), True
+    if isinstance(number, float) and number.is_integer():
+        number = int(number)
+    return number, coerced
+
+
+def _coerce_string(value):
+    if isinstance(value, str):
+        return value.strip(), False
+    if isinstance(value, list):
+        return '\n'.join(str(item).strip() for item in value if item is not None), True
+    if isinstance(value, (int, float)):
+        return str(value), True
+    raise ValueError(f'无法转换为字符串: {value!r}')
+
+
+def _coerce_string_list(value):
+    if isinstance(value, list):
+        items = [item.strip() if isinstance(item, str) else str(item) for item in value if item is not None]
+        return [item for item in items if item], not all(isinstance(item, str) for item in value)
+    if isinstance(value, str):
+        items = (_LIST_BULLET.sub('', item).strip() for item in _LIST_SEPARATOR.split(value))
+        return [item for item in items if item], True
+    raise ValueError(f'无法转换为字符串列表: {value!r}')
+
+
+def _coerce_boolean(value):
+    if isinstance(value, bool):
+        return value, False
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value), True
+    if isinstance(value, str):
+        word = value.strip().lower()
+        if word in _TRUE_WORDS:
+            return True, True
+        if word in _FALSE_WORDS:
+            return False, True
+    raise ValueError(f'无法转换为布尔值: {value!r}')
+
+
+class Field:
+    """
+    结构化输出中的一个字段
+
+    kind为number（可用bounds限定范围，超出时截断）、string、string_list或boolean；
+    非必需字段缺失或为null时使用default。
+    """
+
+    def __init__(self, name, kind, required=False, default=None, bounds=None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.bounds = bounds
+
+    def coerce(self, value):
+        """
+        转换为字段类型
+
+        Returns:
+            (转换后的值, 是否做了类型转换或范围截断)
+        """
+        if self.kind == 'number':
+            return _coerce_number(value, self.bounds)
+        if self.kind == 'string':
+            return _coerce_string(value)
+        if self.kind == 'string_list':
+            return _coerce_string_list(value)
+        return _coerce_boolean(value)
+
+
+class StructuredOutputParser:
+    """
+    按字段定义解析模型回复
+
+    解析得到的结果只包含定义的字段，类型和范围均已校验；统计直接解析成功、经过修复或类型转换后成功、
+    以及失败（按原因）的次数。
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._counters = {'ok': 0, 'repaired': 0, 'failed': 0}
+        self._repairs = {}
+        self._failures = {}
+
+    def parse(self, text):
+        """
+        解析模型回复
+
+        Returns:
+            字段名到值的字典
+
+        Raises:
+            StructuredOutputError: 回复中没有JSON对象，或必需字段缺失、无法转换（reason为schema）
+        """
+        try:
+            value, repairs = extract_json_object(text)
+            result = {}
+            for field in self.fields:
+                raw = value.get(field.name)
+                if raw is None:
+                    if field.required:
+                        raise StructuredOutputError('schema', f'缺少字段{field.name}')
+                    result[field.name] = field.default() if callable(field.default) else field.default
+                    continue
+                try:
+                    result[field.name], coerced = field.coerce(raw)
+                except ValueError as e:
+                    if field.required:
+                        raise StructuredOutputError('schema', f'字段{field.name}: {str(e)}')
+                    result[field.name], coerced = field.default() if callable(field.default) else field.default, True
+                if coerced:
+                    repairs.append(f'coerce_{field.name}')
+        except StructuredOutputError as e:
+            self.record_failure(e.reason)
+            raise
+        self._record('repaired' if repairs else 'ok', repairs)
+        return result
+
+    def record_failure(self, reason):
+        """记录一次失败，也用于上游出错等没有回复可解析的情况"""
+        self._record('failed', (), reason)
+
+    def _record(self, result, repairs, reason=None):
+        with self._lock:
+            self._counters[result] += 1
+            for repair in repairs:
+                self._repairs[repair] = self._repairs.get(repair, 0) + 1
+            if reason:
+                self._failures[reason] = self._failures.get(reason, 0) + 1
+        count_structured_output(self.name, result, repairs, reason)
+
+    def stats(self):
+        """获取解析统计"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['repairs'] = dict(self._repairs)
+            stats['failures'] = dict(self._failures)
+        total = stats['ok'] + stats['repaired'] + stats['failed']
+        stats['failure_rate'] = round(stats['failed'] / total, 3) if total else 0.0
+        return stats
+
+
+# 全局评估结果解析器实例，字段与build_evaluation_messages中要求的格式一致
+evaluation_parser = StructuredOutputParser('evaluation', [
+    Field('score', 'number', required=True, bounds=(0, 100)),
+    Field('strengths', 'string_list', default=list),
+    Field('weaknesses', 'string_list', default=list),
+    Field('suggestions', 'string', default=''),
+    Field('continue', 'boolean', default=True)
+])
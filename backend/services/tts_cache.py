@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+TTS音频缓存 - 按内容寻址的两级缓存（进程内LRU + 多进程共享的磁盘缓存）
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# 缓存配置
+TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # 内存层容量（字节）
+TTS_CACHE_DISK_MAX_BYTES = int(os.environ.get('TTS_CACHE_DISK_MAX_BYTES', str(512 * 1024 * 1024)))  # 磁盘层容量（字节）
+TTS_CACHE_TTL = int(os.environ.get('TTS_CACHE_TTL', str(7 * 24 * 3600)))  # 过期时间（秒）
+TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'smarthr_tts_cache'))
+
+# 每写入多少次磁盘缓存后清理一次过期和超量文件
+DISK_PRUNE_INTERVAL = 100
+
+
+class TTSCache:
+    """
+    TTS音频两级缓存
+
+    内存层为按字节数限制容量的LRU；磁盘层以内容哈希为文件名，多个gunicorn工作进程共享同一目录，
+    读取时由操作系统页缓存加速。磁盘命中的音频会复制进本进程的内存层，因此直接读取文件，不使用mmap。
+    条目可以是PCM，也可以是编码后的Opus/MP3（键中包含格式），文件扩展名与格式无关。
+    """
+
+    def __init__(self, max_bytes=TTS_CACHE_MAX_BYTES, ttl=TTS_CACHE_TTL,
+                 cache_dir=TTS_CACHE_DIR, disk_max_bytes=TTS_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # key -> (audio, expires_at)
+        self._bytes = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_writes': 0,
+            'disk_errors': 0
+        }
+
+    @staticmethod
+    def make_key(text, voice, speed, volume, pitch):
+        """根据合成参数生成缓存键"""
+        raw = json.dumps([text, voice, speed, volume, pitch], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        """
+        查询缓存
+
+        Returns:
+            音频数据（bytes），未命中时返回None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                audio, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return audio
+                del self._entries[key]
+                self._bytes -= len(audio)
+                self._counters['expirations'] += 1
+
+        audio = self._read_disk(key, now)
+        if audio is None:
+            self._count('misses')
+            return None
+
+        self._count('disk_hits')
+        self._put_memory(key, audio, now)
+        return audio
+
+    def set(self, key, audio):
+        """写入缓存（同时写入内存层和磁盘层）"""
+        if not audio:
+            return
+        now = time.time()
+        self._put_memory(key, audio, now)
+        self._write_disk(key, audio)
+
+    def _put_memory(self, key, audio, now):
+        size = len(audio)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (audio, now + self.ttl)
+            self._bytes += size
+            # 按LRU顺序淘汰，直到总字节数回到上限以内
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._counters['evictions'] += 1
+
+    def _read_disk(self, key, now):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_mtime + self.ttl <= now:
+                    os.remove(path)
+                    self._count('expirations')
+                    return None
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self._count('disk_errors')
+            return None
+
+    def _write_disk(self, key, audio):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再原子替换，避免其他进程读到半个文件
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._count('disk_errors')
+            return
+
+        with self._lock:
+            self._counters['disk_writes'] += 1
+            self._writes += 1
+            should_prune = self._writes % DISK_PRUNE_INTERVAL == 0
+        if should_prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """清理磁盘层中过期的文件，并按修改时间淘汰超出容量的文件"""
+        now = time.time()
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp'):
+                    # 写入中途崩溃遗留的临时文件
+                    if stat.st_mtime + 60 <= now:
+                        self._remove(path, 'expirations')
+                    continue
+                if stat.st_mtime + self.ttl <= now:
+                    self._remove(path, 'expirations')
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path, 'evictions')
+            total -= size
+
+    def _remove(self, path, counter):
+        try:
+            os.remove(path)
+            self._count(counter)
+        except OSError:
+            pass
+
+    def clear(self):
+        """清空内存层"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._entries)
+            stats['memory_bytes'] = self._bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# 进程内共享的缓存实例
+tts_cache = TTSCache()
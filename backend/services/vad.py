@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+语音活动检测（VAD）- 基于短时能量和过零率，去掉录音首尾和停顿中的静音，并按停顿切分语句
+
+按20ms分帧，每块音频的帧特征用NumPy一次算出：能量高于阈值的帧为语音；能量略低但过零率高的帧
+视为清辅音（如s、sh），同样算作语音。阈值随背景噪声自适应，噪声底只根据非语音帧缓慢上升，避免长时间连续说话时被抬高。
+
+没有足够长停顿的长段语音在达到ASR_SEGMENT_SECONDS后，于最近ASR_SEGMENT_SEARCH_SECONDS内能量最低的帧处切开，
+下一段从切点前ASR_SEGMENT_OVERLAP_MS开始，重叠部分的重复文字在合并转写结果时去掉。
+"""
+
+import os
+import threading
+from collections import deque
+
+VAD_ENABLED = os.environ.get('VAD_ENABLED', 'true').lower() == 'true'
+VAD_FRAME_MS = int(os.environ.get('VAD_FRAME_MS', '20'))
+VAD_ENERGY_DB = float(os.environ.get('VAD_ENERGY_DB', '-50'))  # 语音帧的最低能量（dBFS）
+VAD_NOISE_MARGIN_DB = float(os.environ.get('VAD_NOISE_MARGIN_DB', '10'))  # 语音帧需高出背景噪声的能量
+VAD_ZCR_THRESHOLD = float(os.environ.get('VAD_ZCR_THRESHOLD', '0.25'))  # 清辅音帧的最低过零率
+VAD_PAD_MS = int(os.environ.get('VAD_PAD_MS', '200'))  # 语句前后保留的静音，避免切掉字头字尾
+VAD_SPLIT_PAUSE_MS = int(os.environ.get('VAD_SPLIT_PAUSE_MS', '800'))  # 停顿超过该时长即切分语句
+VAD_MIN_SPEECH_MS = int(os.environ.get('VAD_MIN_SPEECH_MS', '150'))  # 语音帧总时长低于该值的片段视为噪声丢弃
+
+# 长语音分段配置，分段越短并发度越高，讯飞听写单次会话限60秒
+ASR_SEGMENT_SECONDS = float(os.environ.get('ASR_SEGMENT_SECONDS', '15'))  # 单段达到该时长后在低能量处切分
+ASR_SEGMENT_SEARCH_SECONDS = float(os.environ.get('ASR_SEGMENT_SEARCH_SECONDS', '3'))  # 在单段末尾多长范围内寻找切点
+ASR_SEGMENT_OVERLAP_MS = int(os.environ.get('ASR_SEGMENT_OVERLAP_MS', '500'))  # 相邻分段的重叠时长
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+_ZCR_ENERGY_SLACK_DB = 6  # 清辅音帧允许低于能量阈值的幅度
+_NOISE_FLOOR_RISE_DB = 1.0  # 噪声底每秒最多上升的幅度
+
+
+def frame_features(pcm, frame_samples):
+    """
+    计算每帧的能量（dBFS）和过零率
+
+    Args:
+        pcm: 16bit单声道PCM，长度为整帧
+        frame_samples: 每帧的采样数
+
+    Returns:
+        (能量数组, 过零率数组)
+    """
+    import numpy as np  # 首次处理音频时才加载，不拖慢冷启动
+    frames = np.frombuffer(pcm, dtype='<i2').reshape(-1, frame_samples).astype(np.float32)
+    energy = 10 * np.log10(np.mean(frames * frames, axis=1) / (32768.0 * 32768.0) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_samples - 1)
+    return energy, zcr
+
+
+class Segmenter:
+    """
+    单次录音的流式切分状态
+
+    feed()输入任意长度的PCM块，返回其中已切出的分段；finish()返回最后一段。
+    分段为(PCM, 与上一段重叠的字节数)：按停顿切分的语句前后保留VAD_PAD_MS静音，重叠为0；
+    长语音在低能量处切开的分段与上一段重叠ASR_SEGMENT_OVERLAP_MS。
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.frame_bytes = detector.frame_samples * SAMPLE_WIDTH
+        self.input_bytes = 0
+        self.output_bytes = 0  # 不含重叠部分
+        self.segments = 0
+        self._pending = b''  # 不足一帧的字节
+        self._noise_floor = VAD_ENERGY_DB - VAD_NOISE_MARGIN_DB
+        self._leading = deque(maxlen=detector.pad_frames)  # 语句开始前的静音帧
+        self._frames = []  # 当前分段的帧，元素为(帧数据, 能量, 是否语音)
+        self._overlap = 0  # 当前分段开头与上一段重叠的帧数
+        self._speech_frames = 0
+        self._silence_run = 0  # 当前分段末尾连续的静音帧数
+
+    def feed(self, pcm):
+        """输入一块PCM，返回已切出的分段列表"""
+        self.input_bytes += len(pcm)
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        if not usable:
+            return []
+        energy, speech = self._classify(data[:usable])
+        segments = []
+        for index in range(len(energy)):
+            frame = data[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            segment = self._push((frame, float(energy[index]), bool(speech[index])))
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def finish(self):
+        """录音结束，返回最后一段（没有则为空列表）"""
+        segment = self._emit()
+        return [segment] if segment else []
+
+    def _classify(self, pcm):
+        import numpy as np
+        energy, zcr = frame_features(pcm, self.detector.frame_samples)
+        if not self.detector.enabled:
+            return energy, np.ones(len(energy), dtype=bool)
+        # 噪声底取本块较安静的帧的能量，下降立即生效
+        self._noise_floor = min(float(np.percentile(energy, 10)), self._noise_floor)
+        speech = self._speech_frames_mask(energy, zcr)
+        # 上升受限且只参考非语音帧，连续说话或持续的语音级声音不会把噪声底抬到语音电平
+        if not speech.all():
+            seconds = len(energy) * self.detector.frame_ms / 1000
+            quiet = float(np.percentile(energy[~speech], 10))
+            if quiet > self._noise_floor:
+                self._noise_floor = min(quiet, self._noise_floor + _NOISE_FLOOR_RISE_DB * seconds)
+                speech = self._speech_frames_mask(energy, zcr)
+        return energy, speech
+
+    def _speech_frames_mask(self, energy, zcr):
+        threshold = max(VAD_ENERGY_DB, self._noise_floor + VAD_NOISE_MARGIN_DB)
+        return (energy > threshold) | ((energy > threshold - _ZCR_ENERGY_SLACK_DB) & (zcr > VAD_ZCR_THRESHOLD))
+
+    def _push(self, frame):
+        is_speech = frame[2]
+        if not self._frames:
+            if not is_speech:
+                self._leading.append(frame)
+                return None
+            self._frames = list(self._leading)
+            self._leading.clear()
+        self._frames.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self.detector.split_frames:
+            return self._emit()
+        if len(self._frames) >= self.detector.segment_frames:
+            return self._cut()
+        return None
+
+    def _cut(self):
+        # 在末尾的搜索范围内找能量最低的帧，切在该帧之后，下一段从切点前overlap_frames帧开始
+        import numpy as np
+        frames = self._frames
+        search_start = max(len(frames) - self.detector.search_frames, self._overlap + 1)
+        cut = search_start + int(np.argmin([frame[1] for frame in frames[search_start:]])) + 1
+        segment = self._segment(frames[:cut], sum(frame[2] for frame in frames[:cut]))
+        rest = frames[max(cut - self.detector.overlap_frames, 0):]
+        self._overlap = len(rest) - (len(frames) - cut)
+        self._frames = rest
+        self._speech_frames = sum(frame[2] for frame in rest)
+        self._silence_run = min(self._silence_run, len(rest))
+        return segment
+
+    def _emit(self):
+        frames, speech_frames = self._frames, self._speech_frames
+        # 末尾超出保留长度的静音不发送，留作下一句的前导静音
+        trailing = max(self._silence_run - self.detector.pad_frames, 0)
+        if trailing:
+            self._leading.extend(frames[len(frames) - trailing:])
+            frames = frames[:len(frames) - trailing]
+        self._frames = []
+        self._speech_frames = 0
+        self._silence_run = 0
+        return self._segment(frames, speech_frames)
+
+    def _segment(self, frames, speech_frames):
+        overlap, self._overlap = self._overlap, 0
+        if speech_frames - overlap < self.detector.min_speech_frames:
+            return None
+        segment = b''.join(frame[0] for frame in frames)
+        overlap_bytes = overlap * self.frame_bytes
+        self.output_bytes += len(segment) - overlap_bytes
+        self.segments += 1
+        return segment, overlap_bytes
+
+
+class VoiceActivityDetector:
+    """语音活动检测器，统计累计去掉的静音时长"""
+
+    def __init__(self, enabled=VAD_ENABLED, frame_ms=VAD_FRAME_MS, pad_ms=VAD_PAD_MS, split_pause_ms=VAD_SPLIT_PAUSE_MS,
+                 min_speech_ms=VAD_MIN_SPEECH_MS, segment_seconds=ASR_SEGMENT_SECONDS,
+                 search_seconds=ASR_SEGMENT_SEARCH_SECONDS, overlap_ms=ASR_SEGMENT_OVERLAP_MS):
+        self.enabled = enabled
+        self.frame_ms = frame_ms
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self.pad_frames = pad_ms // frame_ms
+        self.split_frames = max(split_pause_ms // frame_ms, self.pad_frames + 1)
+        self.min_speech_frames = min_speech_ms // frame_ms
+        self.segment_frames = int(segment_seconds * 1000 // frame_ms)
+        self.overlap_frames = overlap_ms // frame_ms
+        # 搜索范围不超过单段的一半，每次切分至少前进半段
+        self.search_frames = max(min(int(search_seconds * 1000 // frame_ms), self.segment_frames // 2), 1)
+        self._lock = threading.Lock()
+        self._counters = {'recordings': 0, 'segments': 0, 'empty_recordings': 0, 'input_bytes': 0, 'speech_bytes': 0}
+
+    def segmenter(self):
+        """创建一次录音的切分状态"""
+        return Segmenter(self)
+
+    def segments(self, chunks):
+        """
+        把PCM数据块流切分为分段
+
+        Yields:
+            (去掉多余静音后的分段PCM, 与上一段重叠的字节数)
+        """
+        segmenter = self.segmenter()
+        try:
+            for chunk in chunks:
+                yield from segmenter.feed(chunk)
+            yield from segmenter.finish()
+        finally:
+            self.record(segmenter)
+
+    def record(self, segmenter):
+        """累计一次录音的切分结果"""
+        with self._lock:
+            self._counters['recordings'] += 1
+            self._counters['segments'] += segmenter.segments
+            self._counters['empty_recordings'] += int(segmenter.segments == 0)
+            self._counters['input_bytes'] += segmenter.input_bytes
+            self._counters['speech_bytes'] += segmenter.output_bytes
+
+    def stats(self):
+        """获取检测统计"""
+        with self._lock:
+            stats = dict(self._counters)
+        bytes_per_second = SAMPLE_RATE * SAMPLE_WIDTH
+        stats['input_seconds'] = round(stats['input_bytes'] / bytes_per_second, 1)
+        stats['speech_seconds'] = round(stats['speech_bytes'] / bytes_per_second, 1)
+        stats['trimmed_seconds'] = round(stats['input_seconds'] - stats['speech_seconds'], 1)
+        stats['trimmed_ratio'] = round(1 - stats['speech_bytes'] / stats['input_bytes'], 4) if stats['input_bytes'] else 0.0
+        return stats
+
+
+# 全局语音活动检测器实例
+vad = VoiceActivityDetector()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+科大讯飞接口鉴权 - 生成带签名的请求URL
+
+讯飞按 host、date、request-line 三项做HMAC-SHA256签名，服务端只校验date与服务器时间的偏差（不超过300秒），
+同一签名在此期间可以重复使用。签名后的查询串按(host, request-line)缓存XFYUN_AUTH_CACHE_SECONDS秒，
+不必每次请求都重新计算HMAC和两次base64。
+
+只依赖标准库。同步和异步讯飞客户端共用同一个签名器；Vercel函数经backend/serverless.py调用相同的核心接口，
+同样使用这里的缓存。
+"""
+
+import os
+import hmac
+import base64
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from urllib.parse import urlencode, urlsplit
+
+XFYUN_API_KEY = os.environ.get('XFYUN_API_KEY', '')
+XFYUN_API_SECRET = os.environ.get('XFYUN_API_SECRET', '')
+
+# 讯飞允许的时钟偏差为300秒，缓存时间需留出本机时钟误差的余量
+XFYUN_CLOCK_SKEW_SECONDS = 300
+XFYUN_AUTH_CACHE_SECONDS = min(float(os.environ.get('XFYUN_AUTH_CACHE_SECONDS', '60')), XFYUN_CLOCK_SKEW_SECONDS - 60)
+
+
+def http_date(timestamp=None):
+    """RFC 1123格式的GMT时间，如 Mon, 06 Mar 2024 08:00:00 GMT"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def sign(api_key, api_secret, host, request_line, date):
+    """
+    计算讯飞接口的鉴权参数
+
+    Args:
+        host: 请求的主机名
+        request_line: 请求行，如 "GET /v2/tts HTTP/1.1"
+        date: http_date()格式的时间
+
+    Returns:
+        鉴权参数字典（authorization、date、host）
+    """
+    signature_origin = f"host: {host}\ndate: {date}\n{request_line}"
+    signature_sha = hmac.new(
+        api_secret.encode('utf-8'), signature_origin.encode('utf-8'), digestmod=hashlib.sha256
+    ).digest()
+    signature = base64.b64encode(signature_sha).decode('utf-8')
+    authorization_origin = (
+        f'api_key="{api_key}", algorithm="hmac-sha256", '
+        f'headers="host date request-line", signature="{signature}"'
+    )
+    return {
+        "authorization": base64.b64encode(authorization_origin.encode('utf-8')).decode('utf-8'),
+        "date": date,
+        "host": host
+    }
+
+
+class XfyunSigner:
+    """带缓存的讯飞签名器"""
+
+    def __init__(self, api_key=XFYUN_API_KEY, api_secret=XFYUN_API_SECRET, ttl=XFYUN_AUTH_CACHE_SECONDS):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl = ttl
+        self._cache = {}  # (host, request_line) -> (签名时间, 查询串)
+        self._lock = threading.Lock()
+        self._counters = {'signed': 0, 'cache_hits': 0}
+
+    def signed_url(self, url, method="GET"):
+        """
+        为接口URL附加鉴权参数
+
+        Args:
+            url: 接口地址，签名使用其中的主机名和路径
+            method: 请求行中的方法，HTTP接口为"POST"，WebSocket接口为"GET"
+        """
+        parts = urlsplit(url)
+        return f"{url}?{self.query(parts.hostname, f'{method} {parts.path} HTTP/1.1')}"
+
+    def query(self, host, request_line):
+        """鉴权参数的查询串，在缓存有效期内复用"""
+        key = (host, request_line)
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                self._counters['cache_hits'] += 1
+                return cached[1]
+        query = urlencode(sign(self.api_key, self.api_secret, host, request_line, http_date(now)))
+        with self._lock:
+            self._cache[key] = (now, query)
+            self._counters['signed'] += 1
+        return query
+
+    def stats(self):
+        """获取签名统计"""
+        with self._lock:
+            stats = dict(self._counters)
+        total = stats['signed'] + stats['cache_hits']
+        stats['hit_rate'] = round(stats['cache_hits'] / total, 4) if total else 0.0
+        return stats
+
+
+# 全局讯飞签名器实例
+xfyun_signer = XfyunSigner()
@@ -8,13 +8,21 @@
 import os
 import time
 import base64
-import hashlib
-import hmac
+import re
 import json
-import requests
-from urllib.parse import urlencode
-from datetime import datetime
-from flask import current_app
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services import http_client
+from services.tts_cache import tts_cache
+from services.single_flight import tts_flight
+from services.circuit_breaker import xfyun_tts_breaker, xfyun_asr_breaker, CircuitOpenError
+from services.metrics import phase
+from services.audio_decoder import AudioDecodeError
+from services.xfyun_auth import xfyun_signer
+from services.vad import vad
+
+logger = logging.getLogger(__name__)
 
 # 科大讯飞API配置
 XFYUN_APP_ID = os.environ.get('XFYUN_APP_ID', '')
@@ -22,44 +30,57 @@ XFYUN_API_KEY = os.environ.get('XFYUN_API_KEY', '')
 XFYUN_API_SECRET = os.environ.get('XFYUN_API_SECRET', '')
 
 # TTS配置
-TTS_URL = "https://tts-api.xfyun.cn/v2/tts"
+TTS_URL = os.environ.get('XFYUN_TTS_URL', "https://tts-api.xfyun.cn/v2/tts")
+
+# 流式TTS配置
+TTS_STREAM_WORKERS = int(os.environ.get('TTS_STREAM_WORKERS', '4'))  # 并发合成的句子数
+TTS_SENTENCE_MIN_CHARS = 8  # 过短的句子并入上一句，减少请求次数
+TTS_SAMPLE_RATE = 16000
+
+# 句子切分：中英文句末标点及换行
+_SENTENCE_END = re.compile(r'(?<=[。！？；!?;\n])|(?<=\.)\s+')
+
+# 分句合成使用的线程池
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix='tts-stream')
 
 # ASR配置
-ASR_URL = "https://iat-api.xfyun.cn/v2/iat"
+ASR_URL = os.environ.get('XFYUN_ASR_URL', "https://iat-api.xfyun.cn/v2/iat")
+ASR_WS_URL = os.environ.get('XFYUN_ASR_WS_URL', "wss://iat-api.xfyun.cn/v2/iat")  # 流式听写WebSocket接口
 
-def generate_tts_auth_params():
-    """
-    生成科大讯飞TTS接口鉴权参数
-    """
-    # 当前时间戳
-    now = int(time.time())
-    # 有效期2小时
-    expires = now + 7200
-    
-    # 拼接字符串
-    host = "tts-api.xfyun.cn"
-    date = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
-    signature_origin = f"host: {host}\ndate: {date}\nGET /v2/tts HTTP/1.1"
-    
-    # 使用hmac-sha256算法结合apiSecret对上面的signature_origin签名
-    signature_sha = hmac.new(
-        XFYUN_API_SECRET.encode('utf-8'),
-        signature_origin.encode('utf-8'),
-        digestmod=hashlib.sha256
-    ).digest()
-    
-    # 将签名结果进行base64编码
-    signature = base64.b64encode(signature_sha).decode('utf-8')
-    
-    # 拼接authorization
-    authorization_origin = f'api_key="{XFYUN_API_KEY}", algorithm="hmac-sha256", headers="host date request-line", signature="{signature}"'
-    authorization = base64.b64encode(authorization_origin.encode('utf-8')).decode('utf-8')
-    
-    # 返回鉴权参数
+# 分段识别配置
+ASR_SEGMENT_WORKERS = int(os.environ.get('ASR_SEGMENT_WORKERS', '4'))  # 并发识别的分段数
+ASR_SEGMENT_MAX_PENDING = int(os.environ.get('ASR_SEGMENT_MAX_PENDING', '8'))  # 单次识别已切出但未完成的分段上限
+ASR_MERGE_MAX_OVERLAP = int(os.environ.get('ASR_MERGE_MAX_OVERLAP', '8'))  # 合并相邻分段时最多去掉的重复字（英文为词）数
+
+# 标点，比较重叠文字时忽略
+_PUNCTUATION = '，。！？；：、,.!?;:"\'“”‘’（）() '
+
+# 分段识别使用的线程池
+_asr_executor = ThreadPoolExecutor(max_workers=ASR_SEGMENT_WORKERS, thread_name_prefix='asr-segment')
+
+# 请求超时配置（秒）
+XFYUN_READ_TIMEOUT = float(os.environ.get('XFYUN_READ_TIMEOUT', '15'))
+
+def tts_request_body(text, voice, speed, volume, pitch):
+    """TTS接口请求体，参数同text_to_speech"""
     return {
-        "authorization": authorization,
-        "date": date,
-        "host": host
+        "common": {
+            "app_id": XFYUN_APP_ID
+        },
+        "business": {
+            "aue": "raw",  # 音频编码，raw：未压缩的pcm
+            "sfl": 1,      # 是否开启流式返回
+            "auf": "audio/L16;rate=16000",  # 音频采样率
+            "vcn": voice,  # 发音人
+            "speed": speed,  # 语速
+            "volume": volume,  # 音量
+            "pitch": pitch,  # 音高
+            "tte": "UTF8"  # 文本编码
+        },
+        "data": {
+            "text": base64.b64encode(text.encode('utf-8')).decode('utf-8'),
+            "status": 2  # 2表示完整的text
+        }
     }
 
 def text_to_speech(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
@@ -76,148 +97,458 @@ def text_to_speech(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
     Returns:
         音频数据的base64编码
     """
+    result = synthesize_audio(text, voice=voice, speed=speed, volume=volume, pitch=pitch)
+    if not result["success"]:
+        return result
+    # 兼容JSON接口：音频以base64编码返回
+    with phase('audio'):
+        audio = base64.b64encode(result["data"]).decode('utf-8')
+    return {"success": True, "audio": audio, "cached": result["cached"]}
+
+def synthesize_audio(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
+    """
+    调用科大讯飞TTS接口将文本转换为语音，参数同text_to_speech
+    
+    Returns:
+        {"success": True, "data": 16kHz 16bit单声道PCM音频（bytes）, "cached": 是否命中缓存}
+        或 {"success": False, "error": 错误信息}
+    """
+    # 相同文本和参数的音频直接从缓存返回，不再请求讯飞
+    cache_key = tts_cache.make_key(text, voice, speed, volume, pitch)
+    cached_audio = tts_cache.get(cache_key)
+    if cached_audio is not None:
+        return {"success": True, "data": cached_audio, "cached": True}
+    
     if not XFYUN_APP_ID or not XFYUN_API_KEY or not XFYUN_API_SECRET:
-        current_app.logger.warning("科大讯飞API配置缺失，使用模拟数据")
+        logger.warning("科大讯飞API配置缺失，使用模拟数据")
         return {"success": False, "error": "科大讯飞API配置缺失"}
     
+    # 相同文本和参数的并发请求合并为一次讯飞调用
+    with phase('xfyun_tts'):
+        return tts_flight.do(cache_key, _synthesize, text, voice, speed, volume, pitch, cache_key)
+
+def _synthesize(text, voice, speed, volume, pitch, cache_key):
+    """请求讯飞合成语音并写入缓存"""
+    # 熔断期间直接返回错误，调用方立即使用备用结果
+    if not xfyun_tts_breaker.allow():
+        return {"success": False, "error": "讯飞TTS服务暂时不可用（熔断中）"}
+    
+    started = time.monotonic()
     try:
-        # 获取鉴权参数
-        auth_params = generate_tts_auth_params()
-        
-        # 构建请求URL
-        url = f"{TTS_URL}?{urlencode(auth_params)}"
+        # 构建带鉴权参数的请求URL
+        url = xfyun_signer.signed_url(TTS_URL, method="GET")
         
         # 构建请求体
-        body = {
-            "common": {
-                "app_id": XFYUN_APP_ID
-            },
-            "business": {
-                "aue": "raw",  # 音频编码，raw：未压缩的pcm
-                "sfl": 1,      # 是否开启流式返回
-                "auf": "audio/L16;rate=16000",  # 音频采样率
-                "vcn": voice,  # 发音人
-                "speed": speed,  # 语速
-                "volume": volume,  # 音量
-                "pitch": pitch,  # 音高
-                "tte": "UTF8"  # 文本编码
-            },
-            "data": {
-                "text": base64.b64encode(text.encode('utf-8')).decode('utf-8'),
-                "status": 2  # 2表示完整的text
-            }
-        }
+        body = tts_request_body(text, voice, speed, volume, pitch)
         
         # 发送请求
-        response = requests.post(url, json=body)
+        with phase('xfyun_tts'):
+            response = http_client.post(url, read_timeout=XFYUN_READ_TIMEOUT, json=body)
         response.raise_for_status()
         
         # 解析响应
         result = response.json()
         if result["code"] != 0:
+            xfyun_tts_breaker.record(time.monotonic() - started, failed=True)
             return {"success": False, "error": result["message"]}
         
         # 提取音频数据
-        audio_data = base64.b64decode(result["data"]["audio"])
-        return {"success": True, "audio": base64.b64encode(audio_data).decode('utf-8')}
+        with phase('audio'):
+            audio_data = base64.b64decode(result["data"]["audio"])
+        xfyun_tts_breaker.record(time.monotonic() - started)
+        tts_cache.set(cache_key, audio_data)
+        return {"success": True, "data": audio_data, "cached": False}
     
     except Exception as e:
-        current_app.logger.error(f"科大讯飞TTS调用失败: {str(e)}")
+        xfyun_tts_breaker.record(time.monotonic() - started, failed=True)
+        logger.error(f"科大讯飞TTS调用失败: {str(e)}")
         return {"success": False, "error": str(e)}
 
-def generate_asr_auth_params():
-    """
-    生成科大讯飞ASR接口鉴权参数
+def split_sentences(text, min_chars=TTS_SENTENCE_MIN_CHARS):
     """
-    # 当前时间戳
-    now = int(time.time())
-    # 有效期2小时
-    expires = now + 7200
-    
-    # 拼接字符串
-    host = "iat-api.xfyun.cn"
-    date = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
-    signature_origin = f"host: {host}\ndate: {date}\nPOST /v2/iat HTTP/1.1"
+    将文本切分为句子，过短的片段并入前一句
     
-    # 使用hmac-sha256算法结合apiSecret对上面的signature_origin签名
-    signature_sha = hmac.new(
-        XFYUN_API_SECRET.encode('utf-8'),
-        signature_origin.encode('utf-8'),
-        digestmod=hashlib.sha256
-    ).digest()
-    
-    # 将签名结果进行base64编码
-    signature = base64.b64encode(signature_sha).decode('utf-8')
+    Args:
+        text: 要切分的文本
+        min_chars: 句子的最小字符数
+        
+    Returns:
+        句子列表
+    """
+    sentences = []
+    for piece in _SENTENCE_END.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and len(sentences[-1]) < min_chars:
+            # 英文句子之间保留空格
+            separator = ' ' if sentences[-1][-1].isascii() and piece[0].isascii() else ''
+            sentences[-1] += separator + piece
+        else:
+            sentences.append(piece)
+    return sentences
+
+def text_to_speech_stream(text, voice="xiaoyan", speed=50, volume=50, pitch=50):
+    """
+    分句并发合成语音，按句子顺序逐段返回
     
-    # 拼接authorization
-    authorization_origin = f'api_key="{XFYUN_API_KEY}", algorithm="hmac-sha256", headers="host date request-line", signature="{signature}"'
-    authorization = base64.b64encode(authorization_origin.encode('utf-8')).decode('utf-8')
+    第一句合成完成即可返回，不必等待整段文本合成结束。参数同text_to_speech。
     
-    # 返回鉴权参数
+    Yields:
+        (序号, 句子总数, 句子文本, text_to_speech的返回结果)
+    """
+    sentences = split_sentences(text) or [text]
+    futures = [
+        _tts_executor.submit(text_to_speech, sentence, voice=voice, speed=speed, volume=volume, pitch=pitch)
+        for sentence in sentences
+    ]
+    try:
+        for index, (sentence, future) in enumerate(zip(sentences, futures)):
+            # 合成在线程池中进行，这里只统计等待的时间
+            with phase('xfyun_tts'):
+                result = future.result()
+            yield index, len(sentences), sentence, result
+    finally:
+        # 客户端中途断开时取消尚未开始的合成任务
+        for future in futures:
+            future.cancel()
+
+def result_text(result):
+    """拼接识别结果中的词"""
+    text = ""
+    for item in result.get("ws", []):
+        for word in item["cw"]:
+            text += word["w"]
+    return text
+
+def asr_request_body(audio_data, language):
+    """语音识别接口请求体，参数同speech_to_text"""
     return {
-        "authorization": authorization,
-        "date": date,
-        "host": host
+        "common": {
+            "app_id": XFYUN_APP_ID
+        },
+        "business": {
+            "language": language,  # 语种
+            "domain": "iat",       # 领域
+            "accent": "mandarin",  # 方言，普通话
+            "vad_eos": 3000        # 静默检测（毫秒）
+        },
+        "data": {
+            "status": 2,           # 2表示最后一帧
+            "format": "audio/L16;rate=16000",
+            "encoding": "raw",
+            "audio": base64.b64encode(audio_data).decode('utf-8')
+        }
     }
 
 def speech_to_text(audio_data, language="zh_cn"):
     """
     调用科大讯飞ASR接口将语音转换为文本
     
+    音频先经过VAD去掉静音，按停顿切分语句，无停顿的长段语音按ASR_SEGMENT_SECONDS在低能量处切开；
+    各分段在线程池中并发识别，按顺序合并并去掉相邻分段重叠部分的重复文字，识别耗时基本不随回答时长增长。
+    
     Args:
-        audio_data: 音频数据（二进制）
+        audio_data: 16kHz 16bit单声道PCM音频（二进制）；也可以是产出PCM数据块的可迭代对象，
+            此时边读边处理，不在内存中拼接整段音频
         language: 语言，默认为"zh_cn"
         
     Returns:
-        识别结果
+        识别结果，segments为分段数，failed_segments为识别失败的分段数
+        
+    Raises:
+        AudioDecodeError: 音频在读取过程中解码失败
     """
     if not XFYUN_APP_ID or not XFYUN_API_KEY or not XFYUN_API_SECRET:
-        current_app.logger.warning("科大讯飞API配置缺失，使用模拟数据")
+        logger.warning("科大讯飞API配置缺失，使用模拟数据")
         return {"success": False, "error": "科大讯飞API配置缺失"}
     
+    chunks = [audio_data] if isinstance(audio_data, (bytes, bytearray)) else audio_data
+    # 限制已切出但未识别完的分段数，上游变慢时暂停读取上传数据，内存占用保持有界
+    pending = threading.BoundedSemaphore(ASR_SEGMENT_MAX_PENDING)
+    futures = []
     try:
-        # 获取鉴权参数
-        auth_params = generate_asr_auth_params()
+        # 每切出一段就提交识别，与后续音频的上传和切分并行
+        segments = vad.segments(chunks)
+        while True:
+            with phase('audio'):
+                segment = next(segments, None)
+            if segment is None:
+                break
+            pcm, overlap = segment
+            with phase('xfyun_asr'):
+                pending.acquire()
+            future = _asr_executor.submit(_recognize, pcm, language)
+            future.add_done_callback(lambda _: pending.release())
+            futures.append((future, overlap))
         
-        # 构建请求URL
-        url = f"{ASR_URL}?{urlencode(auth_params)}"
+        results = []
+        for future, overlap in futures:
+            # 识别在线程池中进行，这里只统计等待的时间
+            with phase('xfyun_asr'):
+                results.append((future.result(), overlap))
+    except AudioDecodeError:
+        # 上传的音频在读取途中解码失败是客户端的问题，交给调用方返回错误而不是备用结果
+        raise
+    except Exception as e:
+        logger.error(f"科大讯飞分段ASR调用失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        for future, _ in futures:
+            future.cancel()
+    
+    failed = sum(1 for result, _ in results if not result.get("success", False))
+    if results and failed == len(results):
+        # 所有分段都识别失败时整体失败，由调用方使用备用结果
+        return results[0][0]
+    if failed:
+        logger.warning(f"科大讯飞ASR有{failed}/{len(results)}个分段识别失败")
+    text = merge_transcripts(
+        [(result["text"] if result.get("success", False) else None, overlap) for result, overlap in results],
+        separator=" " if language.startswith("en") else ""
+    )
+    return {"success": True, "text": text, "segments": len(results), "failed_segments": failed}
+
+def merge_transcripts(parts, separator="", max_overlap=ASR_MERGE_MAX_OVERLAP):
+    """
+    按顺序合并各分段的转写文本
+    
+    与上一段有音频重叠的分段，去掉开头与上一段末尾相同的文字（忽略标点和大小写）；
+    中文逐字比较，英文（separator为空格）逐词比较。
+    
+    Args:
+        parts: (转写文本, 与上一段重叠的字节数)列表，识别失败的分段文本为None
+        separator: 分段之间的分隔符
+        max_overlap: 最多去掉的重复字（词）数
+    """
+    merged = []
+    previous_ok = False
+    for text, overlap in parts:
+        if text is None:
+            previous_ok = False
+            continue
+        tokens = text.split() if separator else list(text)
+        if overlap and previous_ok:
+            # 上一段末尾的标点在重复部分之前，比较时跳过
+            end = len(merged)
+            while end and not merged[end - 1].strip(_PUNCTUATION):
+                end -= 1
+            start = 0
+            while start < len(tokens) and not tokens[start].strip(_PUNCTUATION):
+                start += 1
+            # 中文单字重复很常见，至少两个字相同才视为重叠
+            minimum = 1 if separator else 2
+            for length in range(min(max_overlap, end, len(tokens) - start), minimum - 1, -1):
+                if _normalize_tokens(merged[end - length:end]) == _normalize_tokens(tokens[start:start + length]):
+                    del merged[end:]
+                    tokens = tokens[start + length:]
+                    break
+        merged.extend(tokens)
+        previous_ok = True
+    return separator.join(merged)
+
+def _normalize_tokens(tokens):
+    return [token.strip(_PUNCTUATION).lower() for token in tokens]
+
+def _recognize(audio_data, language):
+    """调用讯飞听写接口识别一段PCM音频，参数同speech_to_text"""
+    if not xfyun_asr_breaker.allow():
+        return {"success": False, "error": "讯飞语音识别服务暂时不可用（熔断中）"}
+    
+    started = time.monotonic()
+    try:
+        # 构建带鉴权参数的请求URL
+        url = xfyun_signer.signed_url(ASR_URL, method="POST")
         
         # 构建请求体
-        body = {
-            "common": {
-                "app_id": XFYUN_APP_ID
-            },
-            "business": {
-                "language": language,  # 语种
-                "domain": "iat",       # 领域
-                "accent": "mandarin",  # 方言，普通话
-                "vad_eos": 3000        # 静默检测（毫秒）
-            },
-            "data": {
-                "status": 2,           # 2表示最后一帧
-                "format": "audio/L16;rate=16000",
-                "encoding": "raw",
-                "audio": base64.b64encode(audio_data).decode('utf-8')
-            }
-        }
+        with phase('audio'):
+            body = asr_request_body(audio_data, language)
         
         # 发送请求
-        response = requests.post(url, json=body)
+        with phase('xfyun_asr'):
+            response = http_client.post(url, read_timeout=XFYUN_READ_TIMEOUT, json=body)
         response.raise_for_status()
         
         # 解析响应
         result = response.json()
         if result["code"] != 0:
+            xfyun_asr_breaker.record(time.monotonic() - started, failed=True)
             return {"success": False, "error": result["message"]}
+        xfyun_asr_breaker.record(time.monotonic() - started)
         
         # 提取识别结果
-        text = ""
-        for item in result["data"]["result"]["ws"]:
-            for word in item["cw"]:
-                text += word["w"]
-        
-        return {"success": True, "text": text}
+        return {"success": True, "text": result_text(result["data"]["result"])}
     
     except Exception as e:
-        current_app.logger.error(f"科大讯飞ASR调用失败: {str(e)}")
-        return {"success": False, "error": str(e)} 
\ No newline at end of file
+        xfyun_asr_breaker.record(time.monotonic() - started, failed=True)
+        logger.error(f"科大讯飞ASR调用失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+class IATTranscript:
+    """
+    科大讯飞流式听写（IAT）协议状态，不包含网络读写
+    
+    负责生成音频帧（首帧status=0，中间帧status=1，结束帧status=2）并合并识别结果；
+    开启动态修正(wpgs)后，pgs为rpl的结果会替换之前的部分结果。同步和异步会话共用。
+    """
+    
+    FRAME_BYTES = 1280  # 16kHz 16bit 单声道40ms音频，讯飞建议的单帧大小
+    
+    def __init__(self, language="zh_cn"):
+        """
+        Args:
+            language: 语言，默认为"zh_cn"
+        """
+        self.language = language
+        self._status = 0  # 下一帧的status
+        self._segments = {}  # sn -> 文本
+        self._lock = threading.Lock()
+        self.error = None
+        self.upstream_failed = False  # 讯飞返回了错误码（本地关闭连接不算）
+    
+    @property
+    def text(self):
+        """当前的转写文本"""
+        with self._lock:
+            return "".join(self._segments[sn] for sn in sorted(self._segments))
+    
+    def next_frame(self, audio, last=False):
+        """生成下一帧音频的JSON消息"""
+        frame = {
+            "data": {
+                "status": 2 if last else self._status,
+                "format": "audio/L16;rate=16000",
+                "encoding": "raw",
+                "audio": base64.b64encode(audio).decode('utf-8')
+            }
+        }
+        if self._status == 0:
+            # 首帧需要携带公共参数和业务参数
+            frame["common"] = {"app_id": XFYUN_APP_ID}
+            frame["business"] = {
+                "language": self.language,  # 语种
+                "domain": "iat",            # 领域
+                "accent": "mandarin",       # 方言，普通话
+                "vad_eos": 3000,            # 静默检测（毫秒）
+                "dwa": "wpgs"               # 开启动态修正，返回部分结果
+            }
+            self._status = 1
+        return json.dumps(frame)
+    
+    def handle_message(self, message):
+        """
+        处理讯飞返回的一条消息
+        
+        Returns:
+            (是否已结束, 转写文本是否有更新)
+        """
+        result = json.loads(message)
+        if result.get("code", 0) != 0:
+            self.error = result.get("message", "识别失败")
+            self.upstream_failed = True
+            return True, False
+        data = result.get("data") or {}
+        updated = bool(data.get("result"))
+        if updated:
+            self._apply_result(data["result"])
+        return data.get("status") == 2, updated
+    
+    def _apply_result(self, result):
+        text = result_text(result)
+        with self._lock:
+            # pgs为rpl时，rg给出的序号区间内的结果被本次结果替换
+            if result.get("pgs") == "rpl":
+                start, end = result.get("rg", [0, 0])
+                for sn in range(start, end + 1):
+                    self._segments.pop(sn, None)
+            self._segments[result.get("sn", len(self._segments) + 1)] = text
+
+class StreamingASRSession(IATTranscript):
+    """
+    科大讯飞流式听写（IAT）会话
+    
+    边录边传：音频按帧发送，识别结果在后台线程中接收，可随时读取当前的部分转写文本。
+    """
+    
+    def __init__(self, language="zh_cn", on_partial=None):
+        """
+        Args:
+            language: 语言，默认为"zh_cn"
+            on_partial: 部分转写结果回调，参数为当前完整文本
+        """
+        super().__init__(language)
+        self.on_partial = on_partial
+        self._connection = None
+        self._reader = None
+        self._buffer = b""
+        self._done = threading.Event()
+        self._connect_elapsed = 0.0
+    
+    def open(self):
+        """
+        建立到讯飞的WebSocket连接并启动结果接收线程
+        
+        Raises:
+            CircuitOpenError: 讯飞语音识别服务处于熔断状态
+        """
+        from websockets.sync.client import connect
+        
+        if not xfyun_asr_breaker.allow():
+            raise CircuitOpenError("讯飞语音识别服务暂时不可用（熔断中）")
+        
+        url = xfyun_signer.signed_url(ASR_WS_URL, method="GET")
+        started = time.monotonic()
+        try:
+            self._connection = connect(url, open_timeout=http_client.HTTP_CONNECT_TIMEOUT, compression=None)
+        except Exception:
+            xfyun_asr_breaker.record(time.monotonic() - started, failed=True)
+            raise
+        self._connect_elapsed = time.monotonic() - started
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+    
+    def send_audio(self, pcm):
+        """追加一段PCM音频，凑满一帧即发送"""
+        self._buffer += pcm
+        while len(self._buffer) >= self.FRAME_BYTES:
+            frame, self._buffer = self._buffer[:self.FRAME_BYTES], self._buffer[self.FRAME_BYTES:]
+            self._connection.send(self.next_frame(frame))
+    
+    def finish(self, timeout=XFYUN_READ_TIMEOUT):
+        """
+        发送剩余音频和结束帧，等待最终结果
+        
+        Returns:
+            最终识别文本
+        """
+        if self._buffer:
+            self._connection.send(self.next_frame(self._buffer))
+            self._buffer = b""
+        self._connection.send(self.next_frame(b"", last=True))
+        with phase('xfyun_asr'):
+            self._done.wait(timeout)
+        return self.text
+    
+    def close(self):
+        """关闭与讯飞的连接"""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+        self._done.set()
+    
+    def _read_results(self):
+        # 熔断统计以握手耗时计入慢调用，讯飞返回错误码计为失败；本地主动关闭连接不计为失败
+        try:
+            for message in self._connection:
+                finished, updated = self.handle_message(message)
+                if updated and self.on_partial:
+                    self.on_partial(self.text)
+                if finished:
+                    break
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            xfyun_asr_breaker.record(self._connect_elapsed, failed=self.upstream_failed)
+            self._done.set()
@@ -0,0 +1,71 @@
+// 录音AudioWorklet：把麦克风音频降采样为16kHz 16bit单声道PCM，约每100ms向主线程发送一块
+// 降采样先做滑动平均低通再线性插值，与后端audio_decoder的PCMResampler一致
+
+const TARGET_RATE = 16000;
+const CHUNK_SAMPLES = TARGET_RATE / 10;
+
+class PCMRecorderProcessor extends AudioWorkletProcessor {
+  constructor() {
+    super();
+    this.step = sampleRate / TARGET_RATE;
+    this.window = Math.max(Math.round(this.step), 1);
+    this.history = new Float32Array(this.window);
+    this.historyIndex = 0;
+    this.historySum = 0;
+    this.previous = 0;
+    this.position = 0;
+    this.output = new Int16Array(CHUNK_SAMPLES);
+    this.length = 0;
+    this.port.onmessage = (event) => {
+      if (event.data === 'flush') {
+        this.flush();
+        this.port.postMessage('done');
+      }
+    };
+  }
+
+  flush() {
+    if (this.length > 0) {
+      const chunk = this.output.slice(0, this.length);
+      this.port.postMessage(chunk.buffer, [chunk.buffer]);
+      this.length = 0;
+    }
+  }
+
+  push(sample) {
+    this.output[this.length++] = Math.max(-32768, Math.min(32767, Math.round(sample * 32767)));
+    if (this.length === CHUNK_SAMPLES) {
+      this.flush();
+    }
+  }
+
+  process(inputs) {
+    const channels = inputs[0];
+    if (!channels || channels.length === 0) {
+      return true;
+    }
+    const frames = channels[0].length;
+    for (let i = 0; i < frames; i++) {
+      let sample = 0;
+      for (let c = 0; c < channels.length; c++) {
+        sample += channels[c][i];
+      }
+      sample /= channels.length;
+      // 滑动平均低通，避免降采样混叠
+      this.historySum += sample - this.history[this.historyIndex];
+      this.history[this.historyIndex] = sample;
+      this.historyIndex = (this.historyIndex + 1) % this.window;
+      const current = this.historySum / this.window;
+      // position为下一个输出样本在[previous, current]区间内的位置
+      while (this.position < 1) {
+        this.push(this.previous + (current - this.previous) * this.position);
+        this.position += this.step;
+      }
+      this.position -= 1;
+      this.previous = current;
+    }
+    return true;
+  }
+}
+
+registerProcessor('pcm-recorder', PCMRecorderProcessor);
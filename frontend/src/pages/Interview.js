@@ -32,31 +32,63 @@ import {
 } from '@mui/icons-material';
 import api from '../services/api';
 
-// 录音功能
+// 录音功能：优先用AudioWorklet在浏览器端转为16kHz PCM，不支持时退回MediaRecorder
+const PCM_MIME_TYPE = 'audio/L16;rate=16000';
+
 const useRecorder = () => {
   const [isRecording, setIsRecording] = useState(false);
   const [audioBlob, setAudioBlob] = useState(null);
   const mediaRecorderRef = useRef(null);
+  const captureRef = useRef(null);
   const chunksRef = useRef([]);
 
+  const startPcmCapture = async (stream) => {
+    const context = new (window.AudioContext || window.webkitAudioContext)();
+    await context.audioWorklet.addModule(`${process.env.PUBLIC_URL}/pcm-recorder-worklet.js`);
+    const source = context.createMediaStreamSource(stream);
+    // 没有输出的节点也会被持续调度，不必连接到扬声器
+    const node = new AudioWorkletNode(context, 'pcm-recorder', { numberOfOutputs: 0 });
+    node.port.onmessage = (e) => {
+      if (e.data === 'done') {
+        // Blob直接引用各段PCM，上传时浏览器按块读取，不拼接整段录音
+        setAudioBlob(new Blob(chunksRef.current, { type: PCM_MIME_TYPE }));
+        chunksRef.current = [];
+        source.disconnect();
+        context.close();
+      } else {
+        chunksRef.current.push(e.data);
+      }
+    };
+    source.connect(node);
+    captureRef.current = { stream, node };
+  };
+
+  const startMediaRecorder = (stream) => {
+    mediaRecorderRef.current = new MediaRecorder(stream);
+    
+    mediaRecorderRef.current.ondataavailable = (e) => {
+      if (e.data.size > 0) {
+        chunksRef.current.push(e.data);
+      }
+    };
+    
+    mediaRecorderRef.current.onstop = () => {
+      const blob = new Blob(chunksRef.current, { type: mediaRecorderRef.current.mimeType });
+      setAudioBlob(blob);
+      chunksRef.current = [];
+    };
+    
+    mediaRecorderRef.current.start();
+  };
+
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-      mediaRecorderRef.current = new MediaRecorder(stream);
-      
-      mediaRecorderRef.current.ondataavailable = (e) => {
-        if (e.data.size > 0) {
-          chunksRef.current.push(e.data);
-        }
-      };
-      
-      mediaRecorderRef.current.onstop = () => {
-        const blob = new Blob(chunksRef.current, { type: 'audio/wav' });
-        setAudioBlob(blob);
-        chunksRef.current = [];
-      };
-      
-      mediaRecorderRef.current.start();
+      if (window.AudioWorkletNode) {
+        await startPcmCapture(stream);
+      } else {
+        startMediaRecorder(stream);
+      }
       setIsRecording(true);
     } catch (err) {
       console.error('无法访问麦克风:', err);
@@ -65,9 +97,17 @@ const useRecorder = () => {
   };
 
   const stopRecording = () => {
-    if (mediaRecorderRef.current && isRecording) {
+    if (!isRecording) {
+      return;
+    }
+    setIsRecording(false);
+    if (captureRef.current) {
+      // 先取回worklet中不足一块的剩余音频，收到done后生成录音
+      captureRef.current.node.port.postMessage('flush');
+      captureRef.current.stream.getTracks().forEach(track => track.stop());
+      captureRef.current = null;
+    } else if (mediaRecorderRef.current) {
       mediaRecorderRef.current.stop();
-      setIsRecording(false);
       
       // 停止所有音轨
       mediaRecorderRef.current.stream.getTracks().forEach(track => track.stop());
@@ -89,6 +129,8 @@ const Interview = () => {
   const [isPlaying, setIsPlaying] = useState(false);
   const [exitDialogOpen, setExitDialogOpen] = useState(false);
   const audioRef = useRef(null);
+  const audioUrlRef = useRef(null);
+  const audioContextRef = useRef(null);
   
   // 录音功能
   const { isRecording, audioBlob, startRecording, stopRecording } = useRecorder();
@@ -112,8 +154,8 @@ const Interview = () => {
     }
   }, [navigate]);
 
-  // 获取问题
-  const fetchQuestion = async (interviewId) => {
+  // 获取问题（一次性返回完整问题）
+  const fetchQuestionOnce = async (interviewId) => {
     setLoading(true);
     setError('');
 
@@ -123,7 +165,7 @@ const Interview = () => {
       if (response.data.status === 'success') {
         const question = response.data.data;
         setCurrentQuestion(question);
-        setQuestions([...questions, question]);
+        setQuestions(prev => [...prev, question]);
         
         // 播放问题语音
         if (question.content) {
@@ -140,29 +182,183 @@ const Interview = () => {
     }
   };
 
-  // 播放问题语音
-  const playQuestionAudio = async (text) => {
+  // 获取问题（通过SSE流式接收，边生成边显示）
+  const fetchQuestion = (interviewId) => {
+    if (typeof window.EventSource === 'undefined') {
+      fetchQuestionOnce(interviewId);
+      return;
+    }
+
+    setLoading(true);
+    setError('');
+    setCurrentQuestion(null);
+
+    let content = '';
+    let finished = false;
+    const source = new EventSource(
+      `${api.defaults.baseURL}/api/interview/question/stream?interview_id=${interviewId}`
+    );
+
+    // 收到增量文本时立即渲染
+    source.addEventListener('token', (e) => {
+      content += JSON.parse(e.data).content;
+      setCurrentQuestion({ id: null, content, streaming: true });
+    });
+
+    // 生成结束，服务端推送问题ID、类型和难度
+    source.addEventListener('done', (e) => {
+      finished = true;
+      source.close();
+      const question = JSON.parse(e.data);
+      setCurrentQuestion(question);
+      setQuestions(prev => [...prev, question]);
+      setLoading(false);
+
+      // 播放问题语音
+      if (question.content) {
+        playQuestionAudio(question.content);
+      }
+    });
+
+    source.onerror = () => {
+      source.close();
+      if (finished) return;
+      // 流式连接失败时退回到普通请求
+      console.error('流式获取问题失败，改用普通请求');
+      fetchQuestionOnce(interviewId);
+    };
+  };
+
+  // 浏览器能播放的音频格式，Opus/MP3体积约为WAV的十分之一，WAV兜底
+  const audioAccept = () => {
+    const types = [];
+    if (audioRef.current?.canPlayType('audio/ogg; codecs=opus')) {
+      types.push('audio/ogg');
+    }
+    if (audioRef.current?.canPlayType('audio/mpeg')) {
+      types.push('audio/mpeg');
+    }
+    return [...types, 'audio/wav;q=0.5'].join(', ');
+  };
+
+  // 播放问题语音（一次性获取完整音频）
+  const playQuestionAudioOnce = async (text) => {
     try {
-      console.log("正在请求TTS API..."); const response = await api.post('/api/speech/tts', {
-        text,
-        language: session?.language || 'zh'
+      // 请求二进制音频，省去base64编码带来的体积和解码开销
+      const response = await fetch(`${api.defaults.baseURL}/api/speech/tts`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': audioAccept() },
+        body: JSON.stringify({ text, language: session?.language || 'zh' })
       });
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      if (response.headers.get('X-Audio-Source') === 'mock') {
+        return;
+      }
       
-      if (response.data.status === 'success') {
-        const audioData = response.data.data.audio;
-        const audioSrc = `data:audio/wav;base64,${audioData}`;
-        
-        if (audioRef.current) {
-          audioRef.current.src = audioSrc;
-          audioRef.current.play();
-          setIsPlaying(true);
+      const blob = await response.blob();
+      if (audioRef.current) {
+        if (audioUrlRef.current) {
+          URL.revokeObjectURL(audioUrlRef.current);
         }
+        audioUrlRef.current = URL.createObjectURL(blob);
+        audioRef.current.src = audioUrlRef.current;
+        audioRef.current.play();
+        setIsPlaying(true);
       }
     } catch (err) {
       console.error('获取语音失败:', err);
     }
   };
 
+  // 播放问题语音（分句流式合成，收到第一段即开始播放）
+  const playQuestionAudio = async (text) => {
+    const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+    if (!AudioContextClass || !window.ReadableStream) {
+      playQuestionAudioOnce(text);
+      return;
+    }
+
+    try {
+      const response = await fetch(`${api.defaults.baseURL}/api/speech/tts/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ text, language: session?.language || 'zh' })
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+
+      if (!audioContextRef.current) {
+        audioContextRef.current = new AudioContextClass();
+      }
+      const context = audioContextRef.current;
+      let nextStartTime = context.currentTime;
+      let lastSource = null;
+
+      // 把一段PCM音频排到上一段之后播放
+      const scheduleChunk = (chunk) => {
+        if (!chunk.audio) return;
+        const bytes = Uint8Array.from(atob(chunk.audio), c => c.charCodeAt(0));
+        const samples = new Int16Array(bytes.buffer, 0, Math.floor(bytes.length / 2));
+        if (samples.length === 0) return;
+        const buffer = context.createBuffer(1, samples.length, chunk.sample_rate);
+        const channel = buffer.getChannelData(0);
+        for (let i = 0; i < samples.length; i++) {
+          channel[i] = samples[i] / 32768;
+        }
+        const source = context.createBufferSource();
+        source.buffer = buffer;
+        source.connect(context.destination);
+        nextStartTime = Math.max(nextStartTime, context.currentTime);
+        source.start(nextStartTime);
+        nextStartTime += buffer.duration;
+        lastSource = source;
+        setIsPlaying(true);
+      };
+
+      // 按行解析NDJSON，每收到一段立即排入播放队列
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let pending = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        pending += decoder.decode(value, { stream: true });
+        const lines = pending.split('\n');
+        pending = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => scheduleChunk(JSON.parse(line)));
+      }
+      if (pending.trim()) {
+        scheduleChunk(JSON.parse(pending));
+      }
+
+      if (lastSource) {
+        lastSource.onended = () => setIsPlaying(false);
+      }
+    } catch (err) {
+      console.error('流式获取语音失败，改用普通请求:', err);
+      playQuestionAudioOnce(text);
+    }
+  };
+
+  // 轮询答案评估任务，直到完成
+  const waitForEvaluation = async (pollUrl) => {
+    for (let attempt = 0; attempt < 120; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, attempt === 0 ? 300 : 1000));
+      const response = await api.get(pollUrl);
+      const job = response.data.data;
+      if (job.status === 'done') {
+        return job.result;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || '评估失败');
+      }
+    }
+    throw new Error('评估超时');
+  };
+
   // 提交答案
   const submitAnswer = async () => {
     if (!answer.trim() || !currentQuestion || !session) return;
@@ -174,11 +370,15 @@ const Interview = () => {
       console.log("正在请求TTS API..."); const response = await api.post('/api/interview/answer', {
         interview_id: session.interview_id,
         question_id: currentQuestion.id,
-        answer: answer
+        answer: answer,
+        async: true
       });
       
       if (response.data.status === 'success') {
-        const analysis = response.data.data;
+        // 评估在后台队列中进行，轮询获取结果
+        const analysis = response.status === 202
+          ? await waitForEvaluation(response.data.data.poll_url)
+          : response.data.data;
         
         // 保存答案
         const newAnswer = {
@@ -217,11 +417,20 @@ const Interview = () => {
     setLoading(true);
     
     try {
-      const formData = new FormData();
-      formData.append('audio', audioBlob);
-      formData.append('language', session?.language || 'zh');
-      
-      console.log("正在请求TTS API..."); const response = await api.post('/api/speech/asr', formData);
+      const language = session?.language || 'zh';
+      let response;
+      // Blob会把type转为小写
+      if (audioBlob.type === PCM_MIME_TYPE.toLowerCase()) {
+        // 16kHz PCM直接作为请求体上传，后端边读边转发给讯飞
+        response = await api.post(`/api/speech/asr?language=${language}`, audioBlob, {
+          headers: { 'Content-Type': PCM_MIME_TYPE }
+        });
+      } else {
+        const formData = new FormData();
+        formData.append('audio', audioBlob);
+        formData.append('language', language);
+        response = await api.post('/api/speech/asr', formData);
+      }
       
       if (response.data.status === 'success') {
         const recognizedText = response.data.data.text;
@@ -257,6 +466,9 @@ const Interview = () => {
       if (audioElement) {
         audioElement.removeEventListener('ended', handleEnded);
       }
+      if (audioUrlRef.current) {
+        URL.revokeObjectURL(audioUrlRef.current);
+      }
     };
   }, []);
 